@@ -0,0 +1,151 @@
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple
+
+from draft_room import DraftError
+
+# Keys each limiter or cache remembers; the least recently used are dropped first
+MAX_KEYS = 10000
+
+
+class TokenBucket:
+    """Allows `rate` requests a second on average, in bursts of up to `burst`."""
+
+    __slots__ = ("tokens", "updated")
+
+    def __init__(self, burst: float, now: float):
+        self.tokens = burst
+        self.updated = now
+
+    def take(self, rate: float, burst: float, now: float) -> float:
+        """Spend a token; returns 0, or the seconds until one is available if there is none."""
+        self.tokens = min(burst, self.tokens + (now - self.updated) * rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / rate
+
+
+class RateLimiter:
+    """A token bucket per key, e.g. per team or per client address.
+
+    Checking a request is a dict lookup and some arithmetic, so rejecting a
+    flood costs far less than validating it. Only the `max_keys` most recently
+    seen keys are kept; a forgotten key starts again with a full bucket.
+    """
+
+    def __init__(self, rate: float, burst: float, max_keys: int = MAX_KEYS,
+                 clock: Callable[[], float] = time.monotonic):
+        self.rate = rate
+        self.burst = burst
+        self.max_keys = max_keys
+        self.clock = clock
+        self.buckets: "OrderedDict[Hashable, TokenBucket]" = OrderedDict()
+
+    def acquire(self, key: Hashable) -> float:
+        """Take a token for `key`; returns 0, or how long to wait before retrying."""
+        now = self.clock()
+        bucket = self.buckets.get(key)
+        if bucket is None:
+            bucket = self.buckets[key] = TokenBucket(self.burst, now)
+            if len(self.buckets) > self.max_keys:
+                self.buckets.popitem(last=False)
+        else:
+            self.buckets.move_to_end(key)
+        return bucket.take(self.rate, self.burst, now)
+
+    def clear(self):
+        self.buckets.clear()
+
+
+class ConcurrencyLimiter:
+    """At most `limit` requests in progress per key, e.g. per draft.
+
+    Requests over the limit are turned away at once rather than queued, so a
+    burst cannot build up a backlog that the draft works through long after
+    the clients have given up.
+    """
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.active: Dict[Hashable, int] = {}
+
+    def acquire(self, key: Hashable) -> bool:
+        """Start a request for `key`; False if it already has `limit` in progress."""
+        active = self.active.get(key, 0)
+        if active >= self.limit:
+            return False
+        self.active[key] = active + 1
+        return True
+
+    def release(self, key: Hashable):
+        active = self.active[key] - 1
+        if active:
+            self.active[key] = active
+        else:
+            del self.active[key]
+
+    def clear(self):
+        self.active.clear()
+
+
+class IdempotencyCache:
+    """Results of recent requests by idempotency key.
+
+    A retry with a key that was already used gets the first request's result,
+    or its error, instead of running again; a retry that arrives while the
+    first is still running waits for it. Errors that say "try again later"
+    (429 and 503) are not kept, so the retry really is tried again.
+    """
+
+    def __init__(self, ttl: float = 3600, max_keys: int = MAX_KEYS, clock: Callable[[], float] = time.monotonic):
+        self.ttl = ttl
+        self.max_keys = max_keys
+        self.clock = clock
+        # key -> (request fingerprint, future of the result, time it finished)
+        self.entries: "OrderedDict[Hashable, Tuple[Hashable, asyncio.Future, float]]" = OrderedDict()
+
+    async def run(self, key: Hashable, fingerprint: Hashable, call: Callable[[], Awaitable[Any]]) -> Any:
+        entry = self.entries.get(key)
+        if entry is not None and entry[1].done() and self.clock() - entry[2] > self.ttl:
+            del self.entries[key]
+            entry = None
+        if entry is not None:
+            if entry[0] != fingerprint:
+                raise DraftError("Idempotency key was already used for a different request", status_code=422)
+            if entry[1].done():
+                return entry[1].result()
+            return await asyncio.shield(entry[1])
+        future = asyncio.get_running_loop().create_future()
+        self.entries[key] = (fingerprint, future, 0.0)
+        if len(self.entries) > self.max_keys:
+            self.entries.popitem(last=False)
+        try:
+            result = await call()
+        except DraftError as exc:
+            if exc.status_code in (429, 503):
+                self.entries.pop(key, None)
+            else:
+                self._finish(key, fingerprint, future)
+            future.set_exception(exc)
+            # Nobody else may be waiting; mark the exception as retrieved.
+            future.exception()
+            raise
+        except BaseException:
+            # Crashed or cancelled: retries run again, and waiting ones are told to.
+            self.entries.pop(key, None)
+            future.set_exception(DraftError("Request did not complete, try again", status_code=503, retry_after=1))
+            future.exception()
+            raise
+        self._finish(key, fingerprint, future)
+        future.set_result(result)
+        return result
+
+    def _finish(self, key: Hashable, fingerprint: Hashable, future: asyncio.Future):
+        if key in self.entries:
+            self.entries[key] = (fingerprint, future, self.clock())
+
+    def clear(self):
+        self.entries.clear()
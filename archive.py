@@ -0,0 +1,509 @@
+"""Columnar archive of finished drafts, for analytics across many drafts.
+
+Finished drafts are appended to a small pending log and, every
+SEGMENT_DRAFTS drafts, compacted into an immutable segment file: one
+contiguous array per column (draft, pick, round, player, position, team),
+with strings stored once in the segment's dictionary. Segments are
+memory-mapped, and a query only reads the columns it needs, so scanning
+millions of picks is a few passes over flat arrays, vectorized with NumPy
+when it is installed. Drafts are appended in the order they finish, so a
+time window is a suffix of each segment and older segments are skipped
+without being read.
+"""
+import json
+import mmap
+import os
+import struct
+import sys
+import tempfile
+import threading
+import time
+from array import array
+from bisect import bisect_left
+from collections import Counter, defaultdict
+from concurrent.futures import Executor
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+MAGIC = b"DRAFTCOL"
+VERSION = 1
+# Finished drafts compacted into each segment
+SEGMENT_DRAFTS = 1000
+# Scans of at least this many segment files are spread over a process pool, when one is given
+PARALLEL_SEGMENTS = 4
+DAY = 86400.0
+
+# One row per pick; typecodes of the stored arrays, which are little-endian
+COLUMNS = {"draft": "I", "overall": "H", "round": "H", "player": "I", "position": "I", "team": "I"}
+NUMPY_TYPES = {"I": "<u4", "H": "<u2"}
+_HEADER_SIZE = struct.Struct("<I")
+
+
+def _pad(size: int) -> int:
+    return -size % 8
+
+
+def encode_segment(drafts: Sequence[dict]) -> bytes:
+    """Compact finished drafts (as made by `draft_record()`) into one segment."""
+    strings: Dict[str, int] = {}
+
+    def intern(value: str) -> int:
+        index = strings.get(value)
+        if index is None:
+            index = strings[value] = len(strings)
+        return index
+
+    columns = {name: array(typecode) for name, typecode in COLUMNS.items()}
+    starts = []
+    for index, draft in enumerate(drafts):
+        starts.append(len(columns["draft"]))
+        teams = draft["teams"]
+        for overall, team, player, position in sorted(draft["picks"]):
+            columns["draft"].append(index)
+            columns["overall"].append(overall)
+            columns["round"].append(overall // teams + 1)
+            columns["player"].append(intern(player))
+            columns["position"].append(intern(position))
+            columns["team"].append(intern(team))
+    finished = [draft["finished"] for draft in drafts]
+    header = {
+        "version": VERSION,
+        "rows": len(columns["draft"]),
+        "drafts": [draft["draft_id"] for draft in drafts],
+        "ids": [draft["id"] for draft in drafts],
+        "finished": finished,
+        "starts": starts,
+        "strings": list(strings),
+        "columns": {},
+    }
+    blocks = []
+    offset = 0
+    for name, column in columns.items():
+        if sys.byteorder != "little":
+            column.byteswap()
+        data = column.tobytes()
+        header["columns"][name] = [offset, len(column)]
+        blocks.append(data + b"\0" * _pad(len(data)))
+        offset += len(data) + _pad(len(data))
+    encoded = json.dumps(header, separators=(",", ":")).encode()
+    prefix = MAGIC + _HEADER_SIZE.pack(len(encoded)) + encoded
+    return prefix + b"\0" * _pad(len(prefix)) + b"".join(blocks)
+
+
+class Segment:
+    """A read-only view of one segment, over a memory map or bytes."""
+
+    def __init__(self, buffer, path: Optional[str] = None):
+        if bytes(buffer[:len(MAGIC)]) != MAGIC:
+            raise ValueError(f"Not a draft archive segment: {path}")
+        (size,) = _HEADER_SIZE.unpack_from(buffer, len(MAGIC))
+        start = len(MAGIC) + _HEADER_SIZE.size
+        header = json.loads(bytes(buffer[start:start + size]))
+        if header["version"] != VERSION:
+            raise ValueError(f"Unsupported archive segment version {header['version']}: {path}")
+        self.buffer = buffer
+        self.path = path
+        self.data_offset = start + size + _pad(start + size)
+        self.rows: int = header["rows"]
+        self.drafts: List[str] = header["drafts"]
+        self.ids: List[int] = header["ids"]
+        self.finished: List[float] = header["finished"]
+        self.starts: List[int] = header["starts"]
+        self.strings: List[str] = header["strings"]
+        self.columns: Dict[str, List[int]] = header["columns"]
+        self._index: Optional[Dict[str, int]] = None
+
+    @classmethod
+    def open(cls, path: str) -> "Segment":
+        with open(path, "rb") as f:
+            return cls(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ), path)
+
+    def close(self):
+        if isinstance(self.buffer, mmap.mmap):
+            try:
+                self.buffer.close()
+            except BufferError:
+                # A scan still holds a view; the map is released with it.
+                pass
+
+    def string_id(self, value: str) -> Optional[int]:
+        if self._index is None:
+            self._index = {string: i for i, string in enumerate(self.strings)}
+        return self._index.get(value)
+
+    def first_row(self, since: Optional[float]) -> Tuple[int, int]:
+        """(row, draft) where the drafts finished at or after `since` begin."""
+        if since is None:
+            return 0, 0
+        draft = bisect_left(self.finished, since)
+        return (self.starts[draft] if draft < len(self.starts) else self.rows), draft
+
+    def column(self, name: str, start: int = 0):
+        """Rows `start` on of a column, as a NumPy array if available, else a memoryview."""
+        offset, count = self.columns[name]
+        typecode = COLUMNS[name]
+        if np is not None:
+            return np.frombuffer(self.buffer, dtype=NUMPY_TYPES[typecode], count=count,
+                                 offset=self.data_offset + offset)[start:]
+        size = struct.calcsize(typecode)
+        view = memoryview(self.buffer)[self.data_offset + offset:self.data_offset + offset + count * size]
+        return view.cast(typecode)[start:]
+
+
+# Queries: each scans one segment into a partial result, keyed by strings so
+# that the partials of different segments can be merged.
+
+def scan_adp(segment: Segment, since: Optional[float]) -> dict:
+    start, first_draft = segment.first_row(since)
+    players = segment.column("player", start)
+    overall = segment.column("overall", start)
+    positions = segment.column("position", start)
+    size = len(segment.strings)
+    if np is not None:
+        sums = np.bincount(players, weights=overall, minlength=size).tolist()
+        counts = np.bincount(players, minlength=size).tolist()
+        position_of = np.zeros(size, dtype=np.int64)
+        position_of[players] = positions
+        position_of = position_of.tolist()
+    else:
+        sums = [0] * size
+        counts = [0] * size
+        position_of = [0] * size
+        for player, pick, position in zip(players, overall, positions):
+            sums[player] += pick
+            counts[player] += 1
+            position_of[player] = position
+    strings = segment.strings
+    return {
+        "drafts": len(segment.drafts) - first_draft,
+        "players": {strings[i]: [sums[i], counts[i], strings[position_of[i]]] for i in range(size) if counts[i]},
+    }
+
+
+def merge_adp(partials: List[dict]) -> dict:
+    drafts = 0
+    players: Dict[str, list] = {}
+    for partial in partials:
+        drafts += partial["drafts"]
+        for name, (total, count, position) in partial["players"].items():
+            entry = players.get(name)
+            if entry is None:
+                players[name] = [total, count, position]
+            else:
+                entry[0] += total
+                entry[1] += count
+    return {"drafts": drafts, "players": players}
+
+
+def scan_runs(segment: Segment, since: Optional[float], min_length: int) -> dict:
+    """Runs: stretches of consecutive picks in a draft at the same position."""
+    start, _ = segment.first_row(since)
+    drafts = segment.column("draft", start)
+    positions = segment.column("position", start)
+    runs: Dict[str, list] = {}
+
+    def add(position: int, length: int, count: int = 1, longest: Optional[int] = None):
+        entry = runs.setdefault(segment.strings[position], [0, 0, 0])
+        entry[0] += count
+        entry[1] += length
+        entry[2] = max(entry[2], longest or length)
+
+    if not len(drafts):
+        return runs
+    if np is not None:
+        # A run starts wherever the draft or the position changes
+        starts = np.flatnonzero(np.concatenate(([True], (np.diff(drafts) != 0) | (np.diff(positions) != 0))))
+        lengths = np.diff(np.append(starts, len(drafts)))
+        keep = lengths >= min_length
+        starts, lengths = starts[keep], lengths[keep]
+        run_positions = positions[starts]
+        for position in np.unique(run_positions).tolist():
+            selected = lengths[run_positions == position]
+            add(position, int(selected.sum()), len(selected), int(selected.max()))
+        return runs
+    current_draft, current_position, length = drafts[0], positions[0], 0
+    for draft, position in zip(drafts, positions):
+        if draft == current_draft and position == current_position:
+            length += 1
+            continue
+        if length >= min_length:
+            add(current_position, length)
+        current_draft, current_position, length = draft, position, 1
+    if length >= min_length:
+        add(current_position, length)
+    return runs
+
+
+def merge_runs(partials: List[dict]) -> dict:
+    runs: Dict[str, list] = {}
+    for partial in partials:
+        for position, (count, total, longest) in partial.items():
+            entry = runs.setdefault(position, [0, 0, 0])
+            entry[0] += count
+            entry[1] += total
+            entry[2] = max(entry[2], longest)
+    return runs
+
+
+def scan_team(segment: Segment, since: Optional[float], team: str) -> dict:
+    """What a team (manager) drafted, by round and position."""
+    team_id = segment.string_id(team)
+    if team_id is None:
+        return {"drafts": 0, "picks": {}}
+    start, _ = segment.first_row(since)
+    teams = segment.column("team", start)
+    rounds = segment.column("round", start)
+    positions = segment.column("position", start)
+    drafts = segment.column("draft", start)
+    picks: Counter = Counter()
+    if np is not None:
+        mask = teams == team_id
+        draft_count = len(np.unique(drafts[mask]))
+        keys, counts = np.unique(rounds[mask].astype(np.int64) << 32 | positions[mask], return_counts=True)
+        for key, count in zip(keys.tolist(), counts.tolist()):
+            picks[f"{key >> 32}:{segment.strings[key & 0xFFFFFFFF]}"] = count
+    else:
+        seen = set()
+        for team_index, round_number, position, draft in zip(teams, rounds, positions, drafts):
+            if team_index == team_id:
+                picks[f"{round_number}:{segment.strings[position]}"] += 1
+                seen.add(draft)
+        draft_count = len(seen)
+    return {"drafts": draft_count, "picks": dict(picks)}
+
+
+def merge_team(partials: List[dict]) -> dict:
+    drafts = 0
+    picks: Counter = Counter()
+    for partial in partials:
+        drafts += partial["drafts"]
+        picks.update(partial["picks"])
+    return {"drafts": drafts, "picks": picks}
+
+
+QUERIES: Dict[str, Tuple[Callable[..., Any], Callable[[List[Any]], Any]]] = {
+    "adp": (scan_adp, merge_adp),
+    "runs": (scan_runs, merge_runs),
+    "team": (scan_team, merge_team),
+}
+
+
+def scan_file(path: str, query: str, since: Optional[float], args: tuple):
+    """Scan one segment file; run in worker processes for parallel scans."""
+    segment = Segment.open(path)
+    try:
+        return QUERIES[query][0](segment, since, *args)
+    finally:
+        segment.close()
+
+
+def draft_record(room, finished: Optional[float] = None) -> dict:
+    """What the archive keeps of a finished draft room."""
+    by_name = room.catalog.by_name
+    players = room.catalog.players
+    return {
+        "draft_id": room.draft_id,
+        "finished": time.time() if finished is None else finished,
+        "pool": room.pool_id,
+        "teams": len(room.draft_order),
+        "picks": [[overall, team, player, players[by_name[player]].position or "?"]
+                  for overall, team, player in room.pick_history],
+    }
+
+
+class DraftArchive:
+    """Finished drafts, appended to segments in `directory` (or kept in memory without one).
+
+    Several worker processes can share a directory: each writes its own
+    pending log and segments, tagged with `writer`, and reads everyone's
+    segments. Drafts still in another worker's pending log are not visible
+    until that worker compacts them.
+    """
+
+    def __init__(self, directory: Optional[str] = None, writer: str = "0", segment_drafts: int = SEGMENT_DRAFTS):
+        self.directory = directory
+        self.writer = writer
+        self.segment_drafts = segment_drafts
+        self.segments: Dict[str, Segment] = {}
+        self.pending: List[dict] = []
+        # Changes whenever a draft is added, so query results can be cached by it
+        self.version = 0
+        self._next_id = 1
+        self._pending_segment: Optional[Segment] = None
+        self._lock = threading.Lock()
+        self._opened = False
+
+    def _pending_path(self) -> str:
+        return os.path.join(self.directory, f"pending-{self.writer}.jsonl")
+
+    def open(self):
+        """Map the segments on disk and load this writer's pending drafts."""
+        with self._lock:
+            self._open()
+
+    def _open(self):
+        self._opened = True
+        if not self.directory:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        self._refresh()
+        compacted = max((max(segment.ids, default=0) for name, segment in self.segments.items()
+                         if name.startswith(f"{self.writer}-")), default=0)
+        self.pending = []
+        try:
+            with open(self._pending_path(), encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        draft = json.loads(line)
+                    except ValueError:
+                        # Torn last line from a crash mid-write
+                        continue
+                    # Already in a segment if the process stopped before the log was cleared
+                    if draft["id"] > compacted:
+                        self.pending.append(draft)
+        except FileNotFoundError:
+            pass
+        self._next_id = max([compacted] + [draft["id"] for draft in self.pending]) + 1
+        self._pending_segment = None
+        self.version += 1
+
+    def _refresh(self):
+        """Map segment files written since the last look, including other workers' ones."""
+        if not self.directory:
+            return
+        for name in sorted(os.listdir(self.directory)):
+            if name.endswith(".col") and name not in self.segments:
+                self.segments[name] = Segment.open(os.path.join(self.directory, name))
+
+    def add(self, draft: dict):
+        """Archive a finished draft from `draft_record()`; compacts the pending drafts once there are enough."""
+        with self._lock:
+            if not self._opened:
+                self._open()
+            draft = dict(draft, id=self._next_id)
+            self._next_id += 1
+            if self.directory:
+                with open(self._pending_path(), "a", encoding="utf-8") as f:
+                    f.write(json.dumps(draft, separators=(",", ":")) + "\n")
+            self.pending.append(draft)
+            self._pending_segment = None
+            self.version += 1
+            if len(self.pending) >= self.segment_drafts:
+                self._compact()
+
+    def compact(self):
+        """Write the pending drafts out as a segment."""
+        with self._lock:
+            if self.pending:
+                self._compact()
+
+    def _compact(self):
+        data = encode_segment(self.pending)
+        name = f"{self.writer}-{self.pending[-1]['id']:010d}.col"
+        if self.directory:
+            path = os.path.join(self.directory, name)
+            fd, temp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+            with open(fd, "wb") as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_path, path)
+            # The drafts are safe in the segment now.
+            open(self._pending_path(), "w").close()
+            self.segments[name] = Segment.open(path)
+        else:
+            self.segments[name] = Segment(data)
+        self.pending = []
+        self._pending_segment = None
+
+    def __len__(self) -> int:
+        with self._lock:
+            return sum(len(segment.drafts) for segment in self.segments.values()) + len(self.pending)
+
+    def query(self, query: str, since: Optional[float] = None, args: tuple = (),
+              executor: Optional[Executor] = None):
+        """Run a query over every archived draft finished at or after `since`.
+
+        With an `executor` (e.g. a process pool) and enough segment files,
+        segments are scanned in parallel.
+        """
+        scan, merge = QUERIES[query]
+        with self._lock:
+            if not self._opened:
+                self._open()
+            self._refresh()
+            if self._pending_segment is None and self.pending:
+                self._pending_segment = Segment(encode_segment(self.pending))
+            # Segments with nothing in the window are skipped without reading a column.
+            segments = [segment for segment in self.segments.values()
+                        if since is None or (segment.finished and segment.finished[-1] >= since)]
+            pending = self._pending_segment
+        partials = []
+        files = [segment for segment in segments if segment.path]
+        if executor is not None and len(files) >= PARALLEL_SEGMENTS:
+            partials.extend(executor.map(scan_file, [segment.path for segment in files],
+                                         [query] * len(files), [since] * len(files), [args] * len(files)))
+            segments = [segment for segment in segments if not segment.path]
+        partials.extend(scan(segment, since, *args) for segment in segments)
+        if pending is not None:
+            partials.append(scan(pending, since, *args))
+        return merge(partials)
+
+    def adp(self, since: Optional[float] = None, position: Optional[str] = None, limit: int = 50,
+            executor: Optional[Executor] = None) -> dict:
+        """Average draft position (overall pick, counted from 1) of every drafted player, earliest first."""
+        result = self.query("adp", since, executor=executor)
+        drafts = result["drafts"]
+        players = [
+            {"name": name, "position": player_position, "adp": round(total / count + 1, 2),
+             "picks": count, "drafted": round(count / drafts, 4)}
+            for name, (total, count, player_position) in result["players"].items()
+            if position is None or player_position == position
+        ]
+        players.sort(key=lambda player: (player["adp"], player["name"]))
+        return {"drafts": drafts, "players": players[:limit]}
+
+    def runs(self, since: Optional[float] = None, min_length: int = 3, executor: Optional[Executor] = None) -> dict:
+        """Positional runs of at least `min_length` consecutive picks, by position."""
+        result = self.query("runs", since, (min_length,), executor)
+        return {
+            "min_length": min_length,
+            "positions": {
+                position: {"runs": count, "average_length": round(total / count, 2), "longest": longest}
+                for position, (count, total, longest) in sorted(result.items())
+            },
+        }
+
+    def team(self, team: str, since: Optional[float] = None, executor: Optional[Executor] = None) -> dict:
+        """How a team (manager) drafts: positions taken overall and in each round."""
+        result = self.query("team", since, (team,), executor)
+        positions: Counter = Counter()
+        by_round: Dict[int, Dict[str, int]] = defaultdict(dict)
+        for key, count in result["picks"].items():
+            round_number, position = key.split(":", 1)
+            positions[position] += count
+            by_round[int(round_number)][position] = count
+        return {
+            "team": team,
+            "drafts": result["drafts"],
+            "picks": sum(positions.values()),
+            "positions": dict(positions.most_common()),
+            "by_round": {round_number: dict(sorted(by_round[round_number].items(), key=lambda item: -item[1]))
+                         for round_number in sorted(by_round)},
+        }
+
+    def clear(self):
+        """Forget everything in memory; drafts on disk are loaded again on use."""
+        with self._lock:
+            for segment in self.segments.values():
+                segment.close()
+            self.segments = {}
+            self.pending = []
+            self._pending_segment = None
+            self._next_id = 1
+            self._opened = False
+            self.version += 1
@@ -0,0 +1,49 @@
+from collections import Counter
+from typing import Dict, Iterable, List, Optional
+
+from player_pool import Player, PlayerPool
+
+# Starters a team wants at each position before it drafts depth
+ROSTER_NEEDS: Dict[str, int] = {"QB": 1, "RB": 2, "WR": 2, "TE": 1}
+
+
+class TeamQueue:
+    """Players a team wants, in the order it uploaded them."""
+
+    __slots__ = ("ids", "head")
+
+    def __init__(self, ids: Iterable[int]):
+        self.ids: List[int] = list(ids)
+        self.head = 0
+
+    def next_available(self, pool: PlayerPool) -> Optional[Player]:
+        """The first queued player still available; earlier, drafted ones are skipped for good."""
+        while self.head < len(self.ids):
+            player_id = self.ids[self.head]
+            if pool.available[player_id]:
+                return pool.catalog.players[player_id]
+            self.head += 1
+        return None
+
+
+def choose_player(pool: PlayerPool, roster: List[str], queue: Optional[TeamQueue] = None,
+                  needs: Dict[str, int] = ROSTER_NEEDS) -> Optional[Player]:
+    """The best available player for a team that has drafted `roster`.
+
+    The team's own queue comes first. Otherwise it gets the highest-ranked
+    player at a position it still needs, or the best player overall once
+    every need is filled. Each candidate is the head of a ranked index, so
+    this never scans the pool.
+    """
+    if queue is not None:
+        player = queue.next_available(pool)
+        if player is not None:
+            return player
+    by_name = pool.catalog.by_name
+    players = pool.catalog.players
+    filled = Counter(players[by_name[name]].position for name in roster)
+    candidates = [pool.best_available(position) for position, need in needs.items() if filled[position] < need]
+    candidates = [player for player in candidates if player is not None]
+    if candidates:
+        return min(candidates, key=lambda player: (player.rank, player.id))
+    return pool.best_available()
@@ -0,0 +1,451 @@
+"""Load and latency benchmark for the draft server.
+
+Runs N drafts at once, each with M WebSocket spectators, drives every draft
+through registration, start and all of its picks, and reports pick latency,
+broadcast delivery latency, message throughput and server memory per room and
+per connection. Results are written as JSON so runs from different commits
+can be compared:
+
+    python benchmark.py --drafts 50 --spectators 20
+    python benchmark.py --drafts 50 --spectators 20 --compare bench_results/<earlier run>.json
+
+`--static N` instead fetches the demo page N times, as a browser with gzip
+support would, and reports requests per second and bytes sent.
+
+`--idle N` holds N idle WebSocket clients of one draft in this process, talking
+to the app over ASGI rather than sockets, and reports the memory each costs
+against IDLE_CONNECTION_BUDGET and how long a heartbeat sweep over all of them
+takes:
+
+    python benchmark.py --idle 50000
+
+By default a server is started on a free port for the run; `--url` targets
+one that is already running instead (memory is then not measured).
+"""
+import argparse
+import asyncio
+import gc
+import json
+import math
+import os
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+from typing import Dict, List, Optional
+
+import httpx
+import websockets
+
+from draft_room import MAX_TEAMS, ROUNDS
+
+RESULTS_DIR = "bench_results"
+# Spectators' answer to the server's heartbeat pings
+PONG = json.dumps({"type": "pong"})
+
+# Metrics compared by --compare, and whether a larger value is better
+COMPARED = {
+    "pick_latency_ms.p50": False,
+    "pick_latency_ms.p95": False,
+    "pick_latency_ms.p99": False,
+    "broadcast_latency_ms.p50": False,
+    "broadcast_latency_ms.p95": False,
+    "broadcast_latency_ms.p99": False,
+    "picks_per_second": True,
+    "messages_per_second": True,
+    "memory.per_room_bytes": False,
+    "memory.per_connection_bytes": False,
+    "requests_per_second": True,
+    "bytes_per_request": False,
+    "idle_connection_bytes": False,
+    "heartbeat_sweep_ms": False,
+}
+
+# Memory an idle WebSocket client may cost the app, checked by --idle
+IDLE_CONNECTION_BUDGET = 16 * 1024
+
+
+def percentile(values: List[float], pct: float) -> Optional[float]:
+    """Nearest-rank percentile of `values`, or None if there are none."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(math.ceil(pct * len(ordered) / 100), 1)
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def summarize(seconds: List[float]) -> dict:
+    """Latency percentiles in milliseconds."""
+    ms = [s * 1000 for s in seconds]
+    return {
+        "count": len(ms),
+        "p50": percentile(ms, 50),
+        "p95": percentile(ms, 95),
+        "p99": percentile(ms, 99),
+        "max": max(ms, default=None),
+    }
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def rss_bytes(pid: int) -> Optional[int]:
+    """Resident memory of a process, where /proc is available."""
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return None
+
+
+def start_server(port: int, workers: int = 1, timeout: float = 15.0) -> subprocess.Popen:
+    """Start the app with uvicorn and wait until /readyz says it is ready."""
+    # Every simulated client shares one address, so the per-client rate limit is lifted.
+    env = dict(os.environ, DRAFT_WORKERS=str(workers), DRAFT_CLIENT_RATE=os.environ.get("DRAFT_CLIENT_RATE", "1e9"))
+    command = [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"]
+    if workers > 1:
+        command += ["--workers", str(workers)]
+    process = subprocess.Popen(command, cwd=os.path.dirname(os.path.abspath(__file__)), env=env)
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            # 503 (an HTTPError, so an OSError) until drafts are recovered and storage is writing
+            urllib.request.urlopen(f"http://127.0.0.1:{port}/readyz", timeout=1).close()
+            return process
+        except OSError:
+            if process.poll() is not None or time.monotonic() > deadline:
+                process.kill()
+                raise RuntimeError("Benchmark server did not start")
+            time.sleep(0.05)
+
+
+class Run:
+    """Measurements collected while the benchmark drives the server."""
+
+    def __init__(self):
+        self.pick_latencies: List[float] = []
+        self.broadcast_latencies: List[float] = []
+        # (draft id, player) -> when the pick request was sent
+        self.sent: Dict[tuple, float] = {}
+        self.messages = 0
+        self.errors = 0
+
+
+class Spectator:
+    """One WebSocket client following a draft."""
+
+    def __init__(self, url: str, draft_id: str):
+        self.url = url
+        self.draft_id = draft_id
+        self.ws = None
+
+    async def connect(self):
+        self.ws = await websockets.connect(self.url, max_size=None)
+        await self.ws.recv()  # Initial snapshot
+
+    async def follow(self, run: Run, final_seq: int, timeout: float):
+        """Read events until the draft's last one arrives, answering the server's heartbeat pings."""
+        deadline = time.monotonic() + timeout
+        try:
+            while True:
+                remaining = max(deadline - time.monotonic(), 0.001)
+                message = json.loads(await asyncio.wait_for(self.ws.recv(), remaining))
+                received = time.perf_counter()
+                if message["type"] == "ping":
+                    await self.ws.send(PONG)
+                    continue
+                run.messages += 1
+                if message["type"] == "pick":
+                    sent = run.sent.get((self.draft_id, message["player"]))
+                    if sent is not None:
+                        run.broadcast_latencies.append(received - sent)
+                if message.get("seq", 0) >= final_seq:
+                    return
+        finally:
+            await self.ws.close()
+
+
+async def drive_draft(run: Run, client: httpx.AsyncClient, prefix: str, draft_id: str, pick_interval: float):
+    """Start a registered draft and make every pick, as fast as allowed."""
+    resp = await client.post(f"{prefix}/start_draft")
+    resp.raise_for_status()
+    next_team = resp.json()["order"][0]
+    for pick in range(1, MAX_TEAMS * ROUNDS + 1):
+        player = f"Player {pick}"
+        started = time.perf_counter()
+        run.sent[(draft_id, player)] = started
+        resp = await client.post(f"{prefix}/pick_player/{next_team}/{player}")
+        run.pick_latencies.append(time.perf_counter() - started)
+        if resp.status_code != 200:
+            run.errors += 1
+            return
+        next_team = resp.json()["next_team"]
+        if pick_interval:
+            await asyncio.sleep(pick_interval)
+
+
+async def benchmark(base_url: str, drafts: int, spectators: int, pick_interval: float = 0.0,
+                    server_pid: Optional[int] = None, timeout: float = 60.0) -> dict:
+    """Run the benchmark against a server at `base_url` and return its results."""
+    run = Run()
+    ws_base = "ws" + base_url[len("http"):]
+    draft_ids = [f"bench-{os.getpid()}-{i}" for i in range(drafts)]
+    limits = httpx.Limits(max_connections=max(drafts, 1))
+    memory: Dict[str, Optional[float]] = {"per_room_bytes": None, "per_connection_bytes": None}
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=timeout) as client:
+        baseline = rss_bytes(server_pid) if server_pid else None
+        await asyncio.gather(*(
+            client.post(f"/drafts/{draft_id}/register_team", json={"team_name": f"Team {team}"})
+            for draft_id in draft_ids for team in range(MAX_TEAMS)
+        ))
+        with_rooms = rss_bytes(server_pid) if server_pid else None
+
+        # Registration emitted MAX_TEAMS events, start one more, then one per pick.
+        final_seq = MAX_TEAMS + 1 + MAX_TEAMS * ROUNDS
+        followers = [
+            Spectator(f"{ws_base}/drafts/{draft_id}/ws", draft_id)
+            for draft_id in draft_ids for _ in range(spectators)
+        ]
+        # Connect everyone and wait for their snapshots before any pick is made.
+        await asyncio.gather(*(follower.connect() for follower in followers))
+        with_connections = rss_bytes(server_pid) if server_pid else None
+        if baseline is not None and with_rooms is not None and with_connections is not None:
+            memory["per_room_bytes"] = (with_rooms - baseline) / max(drafts, 1)
+            memory["per_connection_bytes"] = (with_connections - with_rooms) / max(drafts * spectators, 1)
+
+        started = time.perf_counter()
+        results = await asyncio.gather(
+            *(follower.follow(run, final_seq, timeout) for follower in followers),
+            *(drive_draft(run, client, f"/drafts/{draft_id}", draft_id, pick_interval) for draft_id in draft_ids),
+            return_exceptions=True,
+        )
+        duration = time.perf_counter() - started
+    run.errors += sum(isinstance(result, Exception) for result in results)
+    return {
+        "pick_latency_ms": summarize(run.pick_latencies),
+        "broadcast_latency_ms": summarize(run.broadcast_latencies),
+        "picks_per_second": len(run.pick_latencies) / duration,
+        "messages_per_second": run.messages / duration,
+        "duration_s": duration,
+        "memory": memory,
+        "errors": run.errors,
+    }
+
+
+async def static_benchmark(base_url: str, requests: int, concurrency: int, path: str = "/",
+                           timeout: float = 60.0) -> dict:
+    """Fetch `path` `requests` times over `concurrency` keep-alive connections and report throughput.
+
+    Requests are written straight to sockets: a full HTTP client costs more
+    per request than the server does, and would be what got measured.
+    """
+    url = httpx.URL(base_url)
+    request = (f"GET {path} HTTP/1.1\r\nHost: {url.host}\r\nAccept-Encoding: gzip\r\n\r\n").encode()
+    latencies: List[float] = []
+    sizes: List[int] = []
+    errors = 0
+
+    async def fetch(count: int):
+        nonlocal errors
+        reader, writer = await asyncio.open_connection(url.host, url.port or 80)
+        try:
+            for _ in range(count):
+                started = time.perf_counter()
+                writer.write(request)
+                head = await reader.readuntil(b"\r\n\r\n")
+                status = int(head.split(b" ", 2)[1])
+                length = 0
+                for line in head.split(b"\r\n"):
+                    name, _, value = line.partition(b":")
+                    if name.lower() == b"content-length":
+                        length = int(value)
+                await reader.readexactly(length)
+                latencies.append(time.perf_counter() - started)
+                sizes.append(len(head) + length)
+                errors += status != 200
+        finally:
+            writer.close()
+
+    started = time.perf_counter()
+    await asyncio.wait_for(asyncio.gather(*(fetch(requests // concurrency + (i < requests % concurrency))
+                                            for i in range(concurrency))), timeout)
+    duration = time.perf_counter() - started
+    return {
+        "requests_per_second": requests / duration,
+        "latency_ms": summarize(latencies),
+        "bytes_per_request": sum(sizes) / max(len(sizes), 1),
+        "duration_s": duration,
+        "errors": errors,
+    }
+
+
+async def idle_benchmark(connections: int, timeout: float = 600.0) -> dict:
+    """Hold `connections` idle WebSocket clients of one draft in this process and measure what each costs.
+
+    Clients talk to the app over ASGI in memory, so their number is not capped
+    by the file descriptor limit. What is measured is the app's share of a
+    connection: the endpoint task, the framework's per-connection objects and
+    the broadcaster subscription. The server's protocol objects and kernel
+    buffers come on top.
+    """
+    import main
+
+    accepted = 0
+    released = asyncio.get_running_loop().create_future()
+
+    async def client(index: int):
+        connected = False
+
+        async def receive():
+            nonlocal connected
+            if not connected:
+                connected = True
+                return {"type": "websocket.connect"}
+            # Idle until the run is over
+            await released
+            return {"type": "websocket.disconnect", "code": 1000}
+
+        async def send(message):
+            nonlocal accepted
+            accepted += message["type"] == "websocket.accept"
+
+        scope = {"type": "websocket", "asgi": {"version": "3.0"}, "scheme": "ws", "path": "/ws", "raw_path": b"/ws",
+                 "root_path": "", "query_string": b"", "headers": [], "subprotocols": [],
+                 "client": ("127.0.0.1", index), "server": ("127.0.0.1", 80)}
+        await main.app(scope, receive, send)
+
+    async def opened(count: int):
+        while accepted < count:
+            await asyncio.sleep(0.01)
+
+    # One client first, so that what the first connection sets up once is not counted
+    tasks = [asyncio.create_task(client(0))]
+    await asyncio.wait_for(opened(1), timeout)
+    gc.collect()
+    baseline = rss_bytes(os.getpid())
+    started = time.perf_counter()
+    tasks += [asyncio.create_task(client(i)) for i in range(1, connections + 1)]
+    await asyncio.wait_for(opened(connections + 1), timeout)
+    open_seconds = time.perf_counter() - started
+    gc.collect()
+    held = rss_bytes(os.getpid())
+    # As if every client had been quiet for a whole interval: each one is queued a ping.
+    started = time.perf_counter()
+    main.check_heartbeats(time.monotonic() + main.WS_PING_INTERVAL)
+    sweep_seconds = time.perf_counter() - started
+    released.set_result(None)
+    await asyncio.wait_for(asyncio.gather(*tasks), timeout)
+    main.reset_state()
+
+    per_connection = (held - baseline) / connections if baseline is not None and held is not None else None
+    return {
+        "connections": connections,
+        "open_seconds": open_seconds,
+        "idle_connection_bytes": per_connection,
+        "budget_bytes": IDLE_CONNECTION_BUDGET,
+        "within_budget": None if per_connection is None else per_connection <= IDLE_CONNECTION_BUDGET,
+        "heartbeat_sweep_ms": sweep_seconds * 1000,
+    }
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def lookup(results: dict, path: str):
+    for key in path.split("."):
+        results = results.get(key) if isinstance(results, dict) else None
+    return results
+
+
+def compare(baseline: dict, current: dict) -> List[str]:
+    """Lines describing how each compared metric changed; regressions are flagged."""
+    lines = []
+    for path, higher_is_better in COMPARED.items():
+        old, new = lookup(baseline["results"], path), lookup(current["results"], path)
+        if not old or new is None:
+            continue
+        change = (new - old) / old * 100
+        worse = change < 0 if higher_is_better else change > 0
+        flag = "  <- regression" if worse and abs(change) >= 10 else ""
+        lines.append(f"{path:30} {old:12.2f} -> {new:12.2f} ({change:+.1f}%){flag}")
+    return lines
+
+
+def save(report: dict, output: Optional[str]) -> str:
+    if output is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        stamp = time.strftime("%Y%m%d-%H%M%S", time.gmtime(report["timestamp"]))
+        output = os.path.join(RESULTS_DIR, f"{stamp}-{report['commit'] or 'unknown'}.json")
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    return output
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--drafts", type=int, default=10, help="drafts run at the same time")
+    parser.add_argument("--spectators", type=int, default=10, help="WebSocket clients per draft")
+    parser.add_argument("--pick-interval", type=float, default=0.0,
+                        help="seconds between picks in a draft (0: as fast as possible)")
+    parser.add_argument("--workers", type=int, default=1, help="worker processes for the started server")
+    parser.add_argument("--url", help="benchmark a running server instead of starting one")
+    parser.add_argument("--output", help=f"results file (default: a new file in {RESULTS_DIR}/)")
+    parser.add_argument("--compare", help="earlier results file to compare against")
+    parser.add_argument("--static", type=int, metavar="N", help="fetch the demo page N times instead of drafting")
+    parser.add_argument("--concurrency", type=int, default=50, help="connections used by --static")
+    parser.add_argument("--idle", type=int, metavar="N",
+                        help="hold N idle WebSocket clients in this process and measure their memory instead")
+    args = parser.parse_args(argv)
+
+    process = None
+    if args.idle:
+        results = asyncio.run(idle_benchmark(args.idle))
+    elif args.url:
+        base_url = args.url.rstrip("/")
+    else:
+        port = free_port()
+        process = start_server(port, args.workers)
+        base_url = f"http://127.0.0.1:{port}"
+    if not args.idle:
+        try:
+            # Memory is only attributable to a single server process we started.
+            pid = process.pid if process is not None and args.workers == 1 else None
+            if args.static:
+                results = asyncio.run(static_benchmark(base_url, args.static, args.concurrency))
+            else:
+                results = asyncio.run(benchmark(base_url, args.drafts, args.spectators, args.pick_interval, pid))
+        finally:
+            if process is not None:
+                process.terminate()
+                process.wait()
+
+    report = {
+        "timestamp": time.time(),
+        "commit": git_commit(),
+        "config": {"drafts": args.drafts, "spectators": args.spectators, "pick_interval": args.pick_interval,
+                   "workers": args.workers, "url": args.url, "static": args.static, "concurrency": args.concurrency,
+                   "idle": args.idle},
+        "results": results,
+    }
+    print(json.dumps(results, indent=2))
+    print(f"Results written to {save(report, args.output)}")
+    if args.compare:
+        with open(args.compare) as f:
+            print("\n".join(compare(json.load(f), report)))
+    return report
+
+
+if __name__ == "__main__":
+    main()
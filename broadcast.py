@@ -0,0 +1,208 @@
+import asyncio
+import time
+from typing import Any, Callable, Dict, List, Optional, Set
+
+from fastapi import WebSocket
+
+from encoding import ENCODERS, Encoder, Payload
+from metrics import Counter
+
+DROP_OLDEST = "drop_oldest"
+COALESCE = "coalesce"
+DISCONNECT = "disconnect"
+
+SOCKETS_DROPPED = Counter("draft_ws_dropped_total", "Slow, stuck or dead WebSocket clients disconnected.")
+HEARTBEAT_TIMEOUTS = Counter("draft_ws_heartbeat_timeouts_total", "WebSocket clients dropped for not answering pings.")
+SENT_BYTES = Counter("draft_ws_sent_bytes_total", "Payload bytes sent to WebSocket clients.")
+
+
+def as_payload(message: Any) -> Payload:
+    return message if isinstance(message, Payload) else Payload(message)
+
+
+class Subscriber:
+    """One connected client: its outbound queue and the task draining it.
+
+    Most clients are idle most of the time, so an idle one costs little: the
+    queue is a plain list (it never holds more than `max_queue` messages) and
+    the writer task only runs while there is something to send.
+    """
+
+    __slots__ = ("websocket", "encoder", "queue", "task", "dropped", "closed", "last_seen")
+
+    def __init__(self, websocket: WebSocket, encoder: Encoder):
+        self.websocket = websocket
+        self.encoder = encoder
+        self.queue: List[Payload] = []
+        self.task: Optional[asyncio.Task] = None
+        self.dropped = 0
+        self.closed = False
+        # When the client last sent anything, for heartbeats
+        self.last_seen = time.monotonic()
+
+    def stop(self):
+        """Ask the writer task to exit; it never relies on being cancelled."""
+        self.closed = True
+        self.queue.clear()
+
+
+class Broadcaster:
+    """Fans messages out to WebSocket clients without letting one slow client stall the rest.
+
+    Every subscriber gets a bounded queue, drained by its own writer task while
+    it holds messages, so `publish()` never awaits a socket. When a subscriber's queue is full the `policy` decides
+    what happens: `drop_oldest` discards the oldest queued message to make room
+    for the new one, `coalesce` replaces everything queued with a single message
+    from the `snapshot` callable, and `disconnect` evicts the client. Sockets that
+    raise on send or take longer than `send_timeout` are evicted.
+
+    Messages are wrapped in a `Payload`, so each one is encoded once per wire
+    format no matter how many subscribers receive it.
+    """
+
+    def __init__(self, max_queue: int = 16, policy: str = DROP_OLDEST, send_timeout: float = 5.0,
+                 snapshot: Optional[Callable[[], Any]] = None):
+        if policy not in (DROP_OLDEST, COALESCE, DISCONNECT):
+            raise ValueError(f"Unknown backpressure policy: {policy}")
+        if policy == COALESCE and snapshot is None:
+            raise ValueError("The coalesce policy needs a snapshot callable")
+        self.max_queue = max_queue
+        self.policy = policy
+        self.send_timeout = send_timeout
+        self.snapshot = snapshot
+        self.subscribers: Dict[WebSocket, Subscriber] = {}
+        self.evicted = 0
+        self._closing: Set[asyncio.Task] = set()
+
+    def __len__(self) -> int:
+        return len(self.subscribers)
+
+    def __contains__(self, websocket: WebSocket) -> bool:
+        return websocket in self.subscribers
+
+    def subscribe(self, websocket: WebSocket, encoder: Encoder = ENCODERS["json"]) -> Subscriber:
+        """Register an accepted socket; its writer task starts when there is something to send."""
+        subscriber = Subscriber(websocket, encoder)
+        self.subscribers[websocket] = subscriber
+        return subscriber
+
+    def unsubscribe(self, websocket: WebSocket) -> Optional[Subscriber]:
+        """Forget a socket; its writer task exits after any send in flight."""
+        subscriber = self.subscribers.pop(websocket, None)
+        if subscriber is not None:
+            subscriber.stop()
+        return subscriber
+
+    def publish(self, message: Any):
+        """Queue `message` for every subscriber; never blocks."""
+        payload = as_payload(message)
+        for subscriber in list(self.subscribers.values()):
+            self._offer(subscriber, payload)
+
+    def send(self, websocket: WebSocket, message: Any):
+        """Queue `message` for one subscriber, after anything already queued for it."""
+        subscriber = self.subscribers.get(websocket)
+        if subscriber is not None:
+            self._offer(subscriber, as_payload(message))
+
+    def seen(self, websocket: WebSocket):
+        """Note that a client is still there, e.g. because it sent a message."""
+        subscriber = self.subscribers.get(websocket)
+        if subscriber is not None:
+            subscriber.last_seen = time.monotonic()
+
+    def heartbeat(self, ping: Any, interval: float, timeout: float, now: Optional[float] = None) -> int:
+        """Ping clients quiet for `interval` seconds and evict those quiet for `timeout`.
+
+        A live client answers a ping with any message, which resets its time
+        via `seen()`. Returns how many clients were evicted.
+        """
+        now = time.monotonic() if now is None else now
+        payload = as_payload(ping)
+        dead = []
+        for subscriber in self.subscribers.values():
+            quiet = now - subscriber.last_seen
+            if quiet >= timeout:
+                dead.append(subscriber)
+            elif quiet >= interval:
+                self._offer(subscriber, payload)
+        for subscriber in dead:
+            HEARTBEAT_TIMEOUTS.inc()
+            # 1011, as the websockets library uses for a keepalive ping timeout
+            self._evict(subscriber, code=1011)
+        return len(dead)
+
+    def unsubscribe_all(self) -> List[Subscriber]:
+        """Forget every socket; writer tasks exit on their own after any send in flight."""
+        subscribers = list(self.subscribers.values())
+        for subscriber in subscribers:
+            self.unsubscribe(subscriber.websocket)
+        return subscribers
+
+    async def close(self, timeout: Optional[float] = None):
+        """Stop every writer task, waiting at most `timeout` (default `send_timeout`) for them."""
+        subscribers = self.unsubscribe_all()
+        tasks = [s.task for s in subscribers if s.task is not None and not s.task.done()] + list(self._closing)
+        if not tasks:
+            return
+        timeout = self.send_timeout if timeout is None else timeout
+        _, pending = await asyncio.wait(tasks, timeout=timeout)
+        if pending:
+            # Only writers stuck in a send get here; cancel them and give the
+            # cancellation one more bounded wait to unwind.
+            for task in pending:
+                task.cancel()
+            await asyncio.wait(pending, timeout=timeout)
+
+    def _offer(self, subscriber: Subscriber, message: Any):
+        if subscriber.closed:
+            return
+        queue = subscriber.queue
+        if len(queue) < self.max_queue:
+            queue.append(message)
+        elif self.policy == DISCONNECT:
+            self._evict(subscriber)
+            return
+        elif self.policy == COALESCE:
+            # Everything queued is superseded by one message with the current state.
+            subscriber.dropped += len(queue)
+            queue[:] = [as_payload(self.snapshot())]
+        else:
+            del queue[0]
+            subscriber.dropped += 1
+            queue.append(message)
+        if subscriber.task is None or subscriber.task.done():
+            subscriber.task = asyncio.create_task(self._writer(subscriber))
+
+    def _evict(self, subscriber: Subscriber, code: int = 1013):
+        if self.subscribers.get(subscriber.websocket) is subscriber:
+            self.evicted += 1
+            SOCKETS_DROPPED.inc()
+            self.unsubscribe(subscriber.websocket)
+            # Close the socket so the client notices and reconnects.
+            task = asyncio.ensure_future(self._close(subscriber.websocket, code))
+            self._closing.add(task)
+            task.add_done_callback(self._closing.discard)
+
+    @staticmethod
+    async def _close(websocket: WebSocket, code: int):
+        try:
+            await websocket.close(code=code)
+        except Exception:
+            pass
+
+    async def _writer(self, subscriber: Subscriber):
+        """Send what is queued for a subscriber, then exit until more is queued."""
+        websocket = subscriber.websocket
+        encoder = subscriber.encoder
+        send = websocket.send_bytes if encoder.binary else websocket.send_text
+        queue = subscriber.queue
+        while queue and not subscriber.closed:
+            data = queue.pop(0).encode(encoder)
+            try:
+                await asyncio.wait_for(send(data), self.send_timeout)
+                SENT_BYTES.inc(len(data))
+            except Exception:
+                # Dead or stuck socket: stop sending to it and let the close propagate.
+                self._evict(subscriber)
+                return
@@ -0,0 +1,289 @@
+import asyncio
+import itertools
+import json
+import logging
+import os
+import zlib
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set
+
+from fastapi import WebSocket
+
+from broadcast import Broadcaster
+from draft_room import DraftError
+
+logger = logging.getLogger(__name__)
+
+# Longest line accepted on the bus; snapshots of big player pools are large.
+LINE_LIMIT = 16 * 1024 * 1024
+
+CommandHandler = Callable[[str, str, dict], Awaitable[Any]]
+EventHandler = Callable[[str, dict], None]
+
+_STOP = object()
+
+
+def encode_line(message: dict) -> bytes:
+    return json.dumps(message, separators=(",", ":")).encode() + b"\n"
+
+
+class Peer:
+    """Connection to another worker's bus socket.
+
+    Outgoing lines go through a bounded outbox drained by one task, so
+    publishing never waits on the peer. The connection is opened lazily and
+    re-opened after a failure; calls in flight when it drops fail with 503.
+    """
+
+    def __init__(self, index: int, path: str, connect_timeout: float, outbox_size: int):
+        self.index = index
+        self.path = path
+        self.connect_timeout = connect_timeout
+        self.outbox: asyncio.Queue = asyncio.Queue(maxsize=outbox_size)
+        self.pending: Dict[int, asyncio.Future] = {}
+        self.writer: Optional[asyncio.StreamWriter] = None
+        self.task: Optional[asyncio.Task] = None
+        self.reader_task: Optional[asyncio.Task] = None
+
+    def start(self):
+        self.task = asyncio.create_task(self._run())
+
+    def send(self, line: bytes) -> bool:
+        """Queue a line for the peer; False if the outbox is full."""
+        try:
+            self.outbox.put_nowait(line)
+            return True
+        except asyncio.QueueFull:
+            return False
+
+    async def stop(self):
+        self._fail_pending()
+        if self.task is not None:
+            while not self.outbox.empty():
+                self.outbox.get_nowait()
+            self.outbox.put_nowait(_STOP)
+            await asyncio.wait([self.task], timeout=self.connect_timeout)
+        self._disconnect()
+
+    async def _run(self):
+        while True:
+            line = await self.outbox.get()
+            if line is _STOP:
+                return
+            try:
+                writer = await self._connect()
+                writer.write(line)
+                await writer.drain()
+            except OSError as exc:
+                logger.warning("Bus peer %d unreachable: %s", self.index, exc)
+                self._disconnect()
+                self._fail_pending()
+
+    async def _connect(self) -> asyncio.StreamWriter:
+        if self.writer is not None:
+            return self.writer
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.connect_timeout
+        delay = 0.01
+        while True:
+            try:
+                reader, writer = await asyncio.open_unix_connection(self.path, limit=LINE_LIMIT)
+                break
+            except OSError:
+                # The peer may still be starting up.
+                if loop.time() + delay > deadline:
+                    raise
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 0.5)
+        self.writer = writer
+        self.reader_task = asyncio.create_task(self._read_replies(reader))
+        return writer
+
+    async def _read_replies(self, reader: asyncio.StreamReader):
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                reply = json.loads(line)
+                future = self.pending.pop(reply["id"], None)
+                if future is not None and not future.done():
+                    future.set_result(reply)
+        except (OSError, ValueError):
+            pass
+        self._disconnect()
+        self._fail_pending()
+
+    def _disconnect(self):
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
+        if self.reader_task is not None and self.reader_task is not asyncio.current_task():
+            self.reader_task.cancel()
+        self.reader_task = None
+
+    def _fail_pending(self):
+        pending, self.pending = self.pending, {}
+        for future in pending.values():
+            if not future.done():
+                future.set_exception(DraftError("Draft owner is unavailable", status_code=503))
+
+
+class Cluster:
+    """Lets several worker processes on one host serve drafts together.
+
+    Each draft is owned by exactly one worker, chosen by hashing its id.
+    Commands for a draft owned elsewhere are forwarded to the owner with
+    `call()`, and the owner `publish()`es every event to the other workers so
+    their WebSocket clients see it too. Workers talk over Unix domain sockets
+    in `directory`; a worker claims its index by locking `worker-<i>.lock`.
+    """
+
+    def __init__(self, directory: str, size: int, handle_command: CommandHandler, handle_event: EventHandler,
+                 call_timeout: float = 5.0, connect_timeout: float = 2.0, outbox_size: int = 10000):
+        self.directory = directory
+        self.size = size
+        self.handle_command = handle_command
+        self.handle_event = handle_event
+        self.call_timeout = call_timeout
+        self.connect_timeout = connect_timeout
+        self.outbox_size = outbox_size
+        self.index = -1
+        self.peers: Dict[int, Peer] = {}
+        self._ids = itertools.count(1)
+        self._lock_file = None
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._connections: Set[asyncio.StreamWriter] = set()
+        self._tasks: Set[asyncio.Task] = set()
+
+    def socket_path(self, index: int) -> str:
+        return os.path.join(self.directory, f"worker-{index}.sock")
+
+    async def start(self):
+        """Claim a worker slot, listen for peers and prepare peer connections."""
+        os.makedirs(self.directory, exist_ok=True)
+        self.index = self._claim_slot()
+        path = self.socket_path(self.index)
+        # We hold the slot's lock, so any socket file left here is stale.
+        if os.path.exists(path):
+            os.remove(path)
+        self._server = await asyncio.start_unix_server(self._serve, path=path, limit=LINE_LIMIT)
+        for index in range(self.size):
+            if index != self.index:
+                peer = self.peers[index] = Peer(index, self.socket_path(index), self.connect_timeout,
+                                                self.outbox_size)
+                peer.start()
+        logger.info("Worker %d of %d listening on %s", self.index, self.size, path)
+
+    async def stop(self):
+        for peer in self.peers.values():
+            await peer.stop()
+        if self._server is not None:
+            self._server.close()
+            for writer in list(self._connections):
+                writer.close()
+            await self._server.wait_closed()
+            self._server = None
+            os.remove(self.socket_path(self.index))
+        for task in list(self._tasks):
+            task.cancel()
+        if self._lock_file is not None:
+            self._lock_file.close()
+            self._lock_file = None
+
+    def owner(self, draft_id: str) -> int:
+        """Index of the worker that owns a draft; stable across processes."""
+        return zlib.crc32(draft_id.encode()) % self.size
+
+    def is_local(self, draft_id: str) -> bool:
+        return self.owner(draft_id) == self.index
+
+    async def call(self, draft_id: str, command: str, args: dict, timeout: Optional[float] = None) -> Any:
+        """Run a command on the worker that owns `draft_id` and return its result.
+
+        `timeout` overrides `call_timeout` for commands that are meant to wait.
+        """
+        peer = self.peers[self.owner(draft_id)]
+        request_id = next(self._ids)
+        future = asyncio.get_running_loop().create_future()
+        peer.pending[request_id] = future
+        line = encode_line({"t": "call", "id": request_id, "draft": draft_id, "cmd": command, "args": args})
+        if not peer.send(line):
+            peer.pending.pop(request_id, None)
+            raise DraftError("Draft owner is busy", status_code=503)
+        try:
+            reply = await asyncio.wait_for(future, self.call_timeout if timeout is None else timeout)
+        except asyncio.TimeoutError:
+            peer.pending.pop(request_id, None)
+            raise DraftError("Draft owner did not respond", status_code=503) from None
+        if reply["ok"]:
+            return reply["result"]
+        raise DraftError(reply["detail"], status_code=reply["status"], retry_after=reply.get("retry_after"))
+
+    def publish(self, draft_id: str, event: dict) -> int:
+        """Send an event to every other worker; returns how many peers it was queued for."""
+        line = encode_line({"t": "event", "draft": draft_id, "event": event})
+        return sum(peer.send(line) for peer in self.peers.values())
+
+    def _claim_slot(self) -> int:
+        import fcntl
+
+        for index in range(self.size):
+            lock_file = open(os.path.join(self.directory, f"worker-{index}.lock"), "a")
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                lock_file.close()
+                continue
+            self._lock_file = lock_file
+            return index
+        raise RuntimeError(f"All {self.size} worker slots in {self.directory} are taken")
+
+    async def _serve(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self._connections.add(writer)
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                message = json.loads(line)
+                if message["t"] == "event":
+                    self.handle_event(message["draft"], message["event"])
+                else:
+                    task = asyncio.create_task(self._answer(writer, message))
+                    self._tasks.add(task)
+                    task.add_done_callback(self._tasks.discard)
+        except (OSError, ValueError):
+            pass
+        finally:
+            self._connections.discard(writer)
+            writer.close()
+
+    async def _answer(self, writer: asyncio.StreamWriter, message: dict):
+        try:
+            result = await self.handle_command(message["draft"], message["cmd"], message["args"])
+            reply = {"id": message["id"], "ok": True, "result": result}
+        except DraftError as exc:
+            reply = {"id": message["id"], "ok": False, "status": exc.status_code, "detail": exc.detail,
+                     "retry_after": exc.retry_after}
+        except Exception:
+            logger.exception("Forwarded command %s failed", message["cmd"])
+            reply = {"id": message["id"], "ok": False, "status": 500, "detail": "Internal Server Error"}
+        if not writer.is_closing():
+            writer.write(encode_line(reply))
+
+
+class RemoteFeed:
+    """This worker's WebSocket clients for a draft owned by another worker."""
+
+    def __init__(self):
+        self.broadcaster = Broadcaster()
+        # Events that arrive while a new client is still fetching its catch-up
+        self.pending: Dict[WebSocket, List[dict]] = {}
+
+    def __bool__(self) -> bool:
+        return bool(self.broadcaster) or bool(self.pending)
+
+    def deliver(self, event: dict):
+        for buffered in self.pending.values():
+            buffered.append(event)
+        self.broadcaster.publish(event)
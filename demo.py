@@ -1,36 +1,82 @@
+import argparse
+import socket
+import threading
 import webbrowser
 import time
 import os
 import subprocess
 import sys
+import urllib.request
 
-def start_server():
-    """Start the FastAPI server in a separate process"""
+DEFAULT_PORT = 8000
+# Readiness polling: first wait, longest wait and how long to keep trying, in seconds
+POLL_INITIAL = 0.02
+POLL_MAX = 0.5
+READY_TIMEOUT = 30.0
+
+def start_server(port=DEFAULT_PORT):
+    """Start the FastAPI server in a separate process, reloading on code changes"""
+    command = ['uvicorn', 'main:app', '--reload']
+    if port != DEFAULT_PORT:
+        command += ['--port', str(port)]
     if sys.platform == 'win32':
-        subprocess.Popen(['uvicorn', 'main:app', '--reload'], 
-                        creationflags=subprocess.CREATE_NEW_CONSOLE)
-    else:
-        subprocess.Popen(['uvicorn', 'main:app', '--reload'])
-
-def open_browser_windows():
-    """Open multiple browser windows for each team"""
-    # Wait for server to start
-    time.sleep(2)
-    
-    # Open browser windows
-    webbrowser.open('http://localhost:8000')
-    time.sleep(1)
-    webbrowser.open('http://localhost:8000')
-    time.sleep(1)
-    webbrowser.open('http://localhost:8000')
-    time.sleep(1)
-    webbrowser.open('http://localhost:8000')
-
-def main():
+        return subprocess.Popen(command, creationflags=subprocess.CREATE_NEW_CONSOLE)
+    return subprocess.Popen(command)
+
+def start_in_process(port=0):
+    """Run the server on a thread of this process, on a free port unless one is given.
+
+    Returns the uvicorn server, its thread and the port; see `stop`.
+    """
+    import uvicorn
+    # Binding here rather than in uvicorn tells us which port 0 picked, with no race for it.
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind(('127.0.0.1', port))
+    server = uvicorn.Server(uvicorn.Config('main:app', log_level='warning'))
+    thread = threading.Thread(target=server.run, kwargs={'sockets': [sock]}, daemon=True)
+    thread.start()
+    return server, thread, sock.getsockname()[1]
+
+def wait_until_ready(url, timeout=READY_TIMEOUT, process=None):
+    """Poll `url`/readyz with exponential backoff; returns the seconds it took to become ready"""
+    started = time.monotonic()
+    delay = POLL_INITIAL
+    while True:
+        try:
+            urllib.request.urlopen(url + '/readyz', timeout=1).close()
+            return time.monotonic() - started
+        except OSError:
+            pass
+        if process is not None and process.poll() is not None:
+            raise RuntimeError('Server exited before it was ready')
+        if time.monotonic() - started + delay > timeout:
+            raise RuntimeError(f'Server was not ready after {timeout:.0f}s')
+        time.sleep(delay)
+        delay = min(delay * 2, POLL_MAX)
+
+def open_browser_windows(url=f'http://localhost:{DEFAULT_PORT}', windows=4):
+    """Open a browser window for each team"""
+    for _ in range(windows):
+        webbrowser.open(url)
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Run the fantasy draft demo.')
+    parser.add_argument('--in-process', action='store_true',
+                        help='run the server in this process, without --reload')
+    parser.add_argument('--port', type=int, default=None,
+                        help=f'port to serve on (default {DEFAULT_PORT}, or a free one with --in-process)')
+    parser.add_argument('--windows', type=int, default=4, help='browser windows to open (default 4)')
+    parser.add_argument('--timeout', type=float, default=READY_TIMEOUT,
+                        help='seconds to wait for the server to be ready')
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
     print("Starting Fantasy Draft Demo...")
     print("\nInstructions:")
     print("1. The server will start automatically")
-    print("2. Four browser windows will open")
+    print(f"2. {args.windows} browser windows will open")
     print("3. In each window:")
     print("   - Enter a unique team name and click 'Register Team'")
     print("   - Wait for all teams to register")
@@ -40,20 +86,42 @@ def main():
     print("      The 'Start Draft' button will be enabled when all teams are registered")
     print("\nPress Enter to start...")
     input()
-    
-    start_server()
-    open_browser_windows()
-    
+
+    server = thread = process = None
+    if args.in_process:
+        server, thread, port = start_in_process(args.port or 0)
+    else:
+        port = args.port or DEFAULT_PORT
+        process = start_server(port)
+    url = f'http://localhost:{port}'
+    try:
+        seconds = wait_until_ready(url, args.timeout, process)
+    except RuntimeError as exc:
+        print(f"\n{exc}")
+        stop(server, thread, process)
+        sys.exit(1)
+    print(f"\nServer ready at {url} in {seconds:.2f}s")
+    open_browser_windows(url, args.windows)
+
     print("\nDemo is running!")
     print("Keep this terminal window open while using the demo.")
     print("Press Ctrl+C to stop the server when done.")
-    
+
     try:
         while True:
             time.sleep(1)
     except KeyboardInterrupt:
         print("\nStopping server...")
+        stop(server, thread, process)
         sys.exit(0)
 
+def stop(server=None, thread=None, process=None):
+    """Stop an in-process server and wait for its thread, or terminate the server process"""
+    if server is not None:
+        server.should_exit = True
+        thread.join(timeout=10)
+    if process is not None:
+        process.terminate()
+
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    main()
@@ -0,0 +1,632 @@
+import asyncio
+import random
+import time
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+from auto_pick import TeamQueue, choose_player
+from broadcast import COALESCE, Broadcaster
+from encoding import Payload
+from events import EventLog
+from pick_clock import AUTO, PAUSED, RUNNING, SKIP, STOPPED, PickClock
+from pick_schedule import SNAKE, PickSchedule
+from player_pool import DEFAULT_CATALOG, DEFAULT_POOL_ID, PlayerCatalog, PlayerPool
+
+MAX_TEAMS = 4
+ROUNDS = 5
+DEFAULT_DRAFT_ID = "default"
+
+
+class DraftError(Exception):
+    """Raised when a draft command is rejected; `detail` is shown to the client.
+
+    `retry_after` is set when the request may succeed if retried after that many seconds.
+    """
+
+    def __init__(self, detail: str, status_code: int = 400, retry_after: Optional[float] = None):
+        super().__init__(detail)
+        self.detail = detail
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+
+class DraftRoom:
+    """State and rules for a single draft."""
+
+    __slots__ = (
+        "draft_id", "max_teams", "rounds", "pool_id", "catalog", "registered_teams", "players",
+        "draft_order", "schedule", "draft_results", "pick_history", "keepers", "current_round",
+        "current_pick", "draft_started", "auto_teams", "queues", "clock", "broadcaster",
+        "events", "last_active", "_snapshot", "_status", "_changed",
+    )
+
+    def __init__(self, draft_id: str, max_teams: int = MAX_TEAMS, rounds: int = ROUNDS,
+                 catalog: PlayerCatalog = DEFAULT_CATALOG, pool_id: str = DEFAULT_POOL_ID):
+        self.draft_id = draft_id
+        self.max_teams = max_teams
+        self.rounds = rounds
+        # The catalog is shared with every other draft using the same pool.
+        self.pool_id = pool_id
+        self.catalog = catalog
+        self.events = EventLog()
+        self._snapshot: Optional[Payload] = None
+        self._status: Optional[Payload] = None
+        # Resolved by the next event, for requests waiting on a change
+        self._changed: Optional[asyncio.Future] = None
+        # A client that falls behind gets one snapshot in place of its backlog.
+        self.broadcaster = Broadcaster(policy=COALESCE, snapshot=self.snapshot_payload)
+        self.reset()
+
+    def reset(self):
+        """Reset the draft to its initial, empty state."""
+        self.registered_teams: Set[str] = set()
+        self.players = PlayerPool(self.catalog)
+        self.draft_order: List[str] = []
+        # Who owns every pick, built when the draft starts
+        self.schedule: Optional[PickSchedule] = None
+        self.draft_results: Dict[str, List[str]] = {}
+        # (overall pick, team, player) for every pick made, in order
+        self.pick_history: List[Tuple[int, str, str]] = []
+        # Players set aside as keepers, by the overall pick that will take them
+        self.keepers: Dict[int, str] = {}
+        self.current_round = 1
+        self.current_pick = 0
+        self.draft_started = False
+        # Teams the server picks for, and the players each team has queued
+        self.auto_teams: Set[str] = set()
+        self.queues: Dict[str, TeamQueue] = {}
+        self.clock = PickClock()
+        self.touch()
+
+    def touch(self):
+        """Mark the room as active so it is not evicted."""
+        self.last_active = time.monotonic()
+
+    @property
+    def in_progress(self) -> bool:
+        """True once the draft has started and until every round has been picked."""
+        return self.draft_started and self.current_round <= self.rounds
+
+    @property
+    def can_start_draft(self) -> bool:
+        return len(self.registered_teams) == self.max_teams and not self.draft_started
+
+    def get_next_team(self) -> Optional[str]:
+        """Returns the next team to pick."""
+        if not self.draft_started:
+            return None
+        return self.schedule.owner(self.current_pick)
+
+    def picks_until(self, team: str) -> Optional[int]:
+        """How many picks are made before `team` picks again, or None if it has no picks left."""
+        if not self.draft_started:
+            return None
+        return self.schedule.picks_until(team, self.current_pick)
+
+    def next_picks(self, team: str, count: int) -> List[int]:
+        """The overall picks (counted from 0) `team` makes next, at most `count` of them."""
+        if not self.draft_started:
+            return []
+        return self.schedule.next_picks(team, self.current_pick, count)
+
+    def register_team(self, team_name: str) -> Payload:
+        """Register a new team"""
+        if self.draft_started:
+            raise DraftError("Draft has already started")
+
+        if len(self.registered_teams) >= self.max_teams:
+            raise DraftError("Maximum number of teams reached")
+
+        if team_name in self.registered_teams:
+            raise DraftError("Team name already taken")
+
+        self.registered_teams.add(team_name)
+        self.touch()
+        return self.events.append("team_registered", team=team_name, can_start_draft=self.can_start_draft)
+
+    def start_draft(self, order: Optional[List[str]] = None, fmt: str = SNAKE) -> Payload:
+        """Start the draft with a randomized order; the event carries the order.
+
+        `order` fixes the order instead, which is how a logged draft is replayed.
+        `fmt` is the pick order format, e.g. snake or linear.
+        """
+        if len(self.registered_teams) != self.max_teams:
+            raise DraftError(f"Need exactly {self.max_teams} teams to start")
+
+        if self.draft_started:
+            raise DraftError("Draft has already started")
+
+        if order is None:
+            order = random.sample(list(self.registered_teams), len(self.registered_teams))
+        elif sorted(order) != sorted(self.registered_teams):
+            raise DraftError("Draft order must list every registered team once")
+
+        try:
+            self.schedule = PickSchedule(order, self.rounds, fmt)
+        except ValueError as exc:
+            raise DraftError(str(exc))
+        self.draft_started = True
+        self.draft_order = list(order)
+        self.draft_results = {team: [] for team in self.registered_teams}
+        self.current_round = 1
+        self.current_pick = 0
+        self.touch()
+        return self.events.append(
+            "draft_started", order=list(self.draft_order), format=fmt, round=self.current_round,
+            pick=self.current_pick, next_team=self.get_next_team(),
+        )
+
+    def trade_pick(self, pick: int, team: str) -> Payload:
+        """Give overall pick `pick` (counted from 0) to `team`; only picks not yet made can be traded."""
+        if not self.in_progress:
+            raise DraftError("Draft is not in progress")
+        if team not in self.registered_teams:
+            raise DraftError("Team not registered", status_code=404)
+        if not self.current_pick <= pick < len(self.schedule):
+            raise DraftError("Only picks not yet made can be traded")
+        if pick in self.keepers:
+            raise DraftError("A pick with a keeper cannot be traded")
+        previous = self.schedule.owner(pick)
+        if previous == team:
+            raise DraftError("Team already owns that pick")
+        self.schedule.trade(pick, team)
+        self.touch()
+        return self.events.append(
+            "pick_traded", overall=pick, from_team=previous, to_team=team, round=self.current_round,
+            pick=self.current_pick, next_team=self.get_next_team(),
+        )
+
+    def pick_player(self, team: str, player: str) -> Payload:
+        """Make a player pick"""
+        if not self.draft_started:
+            raise DraftError("Draft has not started")
+
+        if team != self.get_next_team():
+            raise DraftError("Not your turn!")
+
+        kept = self.keepers.get(self.current_pick)
+        if kept is not None:
+            # Already taken out of the pool when it was kept
+            if player != kept:
+                raise DraftError(f"{team} keeps {kept} with this pick")
+        else:
+            picked = self.players.get(player)
+            if picked is None:
+                raise DraftError("Player not available!")
+            self.players.take(picked.id)
+
+        # Assign player to team
+        self.draft_results[team].append(player)
+        self.pick_history.append((self.current_pick, team, player))
+        self._advance()
+        return self.events.append(
+            "pick", team=team, player=player, round=self.current_round,
+            pick=self.current_pick, next_team=self.get_next_team(),
+        )
+
+    def keep_player(self, team: str, player: str, round_number: int) -> Payload:
+        """Spend `team`'s pick in round `round_number` on keeping `player`.
+
+        The player leaves the pool at once and is picked when that pick comes up.
+        """
+        if not self.in_progress:
+            raise DraftError("Draft is not in progress")
+        if team not in self.registered_teams:
+            raise DraftError("Team not registered", status_code=404)
+        start = max((round_number - 1) * len(self.draft_order), self.current_pick)
+        pick = next((pick for pick in self.schedule.next_picks(team, start, len(self.schedule))
+                     if self.schedule.round_of(pick) == round_number and pick not in self.keepers), None)
+        if pick is None:
+            raise DraftError(f"{team} has no pick left in round {round_number}")
+        picked = self.players.get(player)
+        if picked is None:
+            raise DraftError("Player not available!")
+        self.players.take(picked.id)
+        self.keepers[pick] = player
+        self.touch()
+        return self.events.append(
+            "keeper", team=team, player=player, overall=pick, round=self.current_round,
+            pick=self.current_pick, next_team=self.get_next_team(),
+        )
+
+    def skip_pick(self) -> Payload:
+        """Pass over the team on the clock without a player, e.g. when its time ran out."""
+        if not self.in_progress:
+            raise DraftError("Draft is not in progress")
+        team = self.get_next_team()
+        self._advance()
+        return self.events.append(
+            "skip", team=team, round=self.current_round,
+            pick=self.current_pick, next_team=self.get_next_team(),
+        )
+
+    def _advance(self):
+        """Move to the next pick."""
+        self.current_pick += 1
+        self.current_round = self.schedule.round_of(self.current_pick)
+        self.touch()
+
+    def set_auto(self, team: str, enabled: bool = True) -> Payload:
+        """Turn auto-pick on or off for a team."""
+        if team not in self.registered_teams:
+            raise DraftError("Team not registered", status_code=404)
+        if enabled:
+            self.auto_teams.add(team)
+        else:
+            self.auto_teams.discard(team)
+        self.touch()
+        return self.events.append("auto_pick", team=team, enabled=enabled)
+
+    def set_pool(self, pool_id: str, catalog: PlayerCatalog) -> Payload:
+        """Draft from another player pool; only allowed before the draft starts."""
+        if self.draft_started:
+            raise DraftError("Draft has already started")
+        self.pool_id = pool_id
+        self.catalog = catalog
+        self.players = PlayerPool(catalog)
+        # Queued players belong to the old pool.
+        self.queues.clear()
+        self.touch()
+        return self.events.append("pool_selected", pool=pool_id, players=len(catalog))
+
+    def set_queue(self, team: str, players: List[str]):
+        """Replace a team's queue of preferred players, best first."""
+        if team not in self.registered_teams:
+            raise DraftError("Team not registered", status_code=404)
+        by_name = self.catalog.by_name
+        unknown = [name for name in players if name not in by_name]
+        if unknown:
+            raise DraftError(f"Unknown players: {', '.join(unknown)}")
+        self.queues[team] = TeamQueue(by_name[name] for name in players)
+        self.touch()
+
+    @property
+    def auto_on_clock(self) -> bool:
+        """True when the server makes the pick on the clock: it is a keeper, or the team auto-picks."""
+        return self.in_progress and (self.current_pick in self.keepers or self.get_next_team() in self.auto_teams)
+
+    def auto_pick(self) -> Payload:
+        """Pick the keeper, or else the best available player, for the team on the clock."""
+        if not self.in_progress:
+            raise DraftError("Draft is not in progress")
+        team = self.get_next_team()
+        if self.current_pick in self.keepers:
+            return self.pick_player(team, self.keepers[self.current_pick])
+        player = choose_player(self.players, self.draft_results[team], self.queues.get(team))
+        if player is None:
+            raise DraftError("No players available")
+        return self.pick_player(team, player.name)
+
+    def autocomplete(self) -> List[Payload]:
+        """Auto-pick every remaining pick of the draft."""
+        events = []
+        while self.in_progress:
+            events.append(self.auto_pick())
+        return events
+
+    def start_clock(self, seconds: float, on_expiry: str = AUTO) -> Payload:
+        """Give every pick from now on `seconds` to be made; the current pick starts over."""
+        if not self.in_progress:
+            raise DraftError("Draft is not in progress")
+        if seconds <= 0:
+            raise DraftError("Pick clock needs a positive number of seconds")
+        if on_expiry not in (AUTO, SKIP):
+            raise DraftError(f"Unknown expiry action: {on_expiry}")
+        self.clock.seconds = seconds
+        self.clock.on_expiry = on_expiry
+        return self._clock_event(RUNNING, seconds)
+
+    def pause_clock(self, remaining: float) -> Payload:
+        if self.clock.state != RUNNING:
+            raise DraftError("Pick clock is not running")
+        return self._clock_event(PAUSED, remaining)
+
+    def resume_clock(self) -> Payload:
+        if self.clock.state != PAUSED:
+            raise DraftError("Pick clock is not paused")
+        return self._clock_event(RUNNING, self.clock.remaining)
+
+    def extend_clock(self, seconds: float, remaining: float) -> Payload:
+        """Add time to the current pick; `remaining` is what it had left."""
+        if self.clock.state == STOPPED:
+            raise DraftError("Pick clock is not running")
+        if seconds <= 0:
+            raise DraftError("Pick clock needs a positive number of seconds")
+        return self._clock_event(self.clock.state, remaining + seconds)
+
+    def cancel_clock(self) -> Payload:
+        if self.clock.state == STOPPED:
+            raise DraftError("Pick clock is not running")
+        return self._clock_event(STOPPED, 0.0)
+
+    def next_clock(self) -> Optional[Payload]:
+        """Reset the clock for the team now on it, or stop it once the draft is over."""
+        if self.clock.state == STOPPED:
+            return None
+        if not self.in_progress:
+            return self._clock_event(STOPPED, 0.0)
+        return self._clock_event(self.clock.state, self.clock.seconds)
+
+    def expire_clock(self) -> Payload:
+        """The team on the clock ran out of time: auto-pick or skip it."""
+        return self.auto_pick() if self.clock.on_expiry == AUTO else self.skip_pick()
+
+    def _clock_event(self, state: str, remaining: float) -> Payload:
+        self.clock.set(state, remaining)
+        self.touch()
+        return self.events.append("clock", team=self.get_next_team(), **self.clock.to_dict())
+
+    def status(self) -> dict:
+        """Current draft status as returned by /get_status.
+
+        Every change to the draft emits an event, so the status is built once
+        per sequence number and reused until the next event. Callers must not
+        modify the returned dict.
+        """
+        return self.status_payload().message
+
+    def status_payload(self) -> Payload:
+        """The status for the current sequence number, built and encoded once."""
+        if self._status is None or self._status.message["seq"] != self.events.seq:
+            self._status = Payload({
+                "seq": self.events.seq,
+                "round": self.current_round,
+                "pick": self.current_pick,
+                "next_team": self.get_next_team(),
+                "registered_teams": list(self.registered_teams),
+                "pool": self.pool_id,
+                "draft_started": self.draft_started,
+                "can_start_draft": self.can_start_draft,
+                "auto_teams": sorted(self.auto_teams),
+                "clock": self.clock.to_dict(),
+            })
+        return self._status
+
+    async def wait_for_change(self, seq: int, timeout: float) -> bool:
+        """Wait until the draft has moved past `seq`; False if `timeout` passes first.
+
+        All waiters share one future, so an event wakes any number of them at once.
+        """
+        if self.events.seq != seq:
+            return True
+        if self._changed is None:
+            self._changed = asyncio.get_running_loop().create_future()
+        try:
+            # Shielded: a waiter that times out must not cancel the others' future.
+            await asyncio.wait_for(asyncio.shield(self._changed), timeout)
+        except asyncio.TimeoutError:
+            return False
+        return True
+
+    def changed(self):
+        """Wake the requests waiting in `wait_for_change()`."""
+        if self._changed is not None:
+            self._changed.set_result(None)
+            self._changed = None
+
+    def state(self) -> dict:
+        """Full draft state pushed to WebSocket clients.
+
+        Lists are copied because the message may sit in a client's queue while
+        later picks mutate the room.
+        """
+        state = dict(self.status())
+        state["remaining_players"] = self.players.names()
+        state["draft_results"] = {team: list(picks) for team, picks in self.draft_results.items()}
+        state["keepers"] = {player: self.schedule.owner(pick) for pick, player in self.keepers.items()
+                            if pick >= self.current_pick}
+        return state
+
+    def snapshot(self) -> dict:
+        """Full state tagged with the sequence number of the last event it includes."""
+        return {"type": "snapshot", "seq": self.events.seq, **self.state()}
+
+    def snapshot_payload(self) -> Payload:
+        """The snapshot for the current sequence number, built and encoded once."""
+        if self._snapshot is None or self._snapshot.message["seq"] != self.events.seq:
+            self._snapshot = Payload(self.snapshot())
+        return self._snapshot
+
+    def catch_up(self, last_seq: Optional[int]) -> List[Payload]:
+        """Messages that bring a client that has seen `last_seq` up to date."""
+        if last_seq is not None:
+            missed = self.events.since(last_seq)
+            if missed is not None:
+                return missed
+        return [self.snapshot_payload()]
+
+    def run_batch(self, commands: List[dict]) -> List[Payload]:
+        """Run `commands` as one transaction: all of them, or none if any is rejected.
+
+        Each command is a dict with a "type" of "register_team" (`team`),
+        "start_draft" (`order` and `format`, both optional), "pick" (`team`,
+        `player`) or "keeper" (`team`, `player`, `round`). They run first on a
+        copy of the room, which makes the picks auto-pick teams and keepers
+        are due after each one, as separate requests would. Only once every
+        command has succeeded are the resulting events applied to this room.
+        """
+        trial = DraftRoom.from_record(self.to_record(), lambda pool_id: self.catalog)
+        events = []
+        for index, command in enumerate(commands, 1):
+            try:
+                events.append(trial._run_command(command))
+                while trial.auto_on_clock:
+                    events.append(trial.auto_pick())
+            except DraftError as exc:
+                raise DraftError(f"Command {index} ({command.get('type')}): {exc.detail}", exc.status_code)
+            except KeyError as exc:
+                raise DraftError(f"Command {index} ({command.get('type')}): missing {exc.args[0]}")
+        return [self.apply(event.message) for event in events]
+
+    def _run_command(self, command: dict) -> Payload:
+        command_type = command.get("type")
+        if command_type == "register_team":
+            return self.register_team(command["team"])
+        if command_type == "start_draft":
+            return self.start_draft(command.get("order"), command.get("format", SNAKE))
+        if command_type == "pick":
+            return self.pick_player(command["team"], command["player"])
+        if command_type == "keeper":
+            return self.keep_player(command["team"], command["player"], command["round"])
+        raise DraftError(f"Unknown command: {command_type}")
+
+    def apply(self, event: dict, pools: Optional[Callable[[str], Optional[PlayerCatalog]]] = None) -> Payload:
+        """Re-run a command from a recorded event, e.g. when replaying a log.
+
+        `pools` looks up player pools by id, for drafts that use an imported one.
+        """
+        event_type = event["type"]
+        if event_type == "team_registered":
+            return self.register_team(event["team"])
+        if event_type == "draft_started":
+            return self.start_draft(event["order"], event.get("format", SNAKE))
+        if event_type == "pick_traded":
+            return self.trade_pick(event["overall"], event["to_team"])
+        if event_type == "keeper":
+            return self.keep_player(event["team"], event["player"], self.schedule.round_of(event["overall"]))
+        if event_type == "pick":
+            return self.pick_player(event["team"], event["player"])
+        if event_type == "auto_pick":
+            return self.set_auto(event["team"], event["enabled"])
+        if event_type == "skip":
+            return self.skip_pick()
+        if event_type == "pool_selected":
+            return self.set_pool(event["pool"], _find_pool(event["pool"], pools))
+        if event_type == "clock":
+            self.clock.seconds = event["seconds"]
+            self.clock.on_expiry = event["on_expiry"]
+            return self._clock_event(event["state"], event["remaining"])
+        raise ValueError(f"Unknown event type: {event_type}")
+
+    def to_record(self) -> dict:
+        """Compact, JSON-serializable copy of the draft for snapshots; shares nothing mutable with the room."""
+        return {
+            "draft_id": self.draft_id,
+            "seq": self.events.seq,
+            "pool": self.pool_id,
+            "teams": list(self.registered_teams),
+            "order": list(self.draft_order),
+            "format": self.schedule.format if self.schedule else SNAKE,
+            "trades": {str(pick): team for pick, team in self.schedule.trades.items()} if self.schedule else {},
+            "started": self.draft_started,
+            "results": {team: list(players) for team, players in self.draft_results.items()},
+            "history": list(self.pick_history),
+            "keepers": {str(pick): player for pick, player in self.keepers.items()},
+            "round": self.current_round,
+            "pick": self.current_pick,
+            "auto": sorted(self.auto_teams),
+            "clock": [self.clock.seconds, self.clock.on_expiry, self.clock.state, self.clock.remaining],
+            "queues": {
+                team: [self.catalog.players[i].name for i in queue.ids[queue.head:]]
+                for team, queue in self.queues.items()
+            },
+        }
+
+    @classmethod
+    def from_record(cls, record: dict,
+                    pools: Optional[Callable[[str], Optional[PlayerCatalog]]] = None) -> "DraftRoom":
+        """Rebuild a room from `to_record()` output; `pools` is as for `apply()`."""
+        pool_id = record.get("pool", DEFAULT_POOL_ID)
+        room = cls(record["draft_id"], catalog=_find_pool(pool_id, pools), pool_id=pool_id)
+        room.events.seq = record["seq"]
+        room.registered_teams = set(record["teams"])
+        room.draft_order = list(record["order"])
+        room.draft_started = record["started"]
+        if room.draft_started:
+            trades = {int(pick): team for pick, team in record.get("trades", {}).items()}
+            room.schedule = PickSchedule(room.draft_order, room.rounds, record.get("format", SNAKE), trades)
+        room.draft_results = {team: list(picks) for team, picks in record["results"].items()}
+        room.pick_history = [tuple(pick) for pick in record.get("history", ())]
+        room.keepers = {int(pick): player for pick, player in record.get("keepers", {}).items()}
+        room.current_round = record["round"]
+        room.current_pick = record["pick"]
+        room.auto_teams = set(record.get("auto", ()))
+        if "clock" in record:
+            room.clock.seconds, room.clock.on_expiry, state, remaining = record["clock"]
+            room.clock.set(state, remaining)
+        for team, players in record.get("queues", {}).items():
+            room.set_queue(team, players)
+        for picks in room.draft_results.values():
+            for name in picks:
+                room.players.take(room.players.catalog.by_name[name])
+        for name in room.keepers.values():
+            room.players.take(room.players.catalog.by_name[name])
+        return room
+
+
+def _find_pool(pool_id: str, pools: Optional[Callable[[str], Optional[PlayerCatalog]]]) -> PlayerCatalog:
+    if pool_id == DEFAULT_POOL_ID:
+        return DEFAULT_CATALOG
+    catalog = pools(pool_id) if pools is not None else None
+    if catalog is None:
+        raise ValueError(f"Unknown player pool: {pool_id}")
+    return catalog
+
+
+class RoomRegistry:
+    """Keeps every live draft room keyed by draft id and evicts idle ones.
+
+    Only rooms that are not mid-draft can be evicted, and the default draft
+    served by the top-level routes is never evicted. `on_evict` is called
+    with the id of each evicted room.
+    """
+
+    def __init__(self, idle_timeout: float = 3600.0, sweep_interval: float = 60.0,
+                 on_evict: Optional[Callable[[str], None]] = None):
+        self.idle_timeout = idle_timeout
+        self.sweep_interval = sweep_interval
+        self.on_evict = on_evict
+        self.rooms: Dict[str, DraftRoom] = {}
+        self._last_sweep = time.monotonic()
+
+    def __len__(self) -> int:
+        return len(self.rooms)
+
+    def __contains__(self, draft_id: str) -> bool:
+        return draft_id in self.rooms
+
+    def get(self, draft_id: str) -> Optional[DraftRoom]:
+        return self.rooms.get(draft_id)
+
+    def get_or_create(self, draft_id: str) -> DraftRoom:
+        """Return the room for `draft_id`, creating it on first use."""
+        room = self.rooms.get(draft_id)
+        if room is None:
+            self.maybe_evict()
+            room = self.rooms[draft_id] = DraftRoom(draft_id)
+        return room
+
+    def add(self, room: DraftRoom):
+        self.rooms[room.draft_id] = room
+
+    def remove(self, draft_id: str) -> Optional[DraftRoom]:
+        return self.rooms.pop(draft_id, None)
+
+    def clear(self):
+        """Drop every room, stopping their broadcasters' writer tasks."""
+        for room in self.rooms.values():
+            room.broadcaster.unsubscribe_all()
+        self.rooms.clear()
+        self._last_sweep = time.monotonic()
+
+    def maybe_evict(self) -> List[str]:
+        """Evict idle rooms, at most once per `sweep_interval`."""
+        now = time.monotonic()
+        if now - self._last_sweep < self.sweep_interval:
+            return []
+        return self.evict_idle(now)
+
+    def evict_idle(self, now: Optional[float] = None) -> List[str]:
+        """Drop rooms idle for longer than `idle_timeout` that have no connected clients."""
+        now = time.monotonic() if now is None else now
+        self._last_sweep = now
+        cutoff = now - self.idle_timeout
+        evicted = [
+            draft_id for draft_id, room in self.rooms.items()
+            if draft_id != DEFAULT_DRAFT_ID and room.last_active < cutoff
+            and not room.broadcaster and not room.in_progress
+        ]
+        for draft_id in evicted:
+            del self.rooms[draft_id]
+            if self.on_evict is not None:
+                self.on_evict(draft_id)
+        return evicted
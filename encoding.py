@@ -0,0 +1,75 @@
+import json
+from typing import Callable, Dict, Iterable, Optional, Tuple, Union
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - optional binary format
+    msgpack = None
+
+
+class Encoder:
+    """Turns a message into the data of one WebSocket frame."""
+
+    __slots__ = ("name", "binary", "dumps")
+
+    def __init__(self, name: str, binary: bool, dumps: Callable[[object], Union[str, bytes]]):
+        self.name = name
+        self.binary = binary
+        self.dumps = dumps
+
+
+def _json_dumps(message) -> str:
+    return json.dumps(message, separators=(",", ":"))
+
+
+ENCODERS: Dict[str, Encoder] = {"json": Encoder("json", False, _json_dumps)}
+if orjson is not None:  # pragma: no branch
+    ENCODERS["orjson"] = Encoder("orjson", False, lambda message: orjson.dumps(message).decode())
+if msgpack is not None:  # pragma: no cover
+    ENCODERS["msgpack"] = Encoder("msgpack", True, lambda message: msgpack.packb(message, use_bin_type=True))
+
+
+def get_encoder(name: str) -> Encoder:
+    """Look up an installed encoder by name."""
+    try:
+        return ENCODERS[name]
+    except KeyError:
+        raise ValueError(f"Encoder {name!r} is not available; installed: {', '.join(ENCODERS)}") from None
+
+
+def negotiate(offered: Iterable[str], json_encoder: Encoder) -> Tuple[Optional[str], Encoder]:
+    """Pick the wire format from the WebSocket subprotocols a client offers.
+
+    `json` is always available and is produced by `json_encoder` (stdlib json
+    or orjson, chosen by the server). `msgpack` is accepted when installed.
+    Returns the subprotocol to accept (None if the client offered none we
+    support) and the encoder to use.
+    """
+    for protocol in offered:
+        if protocol == "json":
+            return protocol, json_encoder
+        encoder = ENCODERS.get(protocol)
+        if encoder is not None and encoder.binary:
+            return protocol, encoder
+    return None, json_encoder
+
+
+class Payload:
+    """A message encoded at most once per encoder, however many clients receive it."""
+
+    __slots__ = ("message", "_encoded")
+
+    def __init__(self, message):
+        self.message = message
+        self._encoded: Dict[str, Union[str, bytes]] = {}
+
+    def encode(self, encoder: Encoder) -> Union[str, bytes]:
+        data = self._encoded.get(encoder.name)
+        if data is None:
+            data = self._encoded[encoder.name] = encoder.dumps(self.message)
+        return data
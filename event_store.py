@@ -0,0 +1,117 @@
+import json
+import os
+from typing import List, Tuple
+
+from storage import BatchedStorage, Snapshot
+
+SNAPSHOT_FILE = "snapshot.json"
+SEGMENT_PREFIX = "log-"
+SEGMENT_SUFFIX = ".jsonl"
+
+
+class EventStore(BatchedStorage):
+    """Durable, append-only log files of draft events with periodic snapshots.
+
+    Each batch is written to the current log segment with a single fsync.
+    A snapshot is written atomically, and the log segments it covers are
+    then deleted, which keeps recovery time bounded.
+
+    Files in `directory`:
+        snapshot.json               {"lsn": N, "drafts": [room records]}
+        log-<first lsn>.jsonl       one {"lsn", "draft", "event"} object per line
+    """
+
+    def __init__(self, directory: str, flush_interval: float = 0.005, snapshot_every: int = 10000):
+        super().__init__(flush_interval, snapshot_every)
+        self.directory = directory
+        self._segment = None
+        # Set while a write may have left a partial line at the end of the segment
+        self._torn = False
+
+    def _load(self):
+        os.makedirs(self.directory, exist_ok=True)
+        snapshot_lsn, drafts = self._read_snapshot()
+        last_lsn = 0
+        tail = []
+        for name in self._segments():
+            for entry in self._read_segment(name):
+                # A batch retried after a failed write may repeat events.
+                if entry["lsn"] <= last_lsn:
+                    continue
+                last_lsn = entry["lsn"]
+                if entry["lsn"] > snapshot_lsn:
+                    tail.append((entry["draft"], entry["event"]))
+        # Never append to an old segment: its last line may be torn.
+        self._segment = self._open_segment(max(last_lsn, snapshot_lsn) + 1)
+        return last_lsn, snapshot_lsn, drafts, tail
+
+    def _write_batch(self, jobs: list):
+        lines = []
+        for job in jobs:
+            if isinstance(job, Snapshot):
+                self._write(lines)
+                lines = []
+                self._write_snapshot(job)
+            else:
+                lines.append(json.dumps({"lsn": job[0], "draft": job[1], "event": job[2]},
+                                        separators=(",", ":")) + "\n")
+        self._write(lines)
+
+    def _close(self):
+        self._segment.close()
+        self._segment = None
+
+    def _write(self, lines: List[str]):
+        if lines:
+            if self._torn:
+                # End the partial line a failed write left, so it cannot swallow the next one.
+                lines = ["\n"] + lines
+            self._torn = True
+            self._segment.write("".join(lines))
+            self._segment.flush()
+            os.fsync(self._segment.fileno())
+            self._torn = False
+
+    def _write_snapshot(self, snapshot: Snapshot):
+        path = os.path.join(self.directory, SNAPSHOT_FILE)
+        tmp = path + ".tmp"
+        with open(tmp, "w") as f:
+            f.write(f'{{"lsn":{snapshot.lsn},"drafts":[')
+            f.write(",".join(record for _, record in snapshot.serialized()))
+            f.write("]}")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+        # Later events go to a fresh segment; the ones the snapshot covers can go.
+        self._segment.close()
+        self._segment = self._open_segment(snapshot.lsn + 1)
+        current = os.path.basename(self._segment.name)
+        for name in self._segments():
+            if name != current:
+                os.remove(os.path.join(self.directory, name))
+
+    def _open_segment(self, first_lsn: int):
+        return open(os.path.join(self.directory, f"{SEGMENT_PREFIX}{first_lsn:012d}{SEGMENT_SUFFIX}"), "a")
+
+    def _segments(self) -> List[str]:
+        return sorted(
+            name for name in os.listdir(self.directory)
+            if name.startswith(SEGMENT_PREFIX) and name.endswith(SEGMENT_SUFFIX)
+        )
+
+    def _read_snapshot(self) -> Tuple[int, List[dict]]:
+        try:
+            with open(os.path.join(self.directory, SNAPSHOT_FILE)) as f:
+                snapshot = json.load(f)
+        except FileNotFoundError:
+            return 0, []
+        return snapshot["lsn"], snapshot["drafts"]
+
+    def _read_segment(self, name: str):
+        with open(os.path.join(self.directory, name)) as f:
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    # A line torn by a crash or a failed write
+                    continue
@@ -0,0 +1,38 @@
+from collections import deque
+from itertools import islice
+from typing import Deque, List, Optional
+
+from encoding import Payload
+
+
+class EventLog:
+    """Sequence-numbered draft events with a bounded replay buffer.
+
+    Every state change gets the next sequence number. The most recent
+    `maxlen` events are kept so a reconnecting client can be sent just the
+    events it missed instead of a full snapshot. Events are stored as
+    payloads, so replays reuse the encoding done for the live broadcast.
+    """
+
+    def __init__(self, maxlen: int = 256):
+        self.seq = 0
+        self.events: Deque[Payload] = deque(maxlen=maxlen)
+
+    def append(self, event_type: str, **data) -> Payload:
+        """Record an event and return it with its sequence number."""
+        self.seq += 1
+        event = Payload({"type": event_type, "seq": self.seq, **data})
+        self.events.append(event)
+        return event
+
+    def since(self, seq: int) -> Optional[List[Payload]]:
+        """Events after `seq`, or None if they are no longer all buffered."""
+        if seq > self.seq or seq < 0:
+            return None
+        if seq == self.seq:
+            return []
+        oldest = self.events[0].message["seq"] if self.events else self.seq + 1
+        if seq + 1 < oldest:
+            return None
+        # Sequence numbers are contiguous, so the offset into the buffer is known.
+        return list(islice(self.events, seq + 1 - oldest, None))
@@ -1,12 +1,85 @@
-from fastapi import FastAPI, WebSocket, HTTPException
-from fastapi.staticfiles import StaticFiles
+from fastapi import FastAPI, Header, WebSocket, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse
-import random
-from typing import List, Dict, Set
-from pydantic import BaseModel
+from fastapi.responses import JSONResponse, PlainTextResponse, Response
+from pydantic import BaseModel, Field
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import asynccontextmanager
+from typing import Dict, List, Literal, Optional, Set
+import asyncio
+import json
+import logging
+import math
+import multiprocessing
+import os
+import tempfile
+import time
 
-app = FastAPI()
+from archive import DAY, PARALLEL_SEGMENTS, DraftArchive, draft_record
+from admission import ConcurrencyLimiter, IdempotencyCache, RateLimiter
+from cluster import Cluster, RemoteFeed
+from draft_room import DEFAULT_DRAFT_ID, DraftError, DraftRoom, RoomRegistry
+from encoding import Payload, get_encoder, negotiate
+from event_store import EventStore
+from metrics import REGISTRY, Counter, Gauge, Histogram, MetricsMiddleware
+from pick_clock import AUTO, RUNNING, TimingWheel
+from pick_schedule import SNAKE
+from player_import import InvalidPlayerData, PoolStore, guess_format, read_catalog, summary
+from profiler import SamplingProfiler
+from sqlite_storage import SQLiteStorage
+from static_assets import AssetStore
+from storage import EVICTED, MemoryStorage, Storage
+from player_pool import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from simulator import DEFAULT_SIMULATIONS, MAX_SIMULATIONS, ResultCache, availability, candidates
+
+logger = logging.getLogger(__name__)
+
+# When this module was imported, for the cold start time reported by /readyz
+IMPORTED_AT = time.monotonic()
+# Seconds from import until the lifespan finished starting up; None until then and again once shutdown begins
+startup_seconds: Optional[float] = None
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    global cluster, storage, startup_seconds
+    workers = int(os.environ.get("DRAFT_WORKERS", "1"))
+    if workers > 1:
+        cluster = Cluster(os.environ.get("DRAFT_CLUSTER_DIR") or os.path.join(tempfile.gettempdir(), "fantasy-draft"),
+                          workers, execute_command, deliver_remote_event)
+        await cluster.start()
+        data_dir = os.environ.get("DRAFT_DATA_DIR")
+        if pools.directory is None:
+            # Every worker has to see the pools imported through any of them.
+            pools.directory = os.path.join(cluster.directory, "pools")
+        if archive.directory is None:
+            archive.directory = os.path.join(cluster.directory, "archive")
+        archive.writer = str(cluster.index)
+        if data_dir:
+            # Each worker persists only the drafts it owns.
+            storage = create_storage(os.environ.get("DRAFT_STORAGE"), os.path.join(data_dir, f"worker-{cluster.index}"))
+    recover_drafts(storage)
+    await asyncio.to_thread(archive.open)
+    clock_task = asyncio.create_task(clocks.run())
+    # DRAFT_DEV=1 reloads static files when they are edited
+    watch_task = asyncio.create_task(assets.watch()) if os.environ.get("DRAFT_DEV") == "1" else None
+    heartbeat_task = asyncio.create_task(run_heartbeats()) if WS_PING_INTERVAL > 0 else None
+    startup_seconds = time.monotonic() - IMPORTED_AT
+    logger.info("Ready in %.3fs", startup_seconds)
+    yield
+    startup_seconds = None
+    for task in (watch_task, heartbeat_task):
+        if task is not None:
+            task.cancel()
+    clocks.stop()
+    await clock_task
+    shutdown_simulation_pool()
+    if cluster is not None:
+        await cluster.stop()
+        cluster = None
+    storage.close()
+    archive.clear()
+
+app = FastAPI(lifespan=lifespan)
 
 # Add CORS middleware
 app.add_middleware(
@@ -17,151 +90,981 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Mount static files at /static path
-app.mount("/static", StaticFiles(directory="static"), name="static")
+app.add_middleware(MetricsMiddleware)
+
+# Static files, loaded into memory and compressed once
+assets = AssetStore("static")
 
 class TeamRegistration(BaseModel):
     team_name: str
 
-# Global state
-MAX_TEAMS = 4
-registered_teams: Set[str] = set()
-players = [f"Player {i}" for i in range(1, 21)]  # Example player pool
-rounds = 5
-
-# Draft state
-draft_order: List[str] = []
-reverse_order: List[str] = []
-draft_results: Dict[str, List[str]] = {}
-current_round = 1
-current_pick = 0
-ws_connections: List[WebSocket] = []  # Store WebSocket connections
-draft_started = False
+class AutoPickSetting(BaseModel):
+    enabled: bool = True
+
+class PlayerQueue(BaseModel):
+    players: List[str]
+
+class ClockSettings(BaseModel):
+    seconds: Optional[float] = None
+    on_expiry: str = AUTO
+
+class PoolSelection(BaseModel):
+    pool: str
+
+class DraftSettings(BaseModel):
+    format: str = SNAKE
+
+class PickTrade(BaseModel):
+    team: str
+
+# Commands one batch request may hold
+MAX_BATCH_COMMANDS = 1000
+
+class BatchCommand(BaseModel):
+    type: Literal["register_team", "start_draft", "pick", "keeper"]
+    team: Optional[str] = None
+    player: Optional[str] = None
+    round: Optional[int] = None
+    order: Optional[List[str]] = None
+    format: Optional[str] = None
+
+class CommandBatch(BaseModel):
+    commands: List[BatchCommand] = Field(min_length=1, max_length=MAX_BATCH_COMMANDS)
+
+# JSON implementation used for WebSocket frames: "json" (stdlib) or "orjson" if installed
+JSON_ENCODER = get_encoder(os.environ.get("DRAFT_JSON_ENCODER", "json"))
+
+# Every draft lives in its own room; the legacy top-level routes act on DEFAULT_DRAFT_ID.
+registry = RoomRegistry()
+
+# Set by the lifespan when DRAFT_WORKERS > 1; each draft is then owned by one worker process.
+cluster: Optional[Cluster] = None
+
+# Clients connected to this worker for drafts owned by another worker
+remote_feeds: Dict[str, RemoteFeed] = {}
+
+# One timing wheel runs the pick clocks of every draft this worker owns
+clocks = TimingWheel()
+_clock_tasks: Set[asyncio.Task] = set()
+
+# Mock-draft results by draft state, so repeated requests between picks are free
+simulation_results = ResultCache()
+_simulation_pool: Optional[ProcessPoolExecutor] = None
+
+
+PICKS = Counter("draft_picks_total", "Picks made, including auto-picks.")
+PICK_REJECTIONS = Counter("draft_pick_rejections_total", "Pick requests rejected, by reason.", ("reason",))
+BROADCAST_SECONDS = Histogram("draft_broadcast_duration_seconds", "Time to queue an event for a draft's clients.",
+                              buckets=(0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.01))
+Gauge("draft_rooms", "Draft rooms held by this worker.", function=lambda: len(registry))
+Gauge("draft_ws_connections", "WebSocket clients connected to this worker.",
+      function=lambda: sum(len(room.broadcaster) for room in registry.rooms.values())
+      + sum(len(feed.broadcaster) for feed in remote_feeds.values()))
+
+Gauge("draft_startup_seconds", "Seconds from import until this worker was ready.",
+      function=lambda: startup_seconds or 0.0)
+
+ADMISSION_REJECTIONS = Counter("draft_admission_rejections_total",
+                               "Pick and registration requests turned away by a limit, by limit.", ("limit",))
+
+# Picks and registrations per second allowed per client address (DRAFT_CLIENT_RATE) and per
+# team (DRAFT_TEAM_RATE), in bursts of twice that; and how many may run at once per draft.
+CLIENT_RATE = float(os.environ.get("DRAFT_CLIENT_RATE", "20"))
+TEAM_RATE = float(os.environ.get("DRAFT_TEAM_RATE", "5"))
+ROOM_CONCURRENCY = int(os.environ.get("DRAFT_ROOM_CONCURRENCY", "32"))
+client_limits = RateLimiter(CLIENT_RATE, 2 * CLIENT_RATE)
+team_limits = RateLimiter(TEAM_RATE, 2 * TEAM_RATE)
+room_limits = ConcurrencyLimiter(ROOM_CONCURRENCY)
+# Results of picks and registrations sent with an Idempotency-Key header
+idempotent_results = IdempotencyCache()
+
+# WebSocket clients quiet for DRAFT_WS_PING_INTERVAL seconds are sent a ping, and dropped if they
+# are still quiet DRAFT_WS_PING_TIMEOUT seconds later; an interval of 0 turns heartbeats off.
+WS_PING_INTERVAL = float(os.environ.get("DRAFT_WS_PING_INTERVAL", "20"))
+WS_PING_TIMEOUT = float(os.environ.get("DRAFT_WS_PING_TIMEOUT", "20"))
+PING = Payload({"type": "ping"})
+
+# Long-polls of /get_status wait this long for a change by default, and at most MAX_POLL_TIMEOUT
+DEFAULT_POLL_TIMEOUT = 30.0
+MAX_POLL_TIMEOUT = 60.0
+# Part of every ETag; it changes on restart, when in-memory drafts start again from seq 0.
+INSTANCE_ID = os.urandom(4).hex()
+
+# Off unless DRAFT_PROFILER=1; then started and stopped through /debug/profiler/*
+profiler = SamplingProfiler()
+
+
+def simulation_pool() -> ProcessPoolExecutor:
+    """Worker processes for mock drafts (DRAFT_SIM_WORKERS, default one per CPU), started on first use."""
+    global _simulation_pool
+    if _simulation_pool is None:
+        workers = int(os.environ.get("DRAFT_SIM_WORKERS", "0")) or None
+        # Spawned rather than forked: this process runs threads (storage, the event loop's executor).
+        _simulation_pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+    return _simulation_pool
+
+
+def shutdown_simulation_pool():
+    global _simulation_pool
+    if _simulation_pool is not None:
+        _simulation_pool.shutdown(cancel_futures=True)
+        _simulation_pool = None
+
+
+def create_storage(kind: Optional[str], data_dir: Optional[str]) -> Storage:
+    """Build the storage backend: "memory", "file" (event log) or "sqlite".
+
+    Without an explicit kind, drafts are kept in memory unless a data
+    directory is given, in which case the file event log is used.
+    """
+    kind = kind or ("file" if data_dir else "memory")
+    if kind == "memory":
+        return MemoryStorage()
+    if not data_dir:
+        raise ValueError(f"DRAFT_DATA_DIR is required for {kind} storage")
+    if kind == "file":
+        return EventStore(data_dir)
+    if kind == "sqlite":
+        os.makedirs(data_dir, exist_ok=True)
+        return SQLiteStorage(os.path.join(data_dir, "drafts.db"))
+    raise ValueError(f"Unknown storage backend: {kind}")
+
+
+# DRAFT_STORAGE picks the backend; DRAFT_DATA_DIR is where file/sqlite storage keeps its data
+storage: Storage = create_storage(os.environ.get("DRAFT_STORAGE"), os.environ.get("DRAFT_DATA_DIR"))
+
+# Imported player pools, saved under DRAFT_DATA_DIR/pools when there is a data directory
+pools = PoolStore(os.path.join(os.environ["DRAFT_DATA_DIR"], "pools") if os.environ.get("DRAFT_DATA_DIR") else None)
+
+# Finished drafts, for analytics; under DRAFT_DATA_DIR/archive when there is a data directory
+archive = DraftArchive(os.path.join(os.environ["DRAFT_DATA_DIR"], "archive") if os.environ.get("DRAFT_DATA_DIR") else None)
+
+
+def recover_drafts(store: Storage):
+    """Rebuild every draft from the store's latest snapshot plus the log tail."""
+    recovered = store.open()
+    for record in recovered.drafts:
+        registry.add(DraftRoom.from_record(record, pools.get))
+    for draft_id, event in recovered.tail:
+        if event["type"] == EVICTED:
+            # Whatever was logged for the draft before is gone; a later draft with its id starts afresh.
+            registry.remove(draft_id)
+            continue
+        room = registry.get_or_create(draft_id)
+        # Events already folded into the snapshot are skipped.
+        if event["seq"] > room.events.seq:
+            room.apply(event, pools.get)
+    for room in registry.rooms.values():
+        sync_clock(room)
+    logger.info("Recovered %d drafts (%d log events) in %.3fs",
+                len(registry), len(recovered.tail), recovered.seconds)
+
+
+def record_eviction(draft_id: str):
+    storage.evict(draft_id)
+
+
+registry.on_evict = record_eviction
+
+
+def record_events(room: DraftRoom, events: List[Payload]):
+    """Hand events to the storage backend, snapshotting every draft when due."""
+    storage.append_many(room.draft_id, [event.message for event in events])
+    if storage.should_snapshot():
+        storage.snapshot([r.to_record() for r in registry.rooms.values()])
+
 
 def reset_state():
-    """Reset all global state variables to their initial values."""
-    global players, draft_order, reverse_order, draft_results
-    global current_round, current_pick, ws_connections, draft_started
-    
-    registered_teams.clear()
-    players = [f"Player {i}" for i in range(1, 21)]
-    draft_order = []
-    reverse_order = []
-    draft_results = {}
-    current_round = 1
-    current_pick = 0
-    ws_connections = []
-    draft_started = False
+    """Drop every draft room so the next request starts from a clean state."""
+    registry.clear()
+    clocks.clear()
+    simulation_results.clear()
+    pools.clear()
+    archive.clear()
+    for feed in remote_feeds.values():
+        feed.broadcaster.unsubscribe_all()
+    remote_feeds.clear()
+    client_limits.clear()
+    team_limits.clear()
+    room_limits.clear()
+    idempotent_results.clear()
+
+
+def default_room() -> DraftRoom:
+    return registry.get_or_create(DEFAULT_DRAFT_ID)
+
+
+def get_room(draft_id: str) -> DraftRoom:
+    """Look up an existing draft room or fail with 404; the default draft always exists."""
+    if draft_id == DEFAULT_DRAFT_ID:
+        return default_room()
+    room = registry.get(draft_id)
+    if room is None:
+        raise DraftError("Draft not found", status_code=404)
+    return room
+
+
+@app.exception_handler(DraftError)
+async def draft_error_handler(request: Request, exc: DraftError):
+    headers = None if exc.retry_after is None else {"Retry-After": str(math.ceil(exc.retry_after))}
+    return JSONResponse(status_code=exc.status_code, content={"detail": exc.detail}, headers=headers)
 
 @app.get("/")
-async def root():
+async def root(request: Request):
     """Serve the demo page at the root URL"""
-    return FileResponse("static/index.html")
+    return assets.response("index.html", request)
+
+@app.get("/static/{path:path}")
+async def static_file(path: str, request: Request):
+    """Serve a static file; hashed URLs from `assets.url()` may be cached for good"""
+    return assets.response(path, request)
+
+@app.get("/healthz")
+async def healthz():
+    """Liveness: the process is up and its event loop answers"""
+    return {"status": "ok"}
+
+@app.get("/readyz")
+async def readyz():
+    """Readiness: drafts are recovered, the pick clocks run and storage is writing; 503 otherwise"""
+    if startup_seconds is None:
+        raise DraftError("Not ready", status_code=503, retry_after=1)
+    if storage.error is not None:
+        raise DraftError(f"Storage is failing: {storage.error}", status_code=503, retry_after=1)
+    return {"status": "ready", "startup_seconds": round(startup_seconds, 3)}
+
+@app.get("/metrics")
+async def get_metrics():
+    """Metrics of this worker in the Prometheus text format"""
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
+@app.post("/debug/profiler/{action}")
+async def control_profiler(action: str, interval: float = Query(0.005, gt=0, le=1)):
+    """Start the sampling profiler, or stop it and get the collapsed stacks"""
+    if os.environ.get("DRAFT_PROFILER") != "1":
+        raise DraftError("Profiler is disabled; set DRAFT_PROFILER=1", status_code=404)
+    try:
+        if action == "start":
+            profiler.start(interval)
+            return {"message": "Profiler started", "interval": interval}
+        if action == "stop":
+            return PlainTextResponse(profiler.stop())
+    except RuntimeError as exc:
+        raise DraftError(str(exc), status_code=409)
+    raise DraftError(f"Unknown profiler action: {action}", status_code=404)
+
+@app.get("/analytics/adp")
+async def get_adp(days: Optional[float] = Query(None, gt=0), position: Optional[str] = None,
+                  limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE)):
+    """Average draft position of every player over archived drafts"""
+    return await query_archive("adp", days, position=position, limit=limit)
+
+@app.get("/analytics/runs")
+async def get_position_runs(days: Optional[float] = Query(None, gt=0), min_length: int = Query(3, ge=2)):
+    """Runs of consecutive picks at one position over archived drafts"""
+    return await query_archive("runs", days, min_length=min_length)
+
+@app.get("/analytics/teams/{team}")
+async def get_team_tendencies(team: str, days: Optional[float] = Query(None, gt=0)):
+    """Positions a team drafts, overall and by round, over archived drafts"""
+    return await query_archive("team", days, team=team)
 
 @app.post("/register_team")
-async def register_team(team: TeamRegistration):
+async def register_team(team: TeamRegistration, request: Request, idempotency_key: Optional[str] = Header(None)):
     """Register a new team"""
-    if draft_started:
-        raise HTTPException(status_code=400, detail="Draft has already started")
-    
-    if len(registered_teams) >= MAX_TEAMS:
-        raise HTTPException(status_code=400, detail="Maximum number of teams reached")
-    
-    if team.team_name in registered_teams:
-        raise HTTPException(status_code=400, detail="Team name already taken")
-    
-    registered_teams.add(team.team_name)
-    await notify_clients()
-    return {"message": f"Team {team.team_name} registered successfully"}
+    admit_client(request)
+    return await run_command(DEFAULT_DRAFT_ID, "register_team", team_name=team.team_name,
+                             idempotency_key=idempotency_key)
+
+@app.post("/batch")
+async def run_batch(batch: CommandBatch, request: Request, idempotency_key: Optional[str] = Header(None)):
+    """Apply a list of commands to the draft as one transaction, with one broadcast"""
+    admit_client(request)
+    return await run_command(DEFAULT_DRAFT_ID, "batch", commands=batch_commands(batch),
+                             idempotency_key=idempotency_key)
 
 @app.get("/get_status")
-async def get_status():
+async def get_status(request: Request, since: Optional[int] = None,
+                     timeout: float = Query(DEFAULT_POLL_TIMEOUT, ge=0, le=MAX_POLL_TIMEOUT)):
     """Get current draft status"""
-    return {
-        "round": current_round,
-        "pick": current_pick,
-        "next_team": get_next_team() if draft_started else None,
-        "registered_teams": list(registered_teams),
-        "draft_started": draft_started,
-        "can_start_draft": len(registered_teams) == MAX_TEAMS and not draft_started
-    }
+    return await status_response(DEFAULT_DRAFT_ID, request, since, timeout)
 
 @app.post("/start_draft")
-async def start_draft():
+async def start_draft(settings: Optional[DraftSettings] = None):
     """Start the draft"""
-    global draft_started, draft_order, reverse_order, draft_results, current_round, current_pick
-    
-    if len(registered_teams) != MAX_TEAMS:
-        raise HTTPException(status_code=400, detail="Need exactly 4 teams to start")
-    
-    if draft_started:
-        raise HTTPException(status_code=400, detail="Draft has already started")
-    
-    draft_started = True
-    draft_order = random.sample(list(registered_teams), len(registered_teams))
-    reverse_order = draft_order[::-1]
-    draft_results = {team: [] for team in registered_teams}
-    current_round = 1
-    current_pick = 0
-    
-    await notify_clients()
-    return {"message": "Draft started", "order": draft_order}
+    settings = settings or DraftSettings()
+    return await run_command(DEFAULT_DRAFT_ID, "start_draft", fmt=settings.format)
 
 @app.websocket("/ws")
 async def websocket_endpoint(websocket: WebSocket):
-    await websocket.accept()
-    ws_connections.append(websocket)
+    await draft_websocket(DEFAULT_DRAFT_ID, websocket)
+
+@app.post("/pick_player/{team}/{player}")
+async def pick_player(team: str, player: str, request: Request, idempotency_key: Optional[str] = Header(None)):
+    """Make a player pick"""
+    admit_client(request)
+    return await run_command(DEFAULT_DRAFT_ID, "pick_player", team=team, player=player,
+                             idempotency_key=idempotency_key)
+
+@app.get("/players")
+async def list_players(position: Optional[str] = None, q: Optional[str] = None,
+                       cursor: int = Query(0, ge=0), limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE)):
+    """List available players"""
+    return await run_command(DEFAULT_DRAFT_ID, "players", position=position, prefix=q, cursor=cursor, limit=limit)
+
+@app.post("/teams/{team}/auto")
+async def set_auto_pick(team: str, setting: AutoPickSetting):
+    """Let the server pick for a team"""
+    return await run_command(DEFAULT_DRAFT_ID, "set_auto", team=team, enabled=setting.enabled)
+
+@app.put("/teams/{team}/queue")
+async def set_player_queue(team: str, queue: PlayerQueue):
+    """Set the players a team wants auto-picked first"""
+    return await run_command(DEFAULT_DRAFT_ID, "set_queue", team=team, players=queue.players)
+
+@app.post("/autocomplete")
+async def autocomplete():
+    """Auto-pick every remaining pick"""
+    return await run_command(DEFAULT_DRAFT_ID, "autocomplete")
+
+@app.post("/clock/{action}")
+async def control_clock(action: str, settings: Optional[ClockSettings] = None):
+    """Start, pause, resume, extend or cancel the pick clock"""
+    settings = settings or ClockSettings()
+    return await run_command(DEFAULT_DRAFT_ID, "clock", action=action, seconds=settings.seconds,
+                             on_expiry=settings.on_expiry)
+
+@app.get("/teams/{team}/availability")
+async def get_availability(team: str, simulations: int = Query(DEFAULT_SIMULATIONS, ge=1, le=MAX_SIMULATIONS),
+                           limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE)):
+    """Chance that each player is still available at a team's next pick"""
+    return await run_command(DEFAULT_DRAFT_ID, "availability", team=team, simulations=simulations, limit=limit)
+
+@app.get("/teams/{team}/picks")
+async def get_team_picks(team: str, limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE)):
+    """A team's upcoming picks"""
+    return await run_command(DEFAULT_DRAFT_ID, "team_picks", team=team, limit=limit)
+
+@app.post("/picks/{pick}/trade")
+async def trade_pick(pick: int, trade: PickTrade):
+    """Give a pick not yet made to another team"""
+    return await run_command(DEFAULT_DRAFT_ID, "trade_pick", pick=pick, team=trade.team)
+
+@app.put("/pool")
+async def select_pool(selection: PoolSelection):
+    """Draft from an imported player pool"""
+    return await run_command(DEFAULT_DRAFT_ID, "set_pool", pool=selection.pool)
+
+@app.post("/pools/{pool_id}")
+async def import_pool(pool_id: str, request: Request, format: Optional[str] = None):
+    """Import a player pool from a CSV or JSON Lines request body"""
+    fmt = format or guess_format(request.headers.get("content-type"))
+    if fmt is None:
+        raise DraftError("Unknown format; pass ?format=csv or ?format=jsonl", status_code=415)
     try:
-        while True:
-            await websocket.receive_text()
-    except:
-        ws_connections.remove(websocket)
+        pools.check_id(pool_id)
+    except ValueError as exc:
+        raise DraftError(str(exc))
+    if pools.get(pool_id) is not None:
+        raise DraftError("Pool already exists", status_code=409)
+    # The body is spooled to disk and parsed off the event loop, so memory
+    # stays bounded and other requests are served during a large import.
+    with tempfile.TemporaryFile() as body:
+        async for chunk in request.stream():
+            body.write(chunk)
+        body.seek(0)
+        try:
+            catalog = await asyncio.to_thread(read_catalog, body, fmt)
+        except InvalidPlayerData as exc:
+            raise DraftError(f"Invalid player data: {exc}", status_code=422)
+    try:
+        await asyncio.to_thread(pools.add, pool_id, catalog)
+    except FileExistsError:
+        raise DraftError("Pool already exists", status_code=409)
+    return {"message": f"Pool {pool_id} imported", "pool": pool_id, **summary(catalog)}
+
+@app.get("/pools/{pool_id}")
+async def get_pool(pool_id: str):
+    """Describe a player pool"""
+    catalog = await asyncio.to_thread(pools.get, pool_id)
+    if catalog is None:
+        raise DraftError("Pool not found", status_code=404)
+    return {"pool": pool_id, **summary(catalog)}
+
+@app.post("/drafts/{draft_id}/register_team")
+async def register_draft_team(draft_id: str, team: TeamRegistration, request: Request,
+                              idempotency_key: Optional[str] = Header(None)):
+    """Register a new team in a draft, creating the draft on first registration"""
+    admit_client(request)
+    return await run_command(draft_id, "register_team", team_name=team.team_name, idempotency_key=idempotency_key)
+
+@app.post("/drafts/{draft_id}/batch")
+async def run_draft_batch(draft_id: str, batch: CommandBatch, request: Request,
+                          idempotency_key: Optional[str] = Header(None)):
+    """Apply a list of commands to a draft as one transaction, creating the draft if needed"""
+    admit_client(request)
+    return await run_command(draft_id, "batch", commands=batch_commands(batch), idempotency_key=idempotency_key)
 
-def get_next_team():
-    """Returns the next team to pick."""
-    if not draft_started:
+@app.get("/drafts/{draft_id}/get_status")
+async def get_draft_status(draft_id: str, request: Request, since: Optional[int] = None,
+                           timeout: float = Query(DEFAULT_POLL_TIMEOUT, ge=0, le=MAX_POLL_TIMEOUT)):
+    """Get current status of a draft"""
+    return await status_response(draft_id, request, since, timeout)
+
+@app.post("/drafts/{draft_id}/start_draft")
+async def start_draft_room(draft_id: str, settings: Optional[DraftSettings] = None):
+    """Start a draft"""
+    settings = settings or DraftSettings()
+    return await run_command(draft_id, "start_draft", fmt=settings.format)
+
+@app.post("/drafts/{draft_id}/pick_player/{team}/{player}")
+async def pick_draft_player(draft_id: str, team: str, player: str, request: Request,
+                            idempotency_key: Optional[str] = Header(None)):
+    """Make a player pick in a draft"""
+    admit_client(request)
+    return await run_command(draft_id, "pick_player", team=team, player=player, idempotency_key=idempotency_key)
+
+@app.get("/drafts/{draft_id}/players")
+async def list_draft_players(draft_id: str, position: Optional[str] = None, q: Optional[str] = None,
+                             cursor: int = Query(0, ge=0),
+                             limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE)):
+    """List available players in a draft"""
+    return await run_command(draft_id, "players", position=position, prefix=q, cursor=cursor, limit=limit)
+
+@app.post("/drafts/{draft_id}/teams/{team}/auto")
+async def set_draft_auto_pick(draft_id: str, team: str, setting: AutoPickSetting):
+    """Let the server pick for a team in a draft"""
+    return await run_command(draft_id, "set_auto", team=team, enabled=setting.enabled)
+
+@app.put("/drafts/{draft_id}/teams/{team}/queue")
+async def set_draft_player_queue(draft_id: str, team: str, queue: PlayerQueue):
+    """Set the players a team wants auto-picked first in a draft"""
+    return await run_command(draft_id, "set_queue", team=team, players=queue.players)
+
+@app.post("/drafts/{draft_id}/autocomplete")
+async def autocomplete_draft(draft_id: str):
+    """Auto-pick every remaining pick of a draft"""
+    return await run_command(draft_id, "autocomplete")
+
+@app.post("/drafts/{draft_id}/clock/{action}")
+async def control_draft_clock(draft_id: str, action: str, settings: Optional[ClockSettings] = None):
+    """Start, pause, resume, extend or cancel a draft's pick clock"""
+    settings = settings or ClockSettings()
+    return await run_command(draft_id, "clock", action=action, seconds=settings.seconds,
+                             on_expiry=settings.on_expiry)
+
+@app.get("/drafts/{draft_id}/teams/{team}/availability")
+async def get_draft_availability(draft_id: str, team: str,
+                                 simulations: int = Query(DEFAULT_SIMULATIONS, ge=1, le=MAX_SIMULATIONS),
+                                 limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE)):
+    """Chance that each player is still available at a team's next pick in a draft"""
+    return await run_command(draft_id, "availability", team=team, simulations=simulations, limit=limit)
+
+@app.get("/drafts/{draft_id}/teams/{team}/picks")
+async def get_draft_team_picks(draft_id: str, team: str, limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE)):
+    """A team's upcoming picks in a draft"""
+    return await run_command(draft_id, "team_picks", team=team, limit=limit)
+
+@app.post("/drafts/{draft_id}/picks/{pick}/trade")
+async def trade_draft_pick(draft_id: str, pick: int, trade: PickTrade):
+    """Give a pick not yet made in a draft to another team"""
+    return await run_command(draft_id, "trade_pick", pick=pick, team=trade.team)
+
+@app.put("/drafts/{draft_id}/pool")
+async def select_draft_pool(draft_id: str, selection: PoolSelection):
+    """Draft from an imported player pool, creating the draft if needed"""
+    return await run_command(draft_id, "set_pool", pool=selection.pool)
+
+@app.websocket("/drafts/{draft_id}/ws")
+async def draft_websocket_endpoint(websocket: WebSocket, draft_id: str):
+    await draft_websocket(draft_id, websocket)
+
+async def run_command(draft_id: str, command: str, **args):
+    """Run a draft command on the worker that owns the draft.
+
+    Without a cluster every draft is local. Otherwise commands for drafts
+    owned by another worker are forwarded to it, so each draft's state is
+    only ever changed by a single process.
+    """
+    if cluster is not None and not cluster.is_local(draft_id):
+        return await cluster.call(draft_id, command, args)
+    return await execute_command(draft_id, command, args)
+
+async def execute_command(draft_id: str, command: str, args: dict):
+    """Run a draft command against a room held by this worker."""
+    handler = COMMANDS.get(command)
+    if handler is None:
+        raise DraftError(f"Unknown command: {command}")
+    return await handler(draft_id, **args)
+
+async def room_status(draft_id: str):
+    return get_room(draft_id).status()
+
+def status_etag(room: DraftRoom) -> str:
+    return f'"{INSTANCE_ID}-{room.events.seq}"'
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    # Weak comparison, as RFC 9110 asks for If-None-Match
+    return "*" in tags or etag in (tag[2:] if tag.startswith("W/") else tag for tag in tags)
+
+async def changed_room(draft_id: str, since: Optional[int], timeout: float) -> Optional[DraftRoom]:
+    """The room once its seq differs from `since` (at once without `since`); None on timeout."""
+    room = get_room(draft_id)
+    if since is not None and not await room.wait_for_change(since, timeout):
         return None
-    draft_sequence = draft_order if current_round % 2 != 0 else reverse_order
-    return draft_sequence[current_pick % len(registered_teams)]
+    return room
 
-@app.post("/pick_player/{team}/{player}")
-async def pick_player(team: str, player: str):
-    """Make a player pick"""
-    global current_round, current_pick
-
-    if not draft_started:
-        raise HTTPException(status_code=400, detail="Draft has not started")
-    
-    if team != get_next_team():
-        raise HTTPException(status_code=400, detail="Not your turn!")
-
-    if player not in players:
-        raise HTTPException(status_code=400, detail="Player not available!")
-
-    # Assign player to team
-    draft_results[team].append(player)
-    players.remove(player)
-
-    # Move to next pick
-    current_pick += 1
-    if current_pick % len(registered_teams) == 0:
-        current_round += 1
-
-    # Notify all clients about the new pick
-    await notify_clients()
-
-    return {"message": f"{team} picked {player}", "next_team": get_next_team()}
-
-async def notify_clients():
-    """Sends draft updates to all connected clients."""
-    for ws in ws_connections:
-        await ws.send_json({
-            "round": current_round,
-            "pick": current_pick,
-            "next_team": get_next_team(),
-            "remaining_players": players,
-            "draft_results": draft_results,
-            "registered_teams": list(registered_teams),
-            "draft_started": draft_started,
-            "can_start_draft": len(registered_teams) == MAX_TEAMS and not draft_started
-        })
+async def poll_room_status(draft_id: str, since: Optional[int], timeout: float):
+    """`[etag, status]` for another worker's long-poll, or None if nothing changed."""
+    room = await changed_room(draft_id, since, timeout)
+    return None if room is None else [status_etag(room), room.status()]
+
+async def status_response(draft_id: str, request: Request, since: Optional[int], timeout: float) -> Response:
+    """The draft status with its ETag, or 304 when the client's copy is current.
+
+    Each version's body is encoded once and served to every poller. With
+    `since`, the request is held until the draft moves past that seq or
+    `timeout` passes, in which case the answer is 304.
+    """
+    if cluster is not None and not cluster.is_local(draft_id):
+        result = await cluster.call(draft_id, "poll_status", {"since": since, "timeout": timeout},
+                                    timeout=timeout + cluster.call_timeout)
+        if result is None:
+            return Response(status_code=304)
+        etag, body = result[0], JSON_ENCODER.dumps(result[1])
+    else:
+        room = await changed_room(draft_id, since, timeout)
+        if room is None:
+            return Response(status_code=304)
+        etag, body = status_etag(room), room.status_payload().encode(JSON_ENCODER)
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    return Response(body, media_type="application/json", headers=headers)
+
+async def query_archive(query: str, days: Optional[float], **args):
+    """Run an archive query off the event loop, over the drafts of the last `days` days."""
+    since = time.time() - days * DAY if days else None
+    # Enough segments to be worth spreading over the process pool
+    executor = simulation_pool() if len(archive.segments) >= PARALLEL_SEGMENTS else None
+    result = await asyncio.to_thread(getattr(archive, query), since=since, executor=executor, **args)
+    if days:
+        result["days"] = days
+    return result
+
+async def query_players(draft_id: str, position: Optional[str], prefix: Optional[str], cursor: int, limit: int):
+    """One page of available players, filtered by position and/or name prefix."""
+    room = get_room(draft_id)
+    page, next_cursor = room.players.query(position=position, prefix=prefix, cursor=cursor, limit=limit)
+    return {
+        "players": [player.to_dict() for player in page],
+        "next_cursor": next_cursor,
+        "available": len(room.players),
+    }
+
+def admit_client(request: Request):
+    """Turn away a client sending picks and registrations faster than CLIENT_RATE."""
+    wait = client_limits.acquire(request.client.host if request.client else None)
+    if wait:
+        ADMISSION_REJECTIONS.labels("client").inc()
+        raise DraftError("Too many requests", status_code=429, retry_after=wait)
+
+async def admitted(draft_id: str, team: Optional[str], idempotency_key: Optional[str], fingerprint: tuple, run):
+    """Run a pick or registration within the team's rate and the draft's concurrency limit.
+
+    The limits are checked before the room is touched, so a rejected request
+    costs a dict lookup and never reaches a broadcast. A retry carrying the
+    idempotency key of an earlier request gets that request's result.
+    Batches act for several teams and only count against the draft's limit.
+    """
+    if idempotency_key is not None:
+        return await idempotent_results.run((draft_id, idempotency_key), fingerprint,
+                                            lambda: admitted(draft_id, team, None, fingerprint, run))
+    wait = team_limits.acquire((draft_id, team)) if team is not None else 0
+    if wait:
+        ADMISSION_REJECTIONS.labels("team").inc()
+        raise DraftError("Too many requests for this team", status_code=429, retry_after=wait)
+    if not room_limits.acquire(draft_id):
+        ADMISSION_REJECTIONS.labels("draft").inc()
+        raise DraftError("Draft is busy, try again", status_code=503, retry_after=1)
+    try:
+        return await run()
+    finally:
+        room_limits.release(draft_id)
+
+async def register_room_team(draft_id: str, team_name: str, idempotency_key: Optional[str] = None):
+    async def register():
+        room = registry.get_or_create(draft_id)
+        await commit_event(room, room.register_team(team_name))
+        return {"message": f"Team {team_name} registered successfully"}
+
+    return await admitted(draft_id, team_name, idempotency_key, ("register_team", team_name), register)
+
+async def start_room_draft(draft_id: str, fmt: str = SNAKE):
+    room = get_room(draft_id)
+    event = room.start_draft(fmt=fmt)
+    await commit_event(room, event)
+    await run_auto_picks(room)
+    return {"message": "Draft started", "order": event.message["order"], "format": fmt}
+
+async def pick_room_player(draft_id: str, team: str, player: str, idempotency_key: Optional[str] = None):
+    async def pick():
+        room = get_room(draft_id)
+        try:
+            event = room.pick_player(team, player)
+        except DraftError as exc:
+            PICK_REJECTIONS.labels(exc.detail).inc()
+            raise
+        await commit_event(room, event)
+        await after_pick(room)
+        return {"message": f"{team} picked {player}", "next_team": room.get_next_team()}
+
+    return await admitted(draft_id, team, idempotency_key, ("pick_player", team, player), pick)
+
+def batch_commands(batch: CommandBatch) -> List[dict]:
+    return [command.model_dump(exclude_none=True) for command in batch.commands]
+
+async def run_room_batch(draft_id: str, commands: List[dict], idempotency_key: Optional[str] = None):
+    """Apply commands to a draft all together or not at all, then send its clients one snapshot."""
+    async def run():
+        room = registry.get_or_create(draft_id)
+        events = room.run_batch(commands)
+        await commit_events(room, events)
+        await after_pick(room)
+        return {"message": f"Applied {len(commands)} commands", "events": len(events),
+                "seq": room.events.seq, "next_team": room.get_next_team()}
+
+    fingerprint = ("batch", json.dumps(commands, sort_keys=True))
+    return await admitted(draft_id, None, idempotency_key, fingerprint, run)
+
+async def trade_room_pick(draft_id: str, pick: int, team: str):
+    """Trade overall pick `pick`, counted from 1 as users number them."""
+    room = get_room(draft_id)
+    event = room.trade_pick(pick - 1, team)
+    await commit_event(room, event)
+    if pick - 1 == room.current_pick:
+        # The team now on the clock may auto-pick, and gets a fresh clock.
+        await after_pick(room)
+    return {"message": f"Pick {pick} traded to {team}", "next_team": room.get_next_team()}
+
+async def list_team_picks(draft_id: str, team: str, limit: int):
+    room = get_room(draft_id)
+    if team not in room.registered_teams:
+        raise DraftError("Team not registered", status_code=404)
+    if not room.draft_started:
+        raise DraftError("Draft has not started")
+    return {
+        "team": team,
+        "format": room.schedule.format,
+        "picks": [{"pick": pick + 1, "round": room.schedule.round_of(pick)} for pick in room.next_picks(team, limit)],
+    }
+
+async def set_room_pool(draft_id: str, pool: str):
+    catalog = await asyncio.to_thread(pools.get, pool)
+    if catalog is None:
+        raise DraftError("Pool not found", status_code=404)
+    room = registry.get_or_create(draft_id)
+    await commit_event(room, room.set_pool(pool, catalog))
+    return {"message": f"Drafting from pool {pool}", "pool": pool, "players": len(catalog)}
+
+async def set_room_auto_pick(draft_id: str, team: str, enabled: bool):
+    room = get_room(draft_id)
+    await commit_event(room, room.set_auto(team, enabled))
+    if room.auto_on_clock:
+        await after_pick(room)
+    return {"message": f"Auto-pick {'enabled' if enabled else 'disabled'} for {team}"}
+
+async def set_room_queue(draft_id: str, team: str, players: List[str]):
+    # Queues are private to their team, so they are not broadcast.
+    get_room(draft_id).set_queue(team, players)
+    return {"message": f"Queue set for {team}", "players": players}
+
+async def autocomplete_room(draft_id: str):
+    room = get_room(draft_id)
+    if not room.in_progress:
+        raise DraftError("Draft is not in progress")
+    events = room.autocomplete()
+    for event in events:
+        await commit_event(room, event)
+    await after_pick(room)
+    return {"message": "Draft completed", "picks": len(events)}
+
+async def control_room_clock(draft_id: str, action: str, seconds: Optional[float] = None, on_expiry: str = AUTO):
+    room = get_room(draft_id)
+    if room.clock.state == RUNNING:
+        remaining = clocks.remaining(draft_id) or 0.0
+    else:
+        remaining = room.clock.remaining
+    if action == "start":
+        event = room.start_clock(seconds or 0.0, on_expiry)
+    elif action == "pause":
+        event = room.pause_clock(remaining)
+    elif action == "resume":
+        event = room.resume_clock()
+    elif action == "extend":
+        event = room.extend_clock(seconds or 0.0, remaining)
+    elif action == "cancel":
+        event = room.cancel_clock()
+    else:
+        raise DraftError(f"Unknown clock action: {action}", status_code=404)
+    await commit_event(room, event)
+    return {"message": f"Pick clock {room.clock.state}", "clock": room.clock.to_dict()}
+
+async def simulate_availability(draft_id: str, team: str, simulations: int, limit: int):
+    """Mock-draft the picks before `team`'s next one and report each player's chance of lasting."""
+    room = get_room(draft_id)
+    if team not in room.registered_teams:
+        raise DraftError("Team not registered", status_code=404)
+    if not room.draft_started:
+        raise DraftError("Draft has not started")
+    picks = room.picks_until(team)
+    if picks is None:
+        raise DraftError(f"{team} has no picks left")
+    # The best available players, in ranking order
+    players, _ = room.players.query(limit=max(candidates(picks), limit))
+    ranks = [player.rank for player in players[:candidates(picks)]]
+    odds = await simulation_results.get(
+        (draft_id, room.events.seq, team, simulations),
+        lambda: availability(ranks, picks, simulations, simulation_pool()),
+    )
+    return {
+        "team": team,
+        "seq": room.events.seq,
+        "pick": room.current_pick + picks + 1,
+        "picks_before": picks,
+        "simulations": simulations,
+        "players": [
+            dict(player.to_dict(), available=round(odds[i], 4) if i < len(odds) else 1.0)
+            for i, player in enumerate(players[:limit])
+        ],
+    }
+
+async def commit_event(room: DraftRoom, event: Payload):
+    """Persist an event and send it to the room's clients."""
+    await commit_events(room, [event], event)
+
+async def commit_events(room: DraftRoom, events: List[Payload], message: Optional[Payload] = None):
+    """Persist events together, then send the room's clients one message for all of them.
+
+    Without `message`, that is a snapshot of the room, so a batch costs a
+    single fan-out however many events it holds.
+    """
+    record_events(room, events)
+    await notify_clients(room, message or room.snapshot_payload())
+    finished = False
+    for event in events:
+        event_type = event.message["type"]
+        if event_type == "pick":
+            PICKS.inc()
+        if event_type in ("pick", "skip") and event.message["next_team"] is None:
+            # The last pick of the draft
+            finished = True
+    if any(event.message["type"] == "clock" for event in events):
+        sync_clock(room)
+    if finished:
+        await archive_draft(room)
+
+async def archive_draft(room: DraftRoom):
+    """Add a draft that just finished to the archive; a failure here must not fail the pick."""
+    try:
+        await asyncio.to_thread(archive.add, draft_record(room))
+    except Exception:
+        logger.exception("Could not archive draft %s", room.draft_id)
+
+async def run_auto_picks(room: DraftRoom):
+    """Pick for each team set to auto-pick as it comes on the clock."""
+    while room.auto_on_clock:
+        await commit_event(room, room.auto_pick())
+
+async def after_pick(room: DraftRoom):
+    """Let auto-pick teams pick, then restart the pick clock for the team on it."""
+    await run_auto_picks(room)
+    event = room.next_clock()
+    if event is not None:
+        await commit_event(room, event)
+
+def sync_clock(room: DraftRoom):
+    """Schedule or cancel a room's timer to match its pick clock."""
+    if room.clock.state == RUNNING:
+        clocks.schedule(room.draft_id, room.clock.remaining, lambda: expire_clock_soon(room.draft_id))
+    else:
+        clocks.cancel(room.draft_id)
+
+def expire_clock_soon(draft_id: str):
+    # Timer callbacks must not block the wheel, so the pick runs in its own task.
+    task = asyncio.ensure_future(expire_clock(draft_id))
+    _clock_tasks.add(task)
+    task.add_done_callback(_clock_tasks.discard)
+
+async def expire_clock(draft_id: str):
+    """The team on a draft's clock ran out of time: auto-pick or skip it."""
+    room = registry.get(draft_id)
+    # The clock may have been reset or stopped since the timer fired.
+    if room is None or room.clock.state != RUNNING or draft_id in clocks:
+        return
+    try:
+        await commit_event(room, room.expire_clock())
+    except DraftError as exc:
+        logger.warning("Pick clock expiry in draft %s failed: %s", draft_id, exc.detail)
+        await commit_event(room, room.cancel_clock())
+        return
+    await after_pick(room)
+
+async def room_catch_up(draft_id: str, last_seq: Optional[int]):
+    """Catch-up messages for a client of this draft connected to another worker."""
+    return [payload.message for payload in get_room(draft_id).catch_up(last_seq)]
+
+# Commands a worker runs for its own drafts, by the name used to forward them
+COMMANDS = {
+    "register_team": register_room_team,
+    "start_draft": start_room_draft,
+    "pick_player": pick_room_player,
+    "set_pool": set_room_pool,
+    "set_auto": set_room_auto_pick,
+    "set_queue": set_room_queue,
+    "autocomplete": autocomplete_room,
+    "clock": control_room_clock,
+    "availability": simulate_availability,
+    "trade_pick": trade_room_pick,
+    "batch": run_room_batch,
+    "team_picks": list_team_picks,
+    "get_status": room_status,
+    "poll_status": poll_room_status,
+    "players": query_players,
+    "catch_up": room_catch_up,
+}
+
+def parse_last_seq(websocket: WebSocket) -> Optional[int]:
+    """The `last_seq` query parameter a reconnecting client sends, if valid."""
+    try:
+        return int(websocket.query_params["last_seq"])
+    except (KeyError, ValueError):
+        return None
+
+async def draft_websocket(draft_id: str, websocket: WebSocket):
+    if cluster is not None and not cluster.is_local(draft_id):
+        await remote_websocket(draft_id, websocket)
+        return
+    try:
+        room = get_room(draft_id)
+    except DraftError:
+        # Unknown draft: refuse the handshake rather than creating a room for it
+        await websocket.close(code=1008)
+        return
+    await room_websocket(room, websocket)
+
+async def room_websocket(room: DraftRoom, websocket: WebSocket):
+    """Stream a room's events to a client.
+
+    A new client gets a snapshot; a client reconnecting with `?last_seq=N`
+    gets only the events after N while they are still buffered. Sending
+    `{"type": "snapshot"}` asks for a fresh snapshot at any time. Clients may
+    offer the `msgpack` subprotocol for binary frames; JSON is the default.
+    A client that has sent nothing for a while gets `{"type": "ping"}` and
+    must answer with any message, e.g. `{"type": "pong"}`, or be dropped.
+    """
+    subprotocol, encoder = negotiate(websocket.scope.get("subprotocols", []), JSON_ENCODER)
+    await websocket.accept(subprotocol=subprotocol)
+    room.broadcaster.subscribe(websocket, encoder)
+    # Queued before any later event, so the client sees no gap or duplicate.
+    for message in room.catch_up(parse_last_seq(websocket)):
+        room.broadcaster.send(websocket, message)
+    try:
+        while True:
+            text = await websocket.receive_text()
+            room.broadcaster.seen(websocket)
+            if is_snapshot_request(text):
+                room.broadcaster.send(websocket, room.snapshot_payload())
+    except Exception:
+        pass  # Client disconnected or was evicted by the broadcaster
+    finally:
+        room.broadcaster.unsubscribe(websocket)
+
+async def remote_websocket(draft_id: str, websocket: WebSocket):
+    """Stream a draft owned by another worker, with the same protocol as `room_websocket`.
+
+    The owner publishes its events to every worker. While the catch-up is
+    fetched from the owner, events that arrive are buffered; those the
+    catch-up already covers are dropped so the client sees each event once.
+    """
+    feed = remote_feeds.setdefault(draft_id, RemoteFeed())
+    feed.pending[websocket] = []
+    last_seq = parse_last_seq(websocket)
+    try:
+        try:
+            messages = await cluster.call(draft_id, "catch_up", {"last_seq": last_seq})
+        except DraftError:
+            await websocket.close(code=1008)
+            return
+        subprotocol, encoder = negotiate(websocket.scope.get("subprotocols", []), JSON_ENCODER)
+        await websocket.accept(subprotocol=subprotocol)
+        feed.broadcaster.subscribe(websocket, encoder)
+        seq = messages[-1]["seq"] if messages else last_seq
+        for message in messages:
+            feed.broadcaster.send(websocket, message)
+        for event in feed.pending.pop(websocket):
+            if event["seq"] > seq:
+                feed.broadcaster.send(websocket, event)
+        await answer_remote_client(draft_id, feed, websocket)
+    except Exception:
+        pass  # Client disconnected or was evicted by the broadcaster
+    finally:
+        feed.pending.pop(websocket, None)
+        feed.broadcaster.unsubscribe(websocket)
+        if not feed and remote_feeds.get(draft_id) is feed:
+            del remote_feeds[draft_id]
+
+async def answer_remote_client(draft_id: str, feed: RemoteFeed, websocket: WebSocket):
+    """Read a remote client's messages until it goes; snapshots it asks for come from the owner."""
+    while True:
+        text = await websocket.receive_text()
+        feed.broadcaster.seen(websocket)
+        if is_snapshot_request(text):
+            for message in await cluster.call(draft_id, "catch_up", {"last_seq": None}):
+                feed.broadcaster.send(websocket, message)
+
+def deliver_remote_event(draft_id: str, event: dict):
+    """Pass an event published by the draft's owner to this worker's clients."""
+    feed = remote_feeds.get(draft_id)
+    if feed is not None:
+        feed.deliver(event)
+
+def check_heartbeats(now: Optional[float] = None) -> int:
+    """Ping quiet WebSocket clients of this worker and drop the ones that stopped answering."""
+    broadcasters = [room.broadcaster for room in registry.rooms.values()]
+    broadcasters += [feed.broadcaster for feed in remote_feeds.values()]
+    return sum(broadcaster.heartbeat(PING, WS_PING_INTERVAL, WS_PING_INTERVAL + WS_PING_TIMEOUT, now)
+               for broadcaster in broadcasters)
+
+async def run_heartbeats():
+    # Checking twice per interval keeps a client's ping within half an interval of being due.
+    while True:
+        await asyncio.sleep(WS_PING_INTERVAL / 2)
+        dropped = check_heartbeats()
+        if dropped:
+            logger.info("Dropped %d WebSocket clients that stopped answering pings", dropped)
+
+def is_snapshot_request(text: str) -> bool:
+    try:
+        message = json.loads(text)
+    except ValueError:
+        return False
+    return isinstance(message, dict) and message.get("type") == "snapshot"
+
+async def notify_clients(room: DraftRoom, event: Payload):
+    """Queues a draft event for every client connected to a room.
+
+    Sending happens in each client's writer task, so a slow socket never
+    delays the request that changed the draft, and the event is encoded
+    once per wire format rather than once per client. In a cluster the
+    event also goes to the other workers for their clients of this draft.
+    """
+    started = time.perf_counter()
+    room.changed()
+    room.broadcaster.publish(event)
+    if cluster is not None:
+        cluster.publish(room.draft_id, event.message)
+    BROADCAST_SECONDS.observe(time.perf_counter() - started)
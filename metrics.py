@@ -0,0 +1,231 @@
+import math
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+# Request latencies, in seconds
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if value == -math.inf:
+        return "-Inf"
+    if isinstance(value, int) or value.is_integer():
+        return str(int(value))
+    return repr(value)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)) + "}"
+
+
+class CounterValue:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0
+
+    def inc(self, amount: float = 1):
+        self.value += amount
+
+
+class GaugeValue(CounterValue):
+    __slots__ = ()
+
+    def set(self, value: float):
+        self.value = value
+
+    def dec(self, amount: float = 1):
+        self.value -= amount
+
+
+class HistogramValue:
+    __slots__ = ("bounds", "counts", "sum")
+
+    def __init__(self, bounds: Tuple[float, ...]):
+        self.bounds = bounds
+        # One count per bucket plus one for values above the last bound; cumulated when rendered
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+
+
+class Metric:
+    """A metric family: one value per combination of label values.
+
+    Updating a value is an attribute increment, cheap enough for the hot
+    path; everything else happens when the metrics are scraped.
+    """
+
+    kind = "untyped"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (), registry: Optional["Registry"] = None):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.values: Dict[Tuple[str, ...], object] = {}
+        # Unlabelled metrics have a single value, reported as 0 until first updated
+        self._default = None if self.labelnames else self.labels()
+        if registry is None:
+            registry = REGISTRY
+        registry.register(self)
+
+    def labels(self, *values: str):
+        """The value for one combination of label values."""
+        value = self.values.get(values)
+        if value is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f"{self.name} takes labels {self.labelnames}")
+            value = self.values[values] = self._new_value()
+        return value
+
+    def _new_value(self):
+        raise NotImplementedError
+
+    def samples(self) -> Iterator[Tuple[str, str, float]]:
+        """(name suffix, rendered labels, value) for every sample."""
+        for labels, value in self.values.items():
+            yield "", _labels(self.labelnames, labels), value.value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(f"{self.name}{suffix}{labels} {_format_value(value)}" for suffix, labels, value in self.samples())
+        return lines
+
+
+class Counter(Metric):
+    """A count that only goes up."""
+
+    kind = "counter"
+
+    def _new_value(self):
+        return CounterValue()
+
+    def inc(self, amount: float = 1):
+        self._default.inc(amount)
+
+
+class Gauge(Metric):
+    """A value that goes up and down, or one read from `function` at scrape time."""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (), registry: Optional["Registry"] = None,
+                 function: Optional[Callable[[], float]] = None):
+        super().__init__(name, help, labelnames, registry)
+        self.function = function
+
+    def _new_value(self):
+        return GaugeValue()
+
+    def set(self, value: float):
+        self._default.set(value)
+
+    def samples(self):
+        if self.function is not None:
+            yield "", "", self.function()
+        else:
+            yield from super().samples()
+
+
+class Histogram(Metric):
+    """Counts of observed values by bucket, plus their sum."""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (), registry: Optional["Registry"] = None,
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, help, labelnames, registry)
+
+    def _new_value(self):
+        return HistogramValue(self.buckets)
+
+    def observe(self, value: float):
+        self._default.observe(value)
+
+    def samples(self):
+        for labels, value in self.values.items():
+            total = 0
+            for bound, count in zip(self.buckets + (math.inf,), value.counts):
+                total += count
+                yield "_bucket", _labels(self.labelnames + ("le",), labels + (_format_value(bound),)), total
+            rendered = _labels(self.labelnames, labels)
+            yield "_sum", rendered, value.sum
+            yield "_count", rendered, total
+
+
+class Registry:
+    """Every metric of the process, rendered in the Prometheus text format."""
+
+    def __init__(self):
+        self.metrics: Dict[str, Metric] = {}
+
+    def register(self, metric: Metric):
+        if metric.name in self.metrics:
+            raise ValueError(f"Metric already registered: {metric.name}")
+        self.metrics[metric.name] = metric
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self.metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+REQUEST_SECONDS = Histogram("draft_request_duration_seconds", "HTTP request latency by route.", ("method", "route"))
+REQUESTS = Counter("draft_requests_total", "HTTP requests by route and status.", ("method", "route", "status"))
+
+
+class MetricsMiddleware:
+    """ASGI middleware timing every HTTP request by its route template.
+
+    Routes are labelled by template (`/drafts/{draft_id}/get_status`), not the
+    raw path, so the number of series stays bounded however many drafts exist.
+    """
+
+    def __init__(self, app, latency: Histogram = REQUEST_SECONDS, requests: Counter = REQUESTS):
+        self.app = app
+        self.latency = latency
+        self.requests = requests
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        status = 500
+        started = time.perf_counter()
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            # The router stores the matched route in the scope; a mounted app
+            # only leaves its mount point.
+            route = scope.get("route")
+            if route is not None:
+                path = route.path
+            else:
+                path = scope.get("root_path") if "endpoint" in scope else None
+            path = path or "unmatched"
+            method = scope["method"]
+            self.latency.labels(method, path).observe(time.perf_counter() - started)
+            self.requests.labels(method, path, str(status)).inc()
@@ -0,0 +1,148 @@
+import asyncio
+import logging
+import math
+import time
+from typing import Callable, Dict, Hashable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# What happens when a team's pick clock runs out
+AUTO = "auto"
+SKIP = "skip"
+
+RUNNING = "running"
+PAUSED = "paused"
+STOPPED = "stopped"
+
+
+class PickClock:
+    """A draft's pick clock: how long each pick gets and where the current one stands."""
+
+    __slots__ = ("seconds", "on_expiry", "state", "remaining", "ends_at")
+
+    def __init__(self):
+        self.seconds = 0.0
+        self.on_expiry = AUTO
+        self.state = STOPPED
+        # Seconds left when the clock last changed, and the wall-clock time it runs out while running
+        self.remaining = 0.0
+        self.ends_at: Optional[float] = None
+
+    def set(self, state: str, remaining: float):
+        self.state = state
+        self.remaining = remaining
+        self.ends_at = time.time() + remaining if state == RUNNING else None
+
+    def to_dict(self) -> dict:
+        return {"state": self.state, "remaining": self.remaining, "ends_at": self.ends_at,
+                "seconds": self.seconds, "on_expiry": self.on_expiry}
+
+
+class Timer:
+    __slots__ = ("deadline", "tick", "callback")
+
+    def __init__(self, deadline: float, tick: int, callback: Callable[[], None]):
+        self.deadline = deadline
+        self.tick = tick
+        self.callback = callback
+
+
+class TimingWheel:
+    """Timers for any number of keys, driven by a single task.
+
+    A hashed timing wheel: time is cut into ticks of `tick` seconds and each
+    timer is filed in the slot of the tick it expires on, so scheduling and
+    cancelling are O(1) and each tick only looks at one slot, however many
+    timers are active. Timers more than one turn of the wheel away stay in
+    their slot until the turn they are due. Callbacks run on the event loop
+    and must not block.
+    """
+
+    def __init__(self, tick: float = 0.1, size: int = 1024, clock: Callable[[], float] = time.monotonic):
+        self.tick = tick
+        self.size = size
+        self.clock = clock
+        self.slots: List[Dict[Hashable, Timer]] = [{} for _ in range(size)]
+        self.timers: Dict[Hashable, Timer] = {}
+        # Last tick whose slot has been processed
+        self.current = self._tick_of(clock())
+        self._wakeup: Optional[asyncio.Event] = None
+        self._running = False
+
+    def __len__(self) -> int:
+        return len(self.timers)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self.timers
+
+    def _tick_of(self, when: float) -> int:
+        # The epsilon keeps a wake-up right on a tick boundary from rounding down to the tick before.
+        return math.floor(when / self.tick + 1e-9)
+
+    def schedule(self, key: Hashable, delay: float, callback: Callable[[], None]):
+        """Call `callback` in `delay` seconds, replacing any timer `key` already has."""
+        self.cancel(key)
+        now = self.clock()
+        if not self.timers:
+            # Nothing was due while the wheel was empty
+            self.current = self._tick_of(now)
+        deadline = now + delay
+        tick = max(math.ceil(deadline / self.tick), self.current + 1)
+        timer = self.timers[key] = Timer(deadline, tick, callback)
+        self.slots[tick % self.size][key] = timer
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    def cancel(self, key: Hashable) -> Optional[float]:
+        """Drop a key's timer; returns the seconds it had left, or None if there was none."""
+        timer = self.timers.pop(key, None)
+        if timer is None:
+            return None
+        del self.slots[timer.tick % self.size][key]
+        return max(timer.deadline - self.clock(), 0.0)
+
+    def clear(self):
+        for slot in self.slots:
+            slot.clear()
+        self.timers.clear()
+
+    def remaining(self, key: Hashable) -> Optional[float]:
+        timer = self.timers.get(key)
+        return None if timer is None else max(timer.deadline - self.clock(), 0.0)
+
+    def advance(self, now: Optional[float] = None) -> int:
+        """Fire every timer due by `now`; returns how many fired."""
+        now_tick = self._tick_of(self.clock() if now is None else now)
+        due = []
+        # At most one full turn, even after a long pause
+        for tick in range(self.current + 1, min(now_tick, self.current + self.size) + 1):
+            slot = self.slots[tick % self.size]
+            for key, timer in list(slot.items()):
+                if timer.tick <= now_tick:
+                    del slot[key]
+                    del self.timers[key]
+                    due.append(timer)
+        self.current = max(self.current, now_tick)
+        for timer in due:
+            try:
+                timer.callback()
+            except Exception:
+                logger.exception("Timer callback failed")
+        return len(due)
+
+    async def run(self):
+        """Advance the wheel once per tick while it has timers, until `stop()`."""
+        self._wakeup = asyncio.Event()
+        self._running = True
+        while self._running:
+            if not self.timers:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+            await asyncio.sleep(max((self.current + 1) * self.tick - self.clock(), 0.0))
+            self.advance()
+
+    def stop(self):
+        self._running = False
+        if self._wakeup is not None:
+            self._wakeup.set()
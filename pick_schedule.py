@@ -0,0 +1,89 @@
+from typing import Dict, Iterable, List, Optional, Sequence
+
+SNAKE = "snake"
+LINEAR = "linear"
+# Snake, except that round 3 runs in the same direction as round 2
+THIRD_ROUND_REVERSAL = "third_round_reversal"
+FORMATS = (SNAKE, LINEAR, THIRD_ROUND_REVERSAL)
+
+
+def reversed_round(fmt: str, round_index: int) -> bool:
+    """Whether round `round_index` (counted from 0) runs in reverse draft order."""
+    if fmt == LINEAR:
+        return False
+    if fmt == THIRD_ROUND_REVERSAL and round_index >= 2:
+        return round_index % 2 == 0
+    return round_index % 2 == 1
+
+
+class PickSchedule:
+    """Every pick of a draft in order, with the team that owns it.
+
+    Built once when the draft starts. The owner of a pick is a list lookup,
+    and a per-team index maps any pick to that team's next one, so "who is
+    on the clock" and "when do I pick next" are O(1) however far into the
+    draft. Traded picks only re-index the two teams involved.
+    """
+
+    __slots__ = ("order", "rounds", "format", "owners", "trades", "_picks", "_next")
+
+    def __init__(self, order: Sequence[str], rounds: int, fmt: str = SNAKE, trades: Optional[Dict[int, str]] = None):
+        if fmt not in FORMATS:
+            raise ValueError(f"Unknown draft format: {fmt}")
+        self.order = list(order)
+        self.rounds = rounds
+        self.format = fmt
+        reverse = self.order[::-1]
+        self.owners: List[str] = []
+        for round_index in range(rounds):
+            self.owners.extend(reverse if reversed_round(fmt, round_index) else self.order)
+        # Picks whose owner differs from the format's, by overall pick (from 0)
+        self.trades: Dict[int, str] = {}
+        for pick, team in (trades or {}).items():
+            self.owners[pick] = self.trades[pick] = team
+        # Each team's picks in order, and for every pick the offset of the team's next one in that list
+        self._picks: Dict[str, List[int]] = {}
+        self._next: Dict[str, List[int]] = {}
+        self._index(self.order)
+
+    def __len__(self) -> int:
+        return len(self.owners)
+
+    def _index(self, teams: Iterable[str]):
+        for team in teams:
+            picks = [pick for pick, owner in enumerate(self.owners) if owner == team]
+            following = [0] * (len(self.owners) + 1)
+            offset = len(picks)
+            for pick in range(len(self.owners), -1, -1):
+                while offset > 0 and picks[offset - 1] >= pick:
+                    offset -= 1
+                following[pick] = offset
+            self._picks[team] = picks
+            self._next[team] = following
+
+    def owner(self, pick: int) -> Optional[str]:
+        """The team making overall pick `pick` (from 0), or None past the last pick."""
+        return self.owners[pick] if 0 <= pick < len(self.owners) else None
+
+    def round_of(self, pick: int) -> int:
+        """The round (from 1) of overall pick `pick`."""
+        return pick // len(self.order) + 1
+
+    def next_picks(self, team: str, start: int, count: int = 1) -> List[int]:
+        """The first `count` picks `team` owns from overall pick `start` on."""
+        following = self._next.get(team)
+        if following is None:
+            return []
+        offset = following[min(max(start, 0), len(self.owners))]
+        return self._picks[team][offset:offset + count]
+
+    def picks_until(self, team: str, start: int) -> Optional[int]:
+        """How many picks come before `team`'s next one from `start`, or None if it has none left."""
+        upcoming = self.next_picks(team, start)
+        return upcoming[0] - start if upcoming else None
+
+    def trade(self, pick: int, team: str):
+        """Give overall pick `pick` to `team`."""
+        previous = self.owners[pick]
+        self.owners[pick] = self.trades[pick] = team
+        self._index({previous, team})
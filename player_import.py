@@ -0,0 +1,306 @@
+"""Streaming import of player pools from CSV or JSON Lines.
+
+Files are read one row at a time and validated in batches, so an import
+only holds the players it keeps, never the raw file. Columns are `name`
+(required), `position`, `team`, `rank` and `projection`; any other columns
+are kept as player info. Validate a file, or upload it to a server:
+
+    python player_import.py players.csv
+    python player_import.py players.jsonl --server http://localhost:8000 --pool nfl-2026
+"""
+import argparse
+import csv
+import io
+import json
+import math
+import os
+import re
+import sys
+import tempfile
+from typing import IO, Dict, Iterator, List, Optional, Tuple
+
+from player_pool import DEFAULT_CATALOG, DEFAULT_POOL_ID, PlayerCatalog
+
+CSV = "csv"
+JSONL = "jsonl"
+FORMATS = (CSV, JSONL)
+CONTENT_TYPES = {"text/csv": CSV, "application/jsonl": JSONL, "application/x-ndjson": JSONL,
+                 "application/x-jsonlines": JSONL}
+
+# Rows validated together
+BATCH_SIZE = 1000
+MAX_PLAYERS = 100000
+# Problems reported before an import gives up
+MAX_ERRORS = 20
+
+COLUMNS = ("name", "position", "team", "rank", "projection")
+POOL_ID = re.compile(r"[A-Za-z0-9][A-Za-z0-9_.-]{0,63}")
+
+
+class InvalidPlayerData(ValueError):
+    """An import was rejected; `errors` says what was wrong, by line."""
+
+    def __init__(self, errors: List[str]):
+        super().__init__("; ".join(errors))
+        self.errors = errors
+
+
+def guess_format(name: Optional[str]) -> Optional[str]:
+    """The format for a file name or content type, or None if it is neither."""
+    if not name:
+        return None
+    name = name.split(";")[0].strip().lower()
+    if name in CONTENT_TYPES:
+        return CONTENT_TYPES[name]
+    extension = os.path.splitext(name)[1]
+    if extension == ".csv":
+        return CSV
+    if extension in (".jsonl", ".ndjson"):
+        return JSONL
+    return None
+
+
+def read_rows(stream: IO[str], fmt: str) -> Iterator[Tuple[int, object]]:
+    """(line number, row) pairs; a row that cannot be parsed is passed on as None."""
+    if fmt == CSV:
+        reader = csv.DictReader(stream, restkey="")
+        if reader.fieldnames:
+            reader.fieldnames = [field.strip().lower() for field in reader.fieldnames]
+        for row in reader:
+            yield reader.line_num, row
+    else:
+        for line_num, line in enumerate(stream, 1):
+            if line.strip():
+                try:
+                    yield line_num, json.loads(line)
+                except ValueError:
+                    yield line_num, None
+
+
+def _text(value) -> str:
+    return "" if value is None else str(value).strip()
+
+
+def _rank(value) -> Optional[int]:
+    rank = _text(value)
+    if not rank:
+        return None
+    if not rank.isdigit() or int(rank) < 1:
+        raise ValueError("rank must be a positive integer")
+    return int(rank)
+
+
+def _projection(value) -> Optional[float]:
+    projection = _text(value)
+    if not projection:
+        return None
+    try:
+        number = float(projection)
+    except ValueError:
+        number = math.nan
+    if not math.isfinite(number):
+        raise ValueError("projection must be a number")
+    return number
+
+
+def _parse_row(row: object, seen: Dict[str, int]) -> tuple:
+    """The catalog row for one parsed row; raises ValueError saying what is wrong with it."""
+    if not isinstance(row, dict):
+        raise ValueError("invalid JSON" if row is None else "expected a JSON object")
+    if row.get(""):
+        raise ValueError("more fields than columns")
+    name = _text(row.get("name"))
+    if not name:
+        raise ValueError("name is required")
+    if name in seen:
+        raise ValueError(f"duplicate player {name!r} (first on line {seen[name]})")
+    rank = _rank(row.get("rank"))
+    projection = _projection(row.get("projection"))
+    info = {key: value for key, value in row.items() if key and key not in COLUMNS and value not in (None, "")}
+    # Positions and teams repeat on every row; interning stores each once.
+    return (name, sys.intern(_text(row.get("position")).upper()), sys.intern(_text(row.get("team"))),
+            rank, projection, info or None)
+
+
+def validate_batch(batch: List[Tuple[int, object]], seen: Dict[str, int], errors: List[str]) -> List[tuple]:
+    """Catalog rows for the valid rows of `batch`; problems are added to `errors`.
+
+    `seen` maps every name accepted so far to its line, to catch duplicates.
+    """
+    rows = []
+    for line, row in batch:
+        try:
+            parsed = _parse_row(row, seen)
+        except ValueError as exc:
+            errors.append(f"line {line}: {exc}")
+            continue
+        seen[parsed[0]] = line
+        rows.append(parsed)
+    return rows
+
+
+def _batches(items: Iterator[Tuple[int, object]], max_players: int,
+             errors: List[str]) -> Iterator[List[Tuple[int, object]]]:
+    """`items` in lists of BATCH_SIZE; stops, adding to `errors`, after `max_players`."""
+    batch: List[Tuple[int, object]] = []
+    for count, item in enumerate(items, 1):
+        if count > max_players:
+            errors.append(f"more than {max_players} players")
+            return
+        batch.append(item)
+        if len(batch) == BATCH_SIZE:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def load_catalog(stream: IO[str], fmt: str, max_players: int = MAX_PLAYERS) -> PlayerCatalog:
+    """Build a catalog from CSV or JSON Lines text, in one pass over the rows.
+
+    Raises `InvalidPlayerData` listing the problems (up to MAX_ERRORS) if any
+    row is invalid; nothing is imported in that case.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown format: {fmt}")
+    errors: List[str] = []
+    seen: Dict[str, int] = {}
+
+    def rows() -> Iterator[tuple]:
+        try:
+            for batch in _batches(read_rows(stream, fmt), max_players, errors):
+                valid = validate_batch(batch, seen, errors)
+                if len(errors) >= MAX_ERRORS:
+                    break
+                if not errors:
+                    yield from valid
+        except (csv.Error, UnicodeDecodeError) as exc:
+            errors.append(f"unreadable input: {exc}")
+        if not errors and not seen:
+            errors.append("no players")
+        if errors:
+            raise InvalidPlayerData(errors[:MAX_ERRORS])
+
+    return PlayerCatalog(rows())
+
+
+def read_catalog(file: IO[bytes], fmt: str, max_players: int = MAX_PLAYERS) -> PlayerCatalog:
+    """`load_catalog()` for a binary file of UTF-8 text."""
+    # newline="" lets the csv module handle line breaks inside quoted fields.
+    text = io.TextIOWrapper(file, encoding="utf-8-sig", newline="")
+    try:
+        return load_catalog(text, fmt, max_players)
+    finally:
+        text.detach()
+
+
+def write_catalog(catalog: PlayerCatalog, stream: IO[str]):
+    """Write a catalog as JSON Lines that `load_catalog()` reads back unchanged."""
+    for player in catalog.players:
+        row = {"name": player.name, "position": player.position, "team": player.team, "rank": player.rank}
+        if player.projection is not None:
+            row["projection"] = player.projection
+        if player.info:
+            row.update({key: value for key, value in player.info.items() if key not in row})
+        stream.write(json.dumps(row, separators=(",", ":")) + "\n")
+
+
+class PoolStore:
+    """Imported player pools by id, each shared by every draft that uses it.
+
+    Pools never change once imported. Given a directory, each pool is also
+    saved there as JSON Lines and loaded on first use, so pools survive a
+    restart and every worker process sharing the directory sees them.
+    """
+
+    def __init__(self, directory: Optional[str] = None):
+        self.directory = directory
+        self.pools: Dict[str, PlayerCatalog] = {DEFAULT_POOL_ID: DEFAULT_CATALOG}
+
+    def _path(self, pool_id: str) -> str:
+        return os.path.join(self.directory, f"{pool_id}.jsonl")
+
+    def get(self, pool_id: str) -> Optional[PlayerCatalog]:
+        catalog = self.pools.get(pool_id)
+        if catalog is None and self.directory and POOL_ID.fullmatch(pool_id):
+            try:
+                with open(self._path(pool_id), "rb") as f:
+                    catalog = self.pools[pool_id] = read_catalog(f, JSONL, max_players=math.inf)
+            except FileNotFoundError:
+                pass
+        return catalog
+
+    @staticmethod
+    def check_id(pool_id: str):
+        """Pool ids double as file names, so only safe ones are allowed."""
+        if not POOL_ID.fullmatch(pool_id):
+            raise ValueError("Pool ids are 1-64 letters, digits, '_', '.' or '-', starting with a letter or digit")
+
+    def add(self, pool_id: str, catalog: PlayerCatalog):
+        """Keep a new pool; raises FileExistsError if the id is taken."""
+        self.check_id(pool_id)
+        if self.get(pool_id) is not None:
+            raise FileExistsError(pool_id)
+        if self.directory:
+            os.makedirs(self.directory, exist_ok=True)
+            fd, temp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+            try:
+                with open(fd, "w", encoding="utf-8") as f:
+                    write_catalog(catalog, f)
+                    f.flush()
+                    os.fsync(f.fileno())
+                # Unlike a rename, linking fails if another worker saved the same id first.
+                os.link(temp_path, self._path(pool_id))
+            finally:
+                os.unlink(temp_path)
+        self.pools[pool_id] = catalog
+
+    def clear(self):
+        """Forget loaded pools; saved ones are loaded again on use."""
+        self.pools = {DEFAULT_POOL_ID: DEFAULT_CATALOG}
+
+
+def summary(catalog: PlayerCatalog) -> dict:
+    return {"players": len(catalog), "positions": {position: len(ids) for position, ids in catalog.by_position.items()}}
+
+
+def upload(path: str, fmt: str, server: str, pool_id: str, client=None) -> dict:
+    """Stream a file to a server's import endpoint."""
+    import httpx
+
+    client = client or httpx.Client(timeout=None)
+    with client, open(path, "rb") as f:
+        response = client.post(f"{server.rstrip('/')}/pools/{pool_id}", params={"format": fmt}, content=f)
+    result = response.json()
+    if response.status_code != 200:
+        raise InvalidPlayerData([str(result.get("detail"))])
+    return result
+
+
+def main(argv: Optional[List[str]] = None, client=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("file", help="CSV or JSON Lines file of players")
+    parser.add_argument("--format", choices=FORMATS, help="file format (default: from the file extension)")
+    parser.add_argument("--server", help="upload to this server instead of only validating")
+    parser.add_argument("--pool", help="id to import the pool as (default: the file name)")
+    args = parser.parse_args(argv)
+
+    fmt = args.format or guess_format(args.file)
+    if fmt is None:
+        parser.error("cannot tell the format from the file name; pass --format")
+    try:
+        if args.server:
+            pool_id = args.pool or os.path.splitext(os.path.basename(args.file))[0]
+            result = upload(args.file, fmt, args.server, pool_id, client)
+        else:
+            with open(args.file, "rb") as f:
+                result = summary(read_catalog(f, fmt))
+    except InvalidPlayerData as exc:
+        print("\n".join(exc.errors), file=sys.stderr)
+        return 1
+    print(json.dumps(result, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
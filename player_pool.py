@@ -0,0 +1,175 @@
+from bisect import bisect_left
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+# Id of the built-in example pool
+DEFAULT_POOL_ID = "default"
+
+
+class Player:
+    """A draftable player. `id` is the player's position in its catalog."""
+
+    __slots__ = ("id", "name", "position", "team", "rank", "projection", "info")
+
+    def __init__(self, id: int, name: str, position: str = "", team: str = "", rank: Optional[int] = None,
+                 projection: Optional[float] = None, info: Optional[Dict[str, Any]] = None):
+        self.id = id
+        self.name = name
+        self.position = position
+        self.team = team
+        self.rank = id + 1 if rank is None else rank
+        self.projection = projection
+        # Any other columns the pool was imported with
+        self.info = info
+
+    def to_dict(self) -> dict:
+        data = {"id": self.id, "name": self.name, "position": self.position, "team": self.team, "rank": self.rank}
+        if self.projection is not None:
+            data["projection"] = self.projection
+        if self.info:
+            data["info"] = self.info
+        return data
+
+
+class PlayerCatalog:
+    """An immutable list of players with lookup indexes.
+
+    Built once and shared by every draft that uses the same pool; per-draft
+    availability lives in `PlayerPool`.
+    """
+
+    def __init__(self, players: Iterable[tuple]):
+        """`players` yields `(name, position, team, rank[, projection[, info]])` rows.
+
+        Rows are read once, so a streaming source is never held in full.
+        """
+        built: List[Player] = []
+        self.by_name: Dict[str, int] = {}
+        for i, row in enumerate(players):
+            player = Player(i, *row)
+            if player.name in self.by_name:
+                raise ValueError(f"Duplicate player name: {player.name}")
+            self.by_name[player.name] = i
+            built.append(player)
+        self.players: Tuple[Player, ...] = tuple(built)
+        self.by_rank: Tuple[int, ...] = tuple(
+            p.id for p in sorted(self.players, key=lambda p: (p.rank, p.id))
+        )
+        by_position: Dict[str, List[int]] = {}
+        for player_id in self.by_rank:
+            by_position.setdefault(self.players[player_id].position, []).append(player_id)
+        self.by_position: Dict[str, Tuple[int, ...]] = {k: tuple(v) for k, v in by_position.items()}
+        # Lower-cased names in sorted order, for prefix search with bisect
+        names = sorted((p.name.lower(), p.id) for p in self.players)
+        self._names: List[str] = [name for name, _ in names]
+        self._name_ids: Tuple[int, ...] = tuple(player_id for _, player_id in names)
+
+    def __len__(self) -> int:
+        return len(self.players)
+
+    def prefix_range(self, prefix: str) -> Tuple[int, ...]:
+        """Ids of players whose name starts with `prefix` (case-insensitive), by name."""
+        prefix = prefix.lower()
+        start = bisect_left(self._names, prefix)
+        # "\uffff" sorts after any character that can follow the prefix
+        end = bisect_left(self._names, prefix + "\uffff", start)
+        return self._name_ids[start:end]
+
+
+def default_catalog() -> PlayerCatalog:
+    """Example player pool used by every new draft."""
+    positions = ("QB", "RB", "WR", "TE")
+    return PlayerCatalog((f"Player {i}", positions[(i - 1) % 4], "", i) for i in range(1, 21))
+
+
+DEFAULT_CATALOG = default_catalog()
+
+
+class PlayerPool:
+    """One draft's view of a catalog: which players are still available.
+
+    Availability is one byte per player, so checking and taking a player are
+    O(1) and many drafts can share a catalog without copying it.
+    """
+
+    __slots__ = ("catalog", "available", "remaining", "_heads")
+
+    def __init__(self, catalog: PlayerCatalog = DEFAULT_CATALOG):
+        self.catalog = catalog
+        self.available = bytearray(b"\x01") * len(catalog)
+        self.remaining = len(catalog)
+        # Offset of the best available player in each ranking, by position (None: overall)
+        self._heads: Dict[Optional[str], int] = {}
+
+    def __len__(self) -> int:
+        return self.remaining
+
+    def __contains__(self, name: str) -> bool:
+        player_id = self.catalog.by_name.get(name)
+        return player_id is not None and bool(self.available[player_id])
+
+    def get(self, name: str) -> Optional[Player]:
+        """The available player called `name`, if any."""
+        player_id = self.catalog.by_name.get(name)
+        if player_id is None or not self.available[player_id]:
+            return None
+        return self.catalog.players[player_id]
+
+    def take(self, player_id: int):
+        """Mark a player as drafted."""
+        if self.available[player_id]:
+            self.available[player_id] = 0
+            self.remaining -= 1
+
+    def best_available(self, position: Optional[str] = None) -> Optional[Player]:
+        """The highest-ranked available player, optionally at one position.
+
+        Drafted players never come back, so each search resumes where the
+        last one stopped; all the searches of a draft cost O(n) together.
+        """
+        ids = self.catalog.by_position.get(position, ()) if position else self.catalog.by_rank
+        available = self.available
+        offset = self._heads.get(position, 0)
+        while offset < len(ids) and not available[ids[offset]]:
+            offset += 1
+        self._heads[position] = offset
+        return self.catalog.players[ids[offset]] if offset < len(ids) else None
+
+    def names(self) -> List[str]:
+        """Names of every available player in ranking order."""
+        players = self.catalog.players
+        return [players[i].name for i in self.catalog.by_rank if self.available[i]]
+
+    def query(self, position: Optional[str] = None, prefix: Optional[str] = None,
+              cursor: int = 0, limit: int = DEFAULT_PAGE_SIZE) -> Tuple[List[Player], Optional[int]]:
+        """A page of available players and the cursor for the next page (None at the end).
+
+        Results are in ranking order, or name order when searching by `prefix`.
+        The cursor is an offset into that ordering, so it stays valid while
+        players are drafted between page requests.
+        """
+        if prefix:
+            ids: Sequence[int] = self.catalog.prefix_range(prefix)
+        elif position:
+            ids = self.catalog.by_position.get(position, ())
+        else:
+            ids = self.catalog.by_rank
+        page: List[Player] = []
+        for offset, player in self._scan(ids, cursor, position if prefix else None):
+            if len(page) == limit:
+                return page, offset
+            page.append(player)
+        return page, None
+
+    def _scan(self, ids: Sequence[int], start: int, position: Optional[str]) -> Iterator[Tuple[int, Player]]:
+        players = self.catalog.players
+        available = self.available
+        for offset in range(max(start, 0), len(ids)):
+            player_id = ids[offset]
+            if not available[player_id]:
+                continue
+            player = players[player_id]
+            if position and player.position != position:
+                continue
+            yield offset, player
@@ -0,0 +1,78 @@
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from types import FrameType
+from typing import Dict, Optional
+
+
+def _frame_name(frame: FrameType) -> str:
+    code = frame.f_code
+    return f"{os.path.basename(code.co_filename)}:{code.co_name}"
+
+
+class SamplingProfiler:
+    """Samples every thread's stack at a fixed interval from a background thread.
+
+    Nothing is traced between samples, so the server runs at full speed
+    while it is on; the cost is one stack walk per thread per interval.
+    Results are collapsed stacks, the input format of flame graph tools.
+    """
+
+    def __init__(self):
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self.interval = 0.0
+        self.started: Optional[float] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None
+
+    def start(self, interval: float = 0.005):
+        """Start sampling every `interval` seconds, discarding earlier results."""
+        if self.running:
+            raise RuntimeError("Profiler is already running")
+        self.stacks.clear()
+        self.samples = 0
+        self.interval = interval
+        self.started = time.perf_counter()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> str:
+        """Stop sampling and return the collapsed stacks."""
+        if not self.running:
+            raise RuntimeError("Profiler is not running")
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+        return self.collapsed()
+
+    def collapsed(self) -> str:
+        """One `thread;outer;...;inner count` line per distinct stack, most sampled first."""
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+    def sample(self, frames: Optional[Dict[int, FrameType]] = None):
+        """Record the current stack of every thread but this one."""
+        frames = sys._current_frames() if frames is None else frames
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        me = threading.get_ident()
+        for ident, frame in frames.items():
+            if ident == me:
+                continue
+            stack = []
+            while frame is not None:
+                stack.append(_frame_name(frame))
+                frame = frame.f_back
+            stack.append(names.get(ident, str(ident)))
+            self.stacks[";".join(reversed(stack))] += 1
+        self.samples += 1
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.sample()
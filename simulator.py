@@ -0,0 +1,114 @@
+import asyncio
+import heapq
+import random
+from collections import OrderedDict
+from concurrent.futures import Executor
+from typing import Awaitable, Callable, Hashable, List, Optional, Sequence
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+DEFAULT_SIMULATIONS = 2000
+MAX_SIMULATIONS = 20000
+# Simulated drafts per task sent to the process pool
+BATCH_SIZE = 500
+
+
+def spread(rank):
+    """Standard deviation of where a player of `rank` actually goes; later picks are less predictable."""
+    return 1.5 + 0.1 * rank
+
+
+def candidates(picks: int) -> int:
+    """How many of the best available players can realistically go in the next `picks` picks.
+
+    Players ranked further down are treated as certain to still be there,
+    which keeps each simulation proportional to the picks, not the pool.
+    """
+    return picks * 3 + 30
+
+
+def simulate_batch(ranks: Sequence[float], picks: int, simulations: int, seed: Optional[int] = None) -> List[int]:
+    """In how many of `simulations` mock drafts each player survives the next `picks` picks.
+
+    In each mock draft every player's draft position is their rank plus
+    normally distributed noise, and the `picks` lowest positions are taken.
+    Uses NumPy when it is installed, sampling every draft of the batch at once.
+    """
+    n = len(ranks)
+    if picks <= 0:
+        return [simulations] * n
+    if picks >= n:
+        return [0] * n
+    if np is not None:
+        return _simulate_numpy(ranks, picks, simulations, seed)
+    gauss = random.Random(seed).gauss
+    spreads = [spread(rank) for rank in ranks]
+    survived = [simulations] * n
+    for _ in range(simulations):
+        positions = [rank + gauss(0.0, sd) for rank, sd in zip(ranks, spreads)]
+        for i in heapq.nsmallest(picks, range(n), key=positions.__getitem__):
+            survived[i] -= 1
+    return survived
+
+
+def _simulate_numpy(ranks: Sequence[float], picks: int, simulations: int, seed: Optional[int]) -> List[int]:
+    rng = np.random.default_rng(seed)
+    ranks = np.asarray(ranks, dtype=float)
+    positions = ranks + rng.standard_normal((simulations, len(ranks))) * spread(ranks)
+    taken = np.argpartition(positions, picks - 1, axis=1)[:, :picks]
+    return (simulations - np.bincount(taken.ravel(), minlength=len(ranks))).tolist()
+
+
+async def availability(ranks: Sequence[float], picks: int, simulations: int = DEFAULT_SIMULATIONS,
+                       executor: Optional[Executor] = None, seed: Optional[int] = None) -> List[float]:
+    """Probability that each player is still available after `picks` picks.
+
+    The simulations are split into batches that run in `executor` (a
+    process pool spreads them over every core) while the event loop keeps
+    serving requests.
+    """
+    loop = asyncio.get_running_loop()
+    seed = random.randrange(2 ** 32) if seed is None else seed
+    batches = [min(BATCH_SIZE, simulations - start) for start in range(0, simulations, BATCH_SIZE)]
+    results = await asyncio.gather(*(
+        loop.run_in_executor(executor, simulate_batch, list(ranks), picks, size, seed + i)
+        for i, size in enumerate(batches)
+    ))
+    return [sum(counts) / simulations for counts in zip(*results)]
+
+
+class ResultCache:
+    """Keeps the most recent simulation results, keyed by the draft state they were computed for.
+
+    Requests for a result that is still being computed wait for that run
+    instead of starting another.
+    """
+
+    def __init__(self, maxsize: int = 256):
+        self.maxsize = maxsize
+        self.entries: "OrderedDict[Hashable, asyncio.Future]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    async def get(self, key: Hashable, compute: Callable[[], Awaitable]):
+        future = self.entries.get(key)
+        if future is None:
+            future = self.entries[key] = asyncio.ensure_future(compute())
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+        else:
+            self.entries.move_to_end(key)
+        try:
+            return await asyncio.shield(future)
+        except Exception:
+            # Failed runs are not cached
+            if self.entries.get(key) is future:
+                del self.entries[key]
+            raise
+
+    def clear(self):
+        self.entries.clear()
@@ -0,0 +1,168 @@
+"""Static files served from memory, compressed once when loaded.
+
+Every file under the asset directory is read at startup and gzipped (and
+brotli-compressed, when the `brotli` package is installed), so a request is
+a dict lookup and a write of bytes that are already encoded. Responses carry
+strong ETags for revalidation. Each asset is also served under a hashed URL
+(`app.3f2a9c1b.js` for `app.js`) that changes with its contents, so those
+URLs can be cached for a year.
+"""
+import asyncio
+import gzip
+import hashlib
+import logging
+import mimetypes
+import os
+import re
+from typing import Dict, List, Optional, Tuple
+
+from starlette.requests import Request
+from starlette.responses import PlainTextResponse, Response
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+# Smaller files are not worth compressing
+MIN_COMPRESS_SIZE = 256
+COMPRESSIBLE = re.compile(r"text/|application/(javascript|json|xml)|image/svg\+xml")
+# How hashed URLs and everything else may be cached
+IMMUTABLE = "public, max-age=31536000, immutable"
+REVALIDATE = "no-cache"
+
+
+class Asset:
+    """One file's contents, in every encoding worth sending."""
+
+    __slots__ = ("path", "media_type", "digest", "mtime", "bodies")
+
+    def __init__(self, path: str, body: bytes, mtime: float = 0.0):
+        self.path = path
+        media_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+        if media_type.startswith("text/"):
+            media_type += "; charset=utf-8"
+        self.media_type = media_type
+        self.digest = hashlib.sha256(body).hexdigest()[:16]
+        self.mtime = mtime
+        # Content-Encoding -> body, best first; "identity" is always there
+        self.bodies: Dict[str, bytes] = {}
+        if len(body) >= MIN_COMPRESS_SIZE and COMPRESSIBLE.match(media_type):
+            if brotli is not None:
+                self._add("br", brotli.compress(body), body)
+            # mtime=0 keeps the output, and so the ETag, the same across restarts
+            self._add("gzip", gzip.compress(body, compresslevel=9, mtime=0), body)
+        self.bodies["identity"] = body
+
+    def _add(self, encoding: str, compressed: bytes, body: bytes):
+        if len(compressed) < len(body):
+            self.bodies[encoding] = compressed
+
+    @property
+    def hashed_path(self) -> str:
+        stem, suffix = os.path.splitext(self.path)
+        return f"{stem}.{self.digest[:8]}{suffix}"
+
+    def etag(self, encoding: str) -> str:
+        # Strong ETags must differ between encodings of the same file.
+        return f'"{self.digest}"' if encoding == "identity" else f'"{self.digest}-{encoding}"'
+
+
+def accepted_encodings(header: Optional[str]) -> Dict[str, float]:
+    """Content codings from an Accept-Encoding header, by quality."""
+    accepted: Dict[str, float] = {}
+    for item in (header or "").split(","):
+        coding, _, params = item.strip().partition(";")
+        if not coding:
+            continue
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[coding.strip().lower()] = quality
+    return accepted
+
+
+def choose_encoding(asset: Asset, header: Optional[str]) -> str:
+    accepted = accepted_encodings(header)
+    wildcard = accepted.get("*", 0.0)
+    for encoding in asset.bodies:
+        if encoding != "identity" and accepted.get(encoding, wildcard) > 0:
+            return encoding
+    return "identity"
+
+
+class AssetStore:
+    """Every file under `directory`, loaded into memory."""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.assets: Dict[str, Asset] = {}
+        self.hashed: Dict[str, Asset] = {}
+        self.reload()
+
+    def _files(self) -> List[Tuple[str, str]]:
+        files = []
+        for root, _, names in os.walk(self.directory):
+            for name in names:
+                full_path = os.path.join(root, name)
+                files.append((os.path.relpath(full_path, self.directory).replace(os.sep, "/"), full_path))
+        return files
+
+    def reload(self) -> List[str]:
+        """Load new and changed files and drop deleted ones; returns the paths that changed."""
+        changed = []
+        assets = {}
+        for path, full_path in self._files():
+            mtime = os.stat(full_path).st_mtime
+            asset = self.assets.get(path)
+            if asset is None or asset.mtime != mtime:
+                with open(full_path, "rb") as f:
+                    asset = Asset(path, f.read(), mtime)
+                changed.append(path)
+            assets[path] = asset
+        changed.extend(path for path in self.assets if path not in assets)
+        if changed:
+            self.assets = assets
+            self.hashed = {asset.hashed_path: asset for asset in assets.values()}
+        return changed
+
+    async def watch(self, interval: float = 1.0):
+        """Reload changed files every `interval` seconds; for development."""
+        while True:
+            await asyncio.sleep(interval)
+            changed = await asyncio.to_thread(self.reload)
+            if changed:
+                logger.info("Reloaded static assets: %s", ", ".join(sorted(changed)))
+
+    def url(self, path: str, prefix: str = "/static") -> str:
+        """The hashed, cacheable URL of an asset."""
+        return f"{prefix}/{self.assets[path].hashed_path}"
+
+    def find(self, path: str) -> Tuple[Optional[Asset], bool]:
+        """(asset, whether `path` is its current hashed URL) for a requested path."""
+        asset = self.hashed.get(path)
+        if asset is not None:
+            return asset, True
+        return self.assets.get(path), False
+
+    def response(self, path: str, request: Request) -> Response:
+        """The asset at `path`, negotiated and cache-validated for `request`."""
+        asset, immutable = self.find(path)
+        if asset is None:
+            return PlainTextResponse("Not Found", status_code=404)
+        encoding = choose_encoding(asset, request.headers.get("accept-encoding"))
+        etag = asset.etag(encoding)
+        headers = {"ETag": etag, "Cache-Control": IMMUTABLE if immutable else REVALIDATE, "Vary": "Accept-Encoding"}
+        # Any encoding's ETag names the same content, so each validates the others.
+        tags = {tag.strip().removeprefix("W/") for tag in request.headers.get("if-none-match", "").split(",")}
+        if "*" in tags or any(asset.etag(other) in tags for other in asset.bodies):
+            return Response(status_code=304, headers=headers)
+        if encoding != "identity":
+            headers["Content-Encoding"] = encoding
+        return Response(asset.bodies[encoding], media_type=asset.media_type, headers=headers)
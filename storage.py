@@ -0,0 +1,219 @@
+import json
+import logging
+import threading
+import time
+from typing import List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Type of the marker logged when a draft is evicted; replay forgets the draft at that point.
+EVICTED = "evicted"
+# Longest wait, in seconds, between attempts to write a batch that failed
+RETRY_MAX = 5.0
+
+
+class StorageError(Exception):
+    """Raised when the backend cannot make events durable."""
+
+
+class Recovered:
+    """What `Storage.open()` found: snapshot records plus the events logged after them."""
+
+    __slots__ = ("drafts", "tail", "seconds")
+
+    def __init__(self, drafts: List[dict], tail: List[Tuple[str, dict]], seconds: float):
+        self.drafts = drafts
+        self.tail = tail
+        self.seconds = seconds
+
+
+class Snapshot:
+    """A queued snapshot: each draft's record and the log position it covers."""
+
+    __slots__ = ("lsn", "records")
+
+    def __init__(self, lsn: int, records: List[dict]):
+        self.lsn = lsn
+        self.records = records
+
+    def serialized(self) -> List[Tuple[str, str]]:
+        """(draft_id, JSON record) pairs; called on the writer thread."""
+        return [(record["draft_id"], json.dumps(record, separators=(",", ":"))) for record in self.records]
+
+
+class Storage:
+    """Where draft events are persisted.
+
+    Rooms stay the source of truth while the process runs; a storage backend
+    only has to record their events and hand them back on startup. This base
+    class keeps nothing, which is the in-memory default.
+    """
+
+    # The last write error, while writes are failing; the server is not ready meanwhile.
+    error: Optional[BaseException] = None
+
+    def open(self) -> Recovered:
+        """Return what was persisted before, then start accepting appends."""
+        return Recovered([], [], 0.0)
+
+    def append(self, draft_id: str, event: dict) -> int:
+        """Record an event without blocking; returns its log sequence number."""
+        return 0
+
+    def append_many(self, draft_id: str, events: List[dict]) -> int:
+        """Record events that belong together, e.g. a batch of commands; returns the last one's lsn."""
+        lsn = 0
+        for event in events:
+            lsn = self.append(draft_id, event)
+        return lsn
+
+    def evict(self, draft_id: str) -> int:
+        """Record that a draft was evicted, so a later draft with the same id starts afresh."""
+        return self.append(draft_id, {"type": EVICTED, "seq": 0})
+
+    def should_snapshot(self) -> bool:
+        return False
+
+    def snapshot(self, drafts: List[dict]):
+        """Persist the compact state of every draft; the records must not be changed afterwards."""
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Block until everything appended so far is durable; raises StorageError if writes are failing."""
+        return True
+
+    def close(self):
+        """Write anything still pending and release resources."""
+
+
+class MemoryStorage(Storage):
+    """Keeps drafts in memory only; nothing survives a restart."""
+
+
+class BatchedStorage(Storage):
+    """Base for backends that write from a background thread in batches.
+
+    `append()` and `snapshot()` only queue work. A writer thread collects
+    everything queued during `flush_interval` and hands it to `_write_batch()`
+    in order, so a backend can commit many events with one fsync or
+    transaction (group commit) while requests never wait on the disk.
+    A batch that fails is logged and retried, with backoff, until it is
+    written; `error` is set meanwhile. Subclasses implement `_load()`,
+    `_write_batch()` and `_close()`; a retried batch may repeat some of what
+    a failed attempt wrote.
+    """
+
+    def __init__(self, flush_interval: float = 0.005, snapshot_every: int = 10000):
+        self.flush_interval = flush_interval
+        self.snapshot_every = snapshot_every
+        self.lsn = 0
+        self.durable_lsn = 0
+        self.since_snapshot = 0
+        self._jobs: list = []
+        self._cond = threading.Condition()
+        self._closing = False
+        self._thread: Optional[threading.Thread] = None
+
+    def open(self) -> Recovered:
+        started = time.perf_counter()
+        last_lsn, snapshot_lsn, drafts, tail = self._load()
+        self.lsn = self.durable_lsn = max(last_lsn, snapshot_lsn)
+        self.since_snapshot = len(tail)
+        self._thread = threading.Thread(target=self._run, name=f"{type(self).__name__}-writer", daemon=True)
+        self._thread.start()
+        return Recovered(drafts, tail, time.perf_counter() - started)
+
+    def append(self, draft_id: str, event: dict) -> int:
+        with self._cond:
+            self.lsn += 1
+            self.since_snapshot += 1
+            self._jobs.append((self.lsn, draft_id, event))
+            self._cond.notify()
+            return self.lsn
+
+    def append_many(self, draft_id: str, events: List[dict]) -> int:
+        # Queued under one lock, so the writer takes them all in the same group commit.
+        with self._cond:
+            for event in events:
+                self.lsn += 1
+                self._jobs.append((self.lsn, draft_id, event))
+            self.since_snapshot += len(events)
+            self._cond.notify()
+            return self.lsn
+
+    def should_snapshot(self) -> bool:
+        return self.since_snapshot >= self.snapshot_every
+
+    def snapshot(self, drafts: List[dict]):
+        # Only queued: the writer thread serializes the records, off the event loop.
+        with self._cond:
+            self.since_snapshot = 0
+            self._jobs.append(Snapshot(self.lsn, drafts))
+            self._cond.notify()
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        with self._cond:
+            target = self.lsn
+            durable = self._cond.wait_for(lambda: self.durable_lsn >= target or self.error is not None, timeout)
+            if self.durable_lsn < target and self.error is not None:
+                raise StorageError(f"Could not write to {type(self).__name__}: {self.error}") from self.error
+            return durable
+
+    def close(self):
+        with self._cond:
+            self._closing = True
+            self._cond.notify()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+            self._close()
+
+    def _run(self):
+        delay = self.flush_interval
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._jobs or self._closing)
+                jobs, self._jobs = self._jobs, []
+                closing = self._closing
+            try:
+                if jobs:
+                    self._write_batch(jobs)
+            except Exception as exc:
+                with self._cond:
+                    self.error = exc
+                    # Put the batch back in front of what was queued since, to keep the order.
+                    self._jobs[:0] = jobs
+                    self._cond.notify_all()
+                    if closing:
+                        logger.exception("%s gave up on %d unwritten jobs", type(self).__name__, len(self._jobs))
+                        return
+                    delay = min(max(delay * 2, 0.01), RETRY_MAX)
+                    logger.exception("%s could not write %d jobs; retrying in %.2fs",
+                                     type(self).__name__, len(jobs), delay)
+                    # close() cuts the wait short for one last attempt.
+                    self._cond.wait_for(lambda: self._closing, delay)
+                continue
+            delay = self.flush_interval
+            with self._cond:
+                if self.error is not None:
+                    logger.info("%s is writing again", type(self).__name__)
+                    self.error = None
+                last = max((job[0] for job in jobs if not isinstance(job, Snapshot)), default=None)
+                if last is not None:
+                    self.durable_lsn = last
+                self._cond.notify_all()
+            if closing and not self._jobs:
+                return
+            # Let more appends pile up so the next commit covers all of them.
+            time.sleep(self.flush_interval)
+
+    def _load(self) -> Tuple[int, int, List[dict], List[Tuple[str, dict]]]:
+        """Return (last logged lsn, snapshot lsn, snapshot records, events after the snapshot)."""
+        raise NotImplementedError
+
+    def _write_batch(self, jobs: list):
+        """Durably write queued `(lsn, draft_id, event)` tuples and `Snapshot`s, in order."""
+        raise NotImplementedError
+
+    def _close(self):
+        """Release files or connections once the writer thread has stopped."""
+        raise NotImplementedError
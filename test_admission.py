@@ -0,0 +1,119 @@
+import asyncio
+
+import pytest
+
+from admission import ConcurrencyLimiter, IdempotencyCache, RateLimiter
+from draft_room import DraftError
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_token_bucket_allows_bursts_then_the_rate():
+    clock = FakeClock()
+    limiter = RateLimiter(rate=2, burst=3, clock=clock)
+    assert [limiter.acquire("a") for _ in range(3)] == [0, 0, 0]
+    assert limiter.acquire("a") == pytest.approx(0.5)
+    assert limiter.acquire("b") == 0
+    clock.now += 0.5
+    assert limiter.acquire("a") == 0
+    assert limiter.acquire("a") > 0
+    clock.now += 10
+    # Refills only up to the burst
+    assert [limiter.acquire("a") for _ in range(4)][-1] > 0
+
+
+def test_rate_limiter_forgets_least_recently_used_keys():
+    limiter = RateLimiter(rate=1, burst=1, max_keys=2, clock=FakeClock())
+    limiter.acquire("a")
+    limiter.acquire("b")
+    limiter.acquire("a")
+    limiter.acquire("c")
+    assert list(limiter.buckets) == ["a", "c"]
+    limiter.clear()
+    assert not limiter.buckets
+
+
+def test_concurrency_limiter():
+    limiter = ConcurrencyLimiter(2)
+    assert limiter.acquire("d") and limiter.acquire("d")
+    assert not limiter.acquire("d")
+    assert limiter.acquire("other")
+    limiter.release("d")
+    assert limiter.acquire("d")
+    limiter.release("d")
+    limiter.release("d")
+    assert limiter.active == {"other": 1}
+    limiter.clear()
+    assert not limiter.active
+
+
+@pytest.mark.asyncio
+async def test_idempotent_requests_run_once():
+    cache = IdempotencyCache()
+    calls = []
+
+    async def pick():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return {"ok": len(calls)}
+
+    # A retry during the first request waits for it
+    results = await asyncio.gather(cache.run("k", ("pick", 1), pick), cache.run("k", ("pick", 1), pick))
+    assert results == [{"ok": 1}, {"ok": 1}]
+    assert await cache.run("k", ("pick", 1), pick) == {"ok": 1}
+    assert len(calls) == 1
+    with pytest.raises(DraftError) as exc:
+        await cache.run("k", ("pick", 2), pick)
+    assert exc.value.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_idempotency_keeps_rejections_but_not_retry_later_errors():
+    clock = FakeClock()
+    cache = IdempotencyCache(ttl=60, clock=clock)
+    errors = [DraftError("Too many requests", 429), DraftError("Not your turn!")]
+
+    async def fail():
+        raise errors.pop(0)
+
+    with pytest.raises(DraftError, match="Too many"):
+        await cache.run("k", "f", fail)
+    with pytest.raises(DraftError, match="Not your turn"):
+        await cache.run("k", "f", fail)
+    # Replayed without running again
+    with pytest.raises(DraftError, match="Not your turn"):
+        await cache.run("k", "f", fail)
+    assert not errors
+
+    async def succeed():
+        return "done"
+
+    clock.now += 61
+    assert await cache.run("k", "f", succeed) == "done"
+
+
+@pytest.mark.asyncio
+async def test_idempotency_forgets_requests_that_did_not_complete():
+    cache = IdempotencyCache(max_keys=1)
+
+    async def crash():
+        raise RuntimeError("boom")
+
+    with pytest.raises(RuntimeError):
+        await cache.run("k", "f", crash)
+    assert not cache.entries
+
+    async def succeed():
+        return "done"
+
+    await cache.run("a", "f", succeed)
+    await cache.run("b", "f", succeed)
+    assert list(cache.entries) == ["b"]
+    cache.clear()
+    assert not cache.entries
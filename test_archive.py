@@ -0,0 +1,143 @@
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import archive
+from archive import DraftArchive, Segment, draft_record, encode_segment
+from draft_room import DraftRoom
+
+TEAMS = ["A", "B"]
+
+
+@pytest.fixture(params=["numpy", "python"])
+def scans(request, monkeypatch):
+    """Run each test with NumPy scans, when it is installed, and with the pure-Python ones."""
+    if request.param == "numpy":
+        if archive.np is None:
+            pytest.skip("NumPy is not installed")
+    else:
+        monkeypatch.setattr(archive, "np", None)
+    return request.param
+
+
+def record(draft_id, finished, players):
+    """A finished two-team draft; `players` are (name, position) in pick order."""
+    return {
+        "draft_id": draft_id, "finished": finished, "pool": "default", "teams": len(TEAMS),
+        "picks": [[overall, TEAMS[overall % 2], name, position] for overall, (name, position) in enumerate(players)],
+    }
+
+
+QB_FIRST = [("Quinn", "QB"), ("Rory", "RB"), ("Remy", "RB"), ("Wade", "WR")]
+RB_FIRST = [("Rory", "RB"), ("Remy", "RB"), ("Reed", "RB"), ("Quinn", "QB")]
+
+
+def test_segment_round_trip(scans):
+    segment = Segment(encode_segment([dict(record("d1", 10.0, QB_FIRST), id=1),
+                                      dict(record("d2", 20.0, RB_FIRST), id=2)]))
+    assert (segment.rows, segment.drafts, segment.starts) == (8, ["d1", "d2"], [0, 4])
+    assert list(segment.column("overall")) == [0, 1, 2, 3, 0, 1, 2, 3]
+    assert list(segment.column("round", 4)) == [1, 1, 2, 2]
+    assert [segment.strings[i] for i in segment.column("team", 6)] == ["A", "B"]
+    assert segment.first_row(None) == (0, 0)
+    assert segment.first_row(15.0) == (4, 1)
+    assert segment.first_row(25.0) == (8, 2)
+    assert segment.string_id("Wade") is not None and segment.string_id("Nobody") is None
+    with pytest.raises(ValueError, match="Not a draft archive segment"):
+        Segment(b"NOTADRAFT" + bytes(16))
+    data = encode_segment([]).replace(b'"version":1', b'"version":9')
+    with pytest.raises(ValueError, match="version 9"):
+        Segment(data)
+
+
+def test_analytics(scans):
+    drafts = DraftArchive(segment_drafts=2)
+    drafts.add(record("d1", 10.0, QB_FIRST))
+    drafts.add(record("d2", 20.0, RB_FIRST))
+    drafts.add(record("d3", 30.0, RB_FIRST))
+    assert (len(drafts), len(drafts.segments), len(drafts.pending)) == (3, 1, 1)
+
+    adp = drafts.adp()
+    assert adp["drafts"] == 3
+    assert adp["players"][0] == {"name": "Rory", "position": "RB", "adp": pytest.approx(1.33), "picks": 3,
+                                 "drafted": 1.0}
+    assert [p["name"] for p in adp["players"]] == ["Rory", "Remy", "Quinn", "Reed", "Wade"]
+    assert [p["name"] for p in drafts.adp(position="QB")["players"]] == ["Quinn"]
+    assert len(drafts.adp(limit=2)["players"]) == 2
+    recent = drafts.adp(since=15.0)
+    assert recent["drafts"] == 2
+    assert recent["players"][-1] == {"name": "Quinn", "position": "QB", "adp": 4.0, "picks": 2, "drafted": 1.0}
+    assert drafts.adp(since=99.0) == {"drafts": 0, "players": []}
+
+    assert drafts.runs(min_length=2)["positions"] == {
+        "RB": {"runs": 3, "average_length": 2.67, "longest": 3},
+    }
+    assert drafts.runs(min_length=1, since=25.0)["positions"] == {
+        "QB": {"runs": 1, "average_length": 1.0, "longest": 1},
+        "RB": {"runs": 1, "average_length": 3.0, "longest": 3},
+    }
+
+    team = drafts.team("A")
+    assert (team["drafts"], team["picks"]) == (3, 6)
+    assert team["positions"] == {"RB": 5, "QB": 1}
+    assert team["by_round"] == {1: {"RB": 2, "QB": 1}, 2: {"RB": 3}}
+    assert drafts.team("Nobody") == {"team": "Nobody", "drafts": 0, "picks": 0, "positions": {}, "by_round": {}}
+
+    drafts.clear()
+    assert len(drafts) == 0
+
+
+def test_drafts_survive_restarts(tmp_path):
+    directory = str(tmp_path)
+    drafts = DraftArchive(directory, segment_drafts=2)
+    for i in range(3):
+        drafts.add(record(f"d{i}", 10.0 + i, QB_FIRST))
+    assert sorted(os.listdir(directory)) == ["0-0000000002.col", "pending-0.jsonl"]
+    drafts.clear()
+
+    # A crash after writing a segment but before clearing the log leaves compacted drafts in it.
+    with open(os.path.join(directory, "pending-0.jsonl"), "a") as f:
+        f.write(json.dumps(dict(record("d1", 11.0, QB_FIRST), id=2)) + "\n")
+        f.write('{"torn')
+    reopened = DraftArchive(directory, segment_drafts=2)
+    reopened.open()
+    assert len(reopened) == 3
+    assert reopened.adp()["drafts"] == 3
+    reopened.add(record("d3", 13.0, QB_FIRST))
+    assert [segment.ids for segment in reopened.segments.values()] == [[1, 2], [3, 4]]
+
+    # Another worker sharing the directory reads these segments too
+    other = DraftArchive(directory, writer="1")
+    other.add(record("x", 20.0, RB_FIRST))
+    assert other.adp()["drafts"] == 5
+    other.compact()
+    assert reopened.adp()["drafts"] == 5
+    reopened.clear()
+    other.clear()
+
+
+def test_parallel_scans_match(tmp_path, monkeypatch, scans):
+    drafts = DraftArchive(str(tmp_path), segment_drafts=1)
+    for i in range(4):
+        drafts.add(record(f"d{i}", 10.0 + i, QB_FIRST if i % 2 else RB_FIRST))
+    drafts.add(record("memory", 20.0, RB_FIRST))
+    monkeypatch.setattr(archive, "PARALLEL_SEGMENTS", 2)
+    with ThreadPoolExecutor(2) as executor:
+        assert drafts.adp(executor=executor) == drafts.adp()
+        assert drafts.runs(executor=executor) == drafts.runs()
+        assert drafts.team("B", since=11.0, executor=executor) == drafts.team("B", since=11.0)
+    drafts.clear()
+
+
+def test_draft_record_from_room():
+    room = DraftRoom("d1")
+    for i in range(4):
+        room.register_team(f"Team {i}")
+    room.start_draft(["Team 0", "Team 1", "Team 2", "Team 3"])
+    room.autocomplete()
+    draft = draft_record(room, finished=5.0)
+    assert (draft["draft_id"], draft["finished"], draft["teams"], len(draft["picks"])) == ("d1", 5.0, 4, 20)
+    assert draft["picks"][0] == [0, "Team 0", "Player 1", "QB"]
+    assert DraftRoom.from_record(room.to_record()).pick_history == room.pick_history
@@ -0,0 +1,62 @@
+import time
+
+from auto_pick import TeamQueue, choose_player
+from draft_room import DraftRoom
+from player_pool import PlayerCatalog, PlayerPool
+
+POSITIONS = ("QB", "RB", "WR", "TE")
+
+
+def catalog(n=40):
+    return PlayerCatalog((f"Player {i}", POSITIONS[(i - 1) % 4], "", i) for i in range(1, n + 1))
+
+
+def test_queue_comes_first_and_skips_drafted_players():
+    pool = PlayerPool(catalog())
+    queue = TeamQueue([pool.catalog.by_name["Player 9"], pool.catalog.by_name["Player 5"]])
+    assert choose_player(pool, [], queue).name == "Player 9"
+    pool.take(pool.catalog.by_name["Player 9"])
+    assert choose_player(pool, [], queue).name == "Player 5"
+    pool.take(pool.catalog.by_name["Player 5"])
+    # An exhausted queue falls back to the ranking
+    assert choose_player(pool, [], queue).name == "Player 1"
+    assert queue.head == 2
+
+
+def test_best_available_at_needed_position():
+    pool = PlayerPool(catalog())
+    # Player 1 is a QB and the team already has one
+    assert choose_player(pool, ["Player 5"]).name == "Player 2"
+    assert choose_player(pool, []).name == "Player 1"
+
+
+def test_best_overall_once_needs_are_filled():
+    pool = PlayerPool(catalog())
+    roster = ["Player 1", "Player 2", "Player 6", "Player 3", "Player 7", "Player 4"]
+    for name in roster:
+        pool.take(pool.catalog.by_name[name])
+    assert choose_player(pool, roster).name == "Player 5"
+    # Needs at positions with nobody left are ignored
+    assert choose_player(pool, [], needs={"K": 1}).name == "Player 5"
+
+
+def test_nothing_left():
+    pool = PlayerPool(catalog(1))
+    pool.take(0)
+    assert choose_player(pool, []) is None
+
+
+def test_autocomplete_large_draft_is_fast():
+    """A 12-team, 16-round draft completes in milliseconds"""
+    room = DraftRoom("big", max_teams=12, rounds=16, catalog=catalog(400))
+    for i in range(12):
+        room.register_team(f"Team {i}")
+    room.start_draft()
+    started = time.perf_counter()
+    events = room.autocomplete()
+    elapsed = time.perf_counter() - started
+    assert len(events) == 12 * 16
+    assert all(len(picks) == 16 for picks in room.draft_results.values())
+    assert not room.in_progress
+    # Generous bound for slow CI machines; it takes a few milliseconds.
+    assert elapsed < 0.5
@@ -0,0 +1,103 @@
+import json
+import os
+import urllib.request
+
+import pytest
+
+import benchmark
+
+
+def test_percentile():
+    values = list(range(1, 101))
+    assert benchmark.percentile(values, 50) == 50
+    assert benchmark.percentile(values, 99) == 99
+    assert benchmark.percentile(values, 100) == 100
+    assert benchmark.percentile([7], 95) == 7
+    assert benchmark.percentile([], 50) is None
+
+
+def test_summarize_reports_milliseconds():
+    summary = benchmark.summarize([0.001, 0.002, 0.003])
+    assert summary == {"count": 3, "p50": 2.0, "p95": 3.0, "p99": 3.0, "max": 3.0}
+    assert benchmark.summarize([])["p50"] is None
+
+
+def test_compare_flags_regressions():
+    old = {"results": {"pick_latency_ms": {"p50": 10.0}, "picks_per_second": 100.0,
+                       "memory": {"per_room_bytes": None}}}
+    new = {"results": {"pick_latency_ms": {"p50": 20.0}, "picks_per_second": 105.0,
+                       "memory": {"per_room_bytes": 1000}}}
+    lines = benchmark.compare(old, new)
+    assert len(lines) == 2
+    assert "pick_latency_ms.p50" in lines[0] and "regression" in lines[0]
+    assert "picks_per_second" in lines[1] and "regression" not in lines[1]
+
+
+def test_rss_of_missing_process():
+    assert benchmark.rss_bytes(-1) is None
+
+
+def test_benchmark_run_writes_results(tmp_path, capsys):
+    """A small end-to-end run against a freshly started server"""
+    first = tmp_path / "first.json"
+    report = benchmark.main(["--drafts", "2", "--spectators", "2", "--output", str(first)])
+    results = report["results"]
+    assert results["errors"] == 0
+    assert results["pick_latency_ms"]["count"] == 2 * 20
+    # Every spectator sees every pick
+    assert results["broadcast_latency_ms"]["count"] == 2 * 2 * 20
+    assert results["messages_per_second"] > 0
+    assert json.loads(first.read_text())["config"]["drafts"] == 2
+
+    url = "http://127.0.0.1:1"
+    with pytest.raises(Exception):
+        benchmark.main(["--drafts", "1", "--spectators", "0", "--url", url,
+                        "--output", str(tmp_path / "unused.json")])
+
+    process = benchmark.start_server(benchmark.free_port())
+    try:
+        port = process.args[process.args.index("--port") + 1]
+        # start_server() only returns once the server reports itself ready
+        assert urllib.request.urlopen(f"http://127.0.0.1:{port}/readyz").status == 200
+        second = benchmark.main(["--drafts", "1", "--spectators", "1", "--url", f"http://127.0.0.1:{port}/",
+                                 "--output", str(tmp_path / "second.json"), "--compare", str(first)])
+    finally:
+        process.terminate()
+        process.wait()
+    assert second["results"]["memory"] == {"per_room_bytes": None, "per_connection_bytes": None}
+    assert "picks_per_second" in capsys.readouterr().out
+
+
+def test_spectators_answer_heartbeats(tmp_path, monkeypatch):
+    """With a short ping interval spectators are pinged mid-draft and must answer to stay connected"""
+    monkeypatch.setenv("DRAFT_WS_PING_INTERVAL", "0.05")
+    monkeypatch.setenv("DRAFT_WS_PING_TIMEOUT", "0.5")
+    report = benchmark.main(["--drafts", "1", "--spectators", "2", "--pick-interval", "0.05",
+                             "--output", str(tmp_path / "pinged.json")])
+    results = report["results"]
+    assert results["errors"] == 0
+    assert results["broadcast_latency_ms"]["count"] == 2 * 20
+
+
+def test_static_benchmark(tmp_path):
+    report = benchmark.main(["--static", "20", "--concurrency", "3", "--output", str(tmp_path / "static.json")])
+    results = report["results"]
+    assert (results["errors"], results["latency_ms"]["count"]) == (0, 20)
+    assert results["requests_per_second"] > 0
+    # The demo page is sent gzipped
+    assert results["bytes_per_request"] < os.path.getsize("static/index.html")
+
+
+def test_idle_benchmark(tmp_path):
+    report = benchmark.main(["--idle", "200", "--output", str(tmp_path / "idle.json")])
+    results = report["results"]
+    assert report["config"]["idle"] == 200
+    assert results["connections"] == 200
+    assert results["idle_connection_bytes"] is not None
+    assert results["heartbeat_sweep_ms"] >= 0
+
+
+def test_failing_server_is_reported(monkeypatch):
+    monkeypatch.setattr(benchmark.sys, "executable", "/bin/false")
+    with pytest.raises(RuntimeError, match="did not start"):
+        benchmark.start_server(benchmark.free_port(), timeout=5)
@@ -0,0 +1,239 @@
+import asyncio
+import json
+
+import pytest
+
+from broadcast import COALESCE, DISCONNECT, Broadcaster
+from encoding import Encoder, Payload
+
+
+class FakeWebSocket:
+    def __init__(self, blocked=False, fail=False):
+        self.fail = fail
+        self.sent = []
+        self.closed = None
+        self.release = asyncio.Event()
+        if not blocked:
+            self.release.set()
+
+    async def send_text(self, data):
+        if self.fail:
+            raise RuntimeError("socket is dead")
+        await self.release.wait()
+        self.sent.append(json.loads(data))
+
+    async def send_bytes(self, data):
+        await self.send_text(data.decode())
+
+    async def close(self, code=1000):
+        self.closed = code
+
+
+async def wait_until(predicate, timeout=1.0):
+    """Poll `predicate` until it holds, failing the test after `timeout` seconds."""
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    while not predicate():
+        assert loop.time() < deadline, "condition not met in time"
+        await asyncio.sleep(0.001)
+
+
+@pytest.mark.asyncio
+async def test_publish_reaches_every_subscriber():
+    broadcaster = Broadcaster()
+    sockets = [FakeWebSocket() for _ in range(3)]
+    for ws in sockets:
+        broadcaster.subscribe(ws)
+    broadcaster.publish({"pick": 1})
+    await wait_until(lambda: all(ws.sent for ws in sockets))
+    assert all(ws.sent == [{"pick": 1}] for ws in sockets)
+    await broadcaster.close()
+    assert len(broadcaster) == 0
+
+
+@pytest.mark.asyncio
+async def test_slow_client_does_not_block_others():
+    broadcaster = Broadcaster(max_queue=2)
+    slow = FakeWebSocket(blocked=True)
+    fast = FakeWebSocket()
+    broadcaster.subscribe(slow)
+    broadcaster.subscribe(fast)
+
+    broadcaster.publish({"pick": 0})
+    # Wait until the slow writer has taken message 0 and is stuck sending it
+    await wait_until(lambda: not broadcaster.subscribers[slow].queue)
+    for pick in range(1, 5):
+        broadcaster.publish({"pick": pick})
+        await wait_until(lambda: len(fast.sent) == pick + 1)
+    assert [m["pick"] for m in fast.sent] == [0, 1, 2, 3, 4]
+    assert slow.sent == []
+
+    # The slow client keeps only the newest messages once it falls behind
+    slow.release.set()
+    await wait_until(lambda: len(slow.sent) == 3)
+    assert [m["pick"] for m in slow.sent] == [0, 3, 4]
+    assert broadcaster.subscribers[slow].dropped == 2
+    await broadcaster.close()
+
+
+@pytest.mark.asyncio
+async def test_disconnect_policy_evicts_laggards():
+    broadcaster = Broadcaster(max_queue=1, policy=DISCONNECT, send_timeout=0.05)
+    slow = FakeWebSocket(blocked=True)
+    broadcaster.subscribe(slow)
+    broadcaster.publish({"pick": 0})
+    await wait_until(lambda: not broadcaster.subscribers[slow].queue)
+    broadcaster.publish({"pick": 1})
+    broadcaster.publish({"pick": 2})
+    assert slow not in broadcaster
+    assert broadcaster.evicted == 1
+    await broadcaster.close()
+    assert slow.closed == 1013
+
+
+@pytest.mark.asyncio
+async def test_dead_socket_is_evicted():
+    broadcaster = Broadcaster()
+    dead = FakeWebSocket(fail=True)
+    alive = FakeWebSocket()
+    broadcaster.subscribe(dead)
+    broadcaster.subscribe(alive)
+    broadcaster.publish({"pick": 1})
+    broadcaster.publish({"pick": 2})
+    await wait_until(lambda: len(alive.sent) == 2 and dead not in broadcaster)
+    assert alive in broadcaster
+    await broadcaster.close()
+
+
+@pytest.mark.asyncio
+async def test_send_timeout_evicts_stuck_socket():
+    broadcaster = Broadcaster(send_timeout=0.01)
+    stuck = FakeWebSocket(blocked=True)
+    broadcaster.subscribe(stuck)
+    broadcaster.publish({"pick": 1})
+    await wait_until(lambda: stuck not in broadcaster)
+    await broadcaster.close()
+    assert stuck.closed == 1013
+
+
+@pytest.mark.asyncio
+async def test_unsubscribe_stops_writer_without_cancel():
+    broadcaster = Broadcaster()
+    ws = FakeWebSocket()
+    subscriber = broadcaster.subscribe(ws)
+    broadcaster.publish({"pick": 1})
+    await wait_until(lambda: ws.sent)
+    broadcaster.unsubscribe(ws)
+    await asyncio.wait_for(subscriber.task, 1)
+    assert not subscriber.task.cancelled()
+    broadcaster.publish({"pick": 2})
+    assert ws.sent == [{"pick": 1}]
+
+
+@pytest.mark.asyncio
+async def test_close_is_bounded_for_stuck_writers():
+    broadcaster = Broadcaster(send_timeout=60)
+    stuck = FakeWebSocket(blocked=True)
+    subscriber = broadcaster.subscribe(stuck)
+    broadcaster.publish({"pick": 1})
+    await wait_until(lambda: not subscriber.queue)
+    await broadcaster.close(timeout=0.01)
+    assert subscriber.task.done()
+
+
+@pytest.mark.asyncio
+async def test_coalesce_policy_replaces_backlog_with_snapshot():
+    broadcaster = Broadcaster(max_queue=2, policy=COALESCE, snapshot=lambda: {"type": "snapshot"})
+    slow = FakeWebSocket(blocked=True)
+    subscriber = broadcaster.subscribe(slow)
+    broadcaster.publish({"seq": 1})
+    await wait_until(lambda: not subscriber.queue)
+    for seq in range(2, 6):
+        broadcaster.publish({"seq": seq})
+    slow.release.set()
+    await wait_until(lambda: len(slow.sent) == 3)
+    assert slow.sent == [{"seq": 1}, {"type": "snapshot"}, {"seq": 5}]
+    assert subscriber.dropped == 2
+    await broadcaster.close()
+
+
+@pytest.mark.asyncio
+async def test_send_targets_one_subscriber():
+    broadcaster = Broadcaster()
+    a, b = FakeWebSocket(), FakeWebSocket()
+    broadcaster.subscribe(a)
+    broadcaster.subscribe(b)
+    broadcaster.send(a, {"only": "a"})
+    broadcaster.send(FakeWebSocket(), {"unknown": True})
+    broadcaster.publish({"all": True})
+    await wait_until(lambda: len(a.sent) == 2 and len(b.sent) == 1)
+    assert a.sent == [{"only": "a"}, {"all": True}]
+    assert b.sent == [{"all": True}]
+    await broadcaster.close()
+
+
+@pytest.mark.asyncio
+async def test_payload_is_encoded_once_per_encoder():
+    calls = []
+
+    def dumps(message):
+        calls.append(message)
+        return json.dumps(message).encode()
+
+    binary = Encoder("counting", True, dumps)
+    broadcaster = Broadcaster()
+    text_sockets = [FakeWebSocket() for _ in range(3)]
+    binary_sockets = [FakeWebSocket() for _ in range(3)]
+    for ws in text_sockets:
+        broadcaster.subscribe(ws)
+    for ws in binary_sockets:
+        broadcaster.subscribe(ws, binary)
+
+    payload = Payload({"seq": 1})
+    broadcaster.publish(payload)
+    sockets = text_sockets + binary_sockets
+    await wait_until(lambda: all(ws.sent for ws in sockets))
+    assert all(ws.sent == [{"seq": 1}] for ws in sockets)
+    assert calls == [{"seq": 1}]
+    await broadcaster.close()
+
+
+@pytest.mark.asyncio
+async def test_idle_subscribers_have_no_writer_task():
+    broadcaster = Broadcaster()
+    ws = FakeWebSocket()
+    subscriber = broadcaster.subscribe(ws)
+    assert subscriber.task is None and subscriber.queue == []
+    broadcaster.publish({"pick": 1})
+    await wait_until(lambda: subscriber.task.done())
+    broadcaster.publish({"pick": 2})
+    await wait_until(lambda: len(ws.sent) == 2)
+    await broadcaster.close()
+
+
+@pytest.mark.asyncio
+async def test_heartbeat_pings_quiet_clients_and_drops_silent_ones():
+    broadcaster = Broadcaster()
+    quiet, chatty, silent = FakeWebSocket(), FakeWebSocket(), FakeWebSocket()
+    for ws in (quiet, chatty, silent):
+        broadcaster.subscribe(ws)
+    now = broadcaster.subscribers[quiet].last_seen
+    broadcaster.subscribers[silent].last_seen = now - 50
+    broadcaster.subscribers[chatty].last_seen = now + 15
+    assert broadcaster.heartbeat({"type": "ping"}, interval=20, timeout=40, now=now + 25) == 1
+    await wait_until(lambda: quiet.sent and silent.closed)
+    assert quiet.sent == [{"type": "ping"}]
+    assert chatty.sent == []
+    assert silent not in broadcaster and silent.closed == 1011
+    assert broadcaster.evicted == 1
+    broadcaster.seen(quiet)
+    broadcaster.seen(FakeWebSocket())
+    assert broadcaster.subscribers[quiet].last_seen > now
+    await broadcaster.close()
+
+
+def test_unknown_policy():
+    with pytest.raises(ValueError):
+        Broadcaster(policy="explode")
+    with pytest.raises(ValueError):
+        Broadcaster(policy=COALESCE)
@@ -0,0 +1,177 @@
+import asyncio
+from contextlib import asynccontextmanager
+
+import pytest
+
+from cluster import Cluster, RemoteFeed
+from draft_room import DraftError
+
+
+class Worker:
+    """A cluster member whose commands echo back and whose received events are recorded."""
+
+    def __init__(self, directory, size=2, **kwargs):
+        self.events = []
+        self.cluster = Cluster(str(directory), size, self.handle_command, self.handle_event, **kwargs)
+
+    async def handle_command(self, draft_id, command, args):
+        if command == "fail":
+            raise DraftError("Not your turn!")
+        if command == "limited":
+            raise DraftError("Too many requests", status_code=429, retry_after=2.5)
+        if command == "crash":
+            raise RuntimeError("boom")
+        if command == "slow":
+            await asyncio.sleep(1)
+        return {"worker": self.cluster.index, "draft": draft_id, "command": command, "args": args}
+
+    def handle_event(self, draft_id, event):
+        self.events.append((draft_id, event))
+
+
+async def wait_until(predicate, timeout=2.0):
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    while not predicate():
+        assert loop.time() < deadline, "condition not met in time"
+        await asyncio.sleep(0.01)
+
+
+def draft_owned_by(cluster, index):
+    return next(f"draft-{i}" for i in range(100) if cluster.owner(f"draft-{i}") == index)
+
+
+@asynccontextmanager
+async def two_workers(directory, **kwargs):
+    a, b = Worker(directory, **kwargs), Worker(directory)
+    await a.cluster.start()
+    await b.cluster.start()
+    try:
+        yield a, b
+    finally:
+        await a.cluster.stop()
+        await b.cluster.stop()
+
+
+@pytest.mark.asyncio
+async def test_workers_claim_distinct_slots(tmp_path):
+    async with two_workers(tmp_path) as (a, b):
+        assert {a.cluster.index, b.cluster.index} == {0, 1}
+        third = Worker(tmp_path)
+        with pytest.raises(RuntimeError, match="slots"):
+            await third.cluster.start()
+
+
+@pytest.mark.asyncio
+async def test_owner_is_stable_and_spread(tmp_path):
+    async with two_workers(tmp_path) as (a, b):
+        ids = [f"draft-{i}" for i in range(100)]
+        assert [a.cluster.owner(i) for i in ids] == [b.cluster.owner(i) for i in ids]
+        assert {a.cluster.owner(i) for i in ids} == {0, 1}
+        draft_id = draft_owned_by(a.cluster, a.cluster.index)
+        assert a.cluster.is_local(draft_id) and not b.cluster.is_local(draft_id)
+
+
+@pytest.mark.asyncio
+async def test_call_runs_on_owner(tmp_path):
+    async with two_workers(tmp_path) as (a, b):
+        draft_id = draft_owned_by(a.cluster, b.cluster.index)
+        result = await a.cluster.call(draft_id, "pick_player", {"team": "A", "player": "Player 1"})
+        assert result == {"worker": b.cluster.index, "draft": draft_id, "command": "pick_player",
+                          "args": {"team": "A", "player": "Player 1"}}
+        # Calls in flight at once are matched to their own replies.
+        results = await asyncio.gather(*(a.cluster.call(draft_id, "get_status", {"n": n}) for n in range(20)))
+        assert [r["args"]["n"] for r in results] == list(range(20))
+
+
+@pytest.mark.asyncio
+async def test_call_errors_are_raised_on_caller(tmp_path):
+    async with two_workers(tmp_path) as (a, b):
+        draft_id = draft_owned_by(a.cluster, b.cluster.index)
+        with pytest.raises(DraftError) as exc:
+            await a.cluster.call(draft_id, "fail", {})
+        assert (exc.value.detail, exc.value.status_code) == ("Not your turn!", 400)
+        with pytest.raises(DraftError) as exc:
+            await a.cluster.call(draft_id, "limited", {})
+        assert (exc.value.status_code, exc.value.retry_after) == (429, 2.5)
+        with pytest.raises(DraftError) as exc:
+            await a.cluster.call(draft_id, "crash", {})
+        assert exc.value.status_code == 500
+
+
+@pytest.mark.asyncio
+async def test_publish_reaches_other_workers(tmp_path):
+    async with two_workers(tmp_path) as (a, b):
+        assert a.cluster.publish("draft-1", {"type": "pick", "seq": 1}) == 1
+        assert a.cluster.publish("draft-1", {"type": "pick", "seq": 2}) == 1
+        await wait_until(lambda: len(b.events) == 2)
+        assert b.events == [("draft-1", {"type": "pick", "seq": 1}), ("draft-1", {"type": "pick", "seq": 2})]
+        assert a.events == []
+
+
+@pytest.mark.asyncio
+async def test_unreachable_owner_fails_with_503(tmp_path):
+    a = Worker(tmp_path, connect_timeout=0.05)
+    await a.cluster.start()
+    try:
+        draft_id = draft_owned_by(a.cluster, 1)
+        with pytest.raises(DraftError) as exc:
+            await a.cluster.call(draft_id, "get_status", {})
+        assert exc.value.status_code == 503
+        # Events for a missing peer are dropped without blocking.
+        a.cluster.publish(draft_id, {"type": "pick", "seq": 1})
+    finally:
+        await a.cluster.stop()
+
+
+@pytest.mark.asyncio
+async def test_slow_owner_times_out(tmp_path):
+    async with two_workers(tmp_path, call_timeout=0.05) as (a, b):
+        draft_id = draft_owned_by(a.cluster, b.cluster.index)
+        with pytest.raises(DraftError, match="did not respond"):
+            await a.cluster.call(draft_id, "slow", {})
+
+
+@pytest.mark.asyncio
+async def test_full_outbox_rejects_calls(tmp_path):
+    a = Worker(tmp_path, outbox_size=1, connect_timeout=0.5)
+    await a.cluster.start()
+    try:
+        draft_id = draft_owned_by(a.cluster, 1)
+        # The peer's writer task is stuck connecting, so the outbox fills up.
+        first = asyncio.ensure_future(a.cluster.call(draft_id, "get_status", {}))
+        await asyncio.sleep(0.01)
+        a.cluster.publish(draft_id, {"seq": 1})
+        with pytest.raises(DraftError, match="busy"):
+            await a.cluster.call(draft_id, "get_status", {})
+        with pytest.raises(DraftError):
+            await first
+    finally:
+        await a.cluster.stop()
+
+
+@pytest.mark.asyncio
+async def test_restarted_owner_is_reconnected(tmp_path):
+    async with two_workers(tmp_path) as (a, b):
+        draft_id = draft_owned_by(a.cluster, b.cluster.index)
+        await a.cluster.call(draft_id, "get_status", {})
+        await b.cluster.stop()
+        await wait_until(lambda: a.cluster.peers[b.cluster.index].writer is None)
+        restarted = Worker(tmp_path)
+        await restarted.cluster.start()
+        try:
+            result = await a.cluster.call(draft_id, "get_status", {})
+            assert result["worker"] == restarted.cluster.index
+        finally:
+            await restarted.cluster.stop()
+
+
+@pytest.mark.asyncio
+async def test_remote_feed_buffers_for_pending_clients():
+    feed = RemoteFeed()
+    assert not feed
+    websocket = object()
+    feed.pending[websocket] = []
+    assert feed
+    feed.deliver({"type": "pick", "seq": 3})
+    assert feed.pending[websocket] == [{"type": "pick", "seq": 3}]
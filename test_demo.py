@@ -28,6 +28,11 @@ def mock_print():
     with patch('builtins.print') as mock:
         yield mock
 
+@pytest.fixture
+def mock_ready():
+    with patch('demo.wait_until_ready', return_value=0.25) as mock:
+        yield mock
+
 def test_start_server_windows(mock_subprocess):
     """Test server start on Windows platform"""
     with patch('sys.platform', 'win32'):
@@ -48,75 +53,148 @@ def test_start_server_windows(mock_subprocess):
 def test_start_server_unix(mock_subprocess):
     """Test server start on Unix-like platforms"""
     with patch('sys.platform', 'linux'):
-        demo.start_server()
+        assert demo.start_server() is mock_subprocess.return_value
         mock_subprocess.assert_called_once_with(
             ['uvicorn', 'main:app', '--reload']
         )
 
+def test_start_server_other_port(mock_subprocess):
+    with patch('sys.platform', 'linux'):
+        demo.start_server(8123)
+        mock_subprocess.assert_called_once_with(
+            ['uvicorn', 'main:app', '--reload', '--port', '8123']
+        )
+
+def test_start_in_process_serves_on_a_free_port():
+    """The in-process server answers /readyz once its lifespan has started"""
+    from main import reset_state
+    server, thread, port = demo.start_in_process()
+    try:
+        assert port > 0
+        seconds = demo.wait_until_ready(f'http://127.0.0.1:{port}', timeout=10)
+        assert 0 <= seconds < 10
+    finally:
+        demo.stop(server, thread)
+        assert not thread.is_alive()
+        reset_state()
+
+def test_wait_until_ready_backs_off(mock_time):
+    """Polls until /readyz answers, doubling the wait up to POLL_MAX"""
+    attempts = [OSError(), OSError(), OSError(), OSError(), OSError(), OSError(), MagicMock()]
+    with patch('urllib.request.urlopen', side_effect=attempts) as mock_open:
+        seconds = demo.wait_until_ready('http://localhost:8000')
+    assert seconds >= 0
+    assert mock_open.call_args[0][0] == 'http://localhost:8000/readyz'
+    assert [call[0][0] for call in mock_time.call_args_list] == [0.02, 0.04, 0.08, 0.16, 0.32, 0.5]
+
+def test_wait_until_ready_gives_up(mock_time):
+    with patch('urllib.request.urlopen', side_effect=OSError()):
+        with patch('time.monotonic', side_effect=[0.0, 0.0, 5.0]):
+            with pytest.raises(RuntimeError, match="not ready after 1s"):
+                demo.wait_until_ready('http://localhost:8000', timeout=1)
+
+def test_wait_until_ready_notices_the_server_exiting(mock_time):
+    process = MagicMock()
+    process.poll.return_value = 1
+    with patch('urllib.request.urlopen', side_effect=OSError()):
+        with pytest.raises(RuntimeError, match="exited"):
+            demo.wait_until_ready('http://localhost:8000', process=process)
+    mock_time.assert_not_called()
+
 def test_open_browser_windows(mock_webbrowser, mock_time):
     """Test opening browser windows"""
     demo.open_browser_windows()
-    
-    # Should open 4 browser windows with delays
+
+    # Should open 4 browser windows, without waiting between them
     assert mock_webbrowser.call_count == 4
-    assert mock_time.call_count == 4
-    
+    mock_time.assert_not_called()
+
     # Verify all calls were made with the correct URL
     for call in mock_webbrowser.call_args_list:
         assert call[0][0] == 'http://localhost:8000'
 
-def test_main_flow(mock_subprocess, mock_webbrowser, mock_time, mock_print):
+def test_main_flow(mock_subprocess, mock_webbrowser, mock_time, mock_print, mock_ready):
     """Test the main function flow"""
     with patch('builtins.input', return_value=''):
         with patch('sys.exit') as mock_exit:
             # Simulate KeyboardInterrupt after a few iterations
             mock_time.side_effect = [None, None, None, None, KeyboardInterrupt()]
-            
-            demo.main()
-            
-            # Verify server was started
+
+            demo.main([])
+
+            # Verify server was started and waited for
             mock_subprocess.assert_called_once()
-            
+            mock_ready.assert_called_once_with('http://localhost:8000', demo.READY_TIMEOUT,
+                                               mock_subprocess.return_value)
+
             # Verify browser windows were opened
             assert mock_webbrowser.call_count == 4
-            
-            # Verify exit was called
+
+            # Verify exit was called and the server stopped
             mock_exit.assert_called_once_with(0)
-            
-            # Verify instructions were printed
+            mock_subprocess.return_value.terminate.assert_called_once()
+
+            # Verify instructions and the startup time were printed
             assert any("Starting Fantasy Draft Demo" in call[0][0] for call in mock_print.call_args_list)
             assert any("Instructions:" in call[0][0] for call in mock_print.call_args_list)
+            assert any("ready at http://localhost:8000 in 0.25s" in call[0][0] for call in mock_print.call_args_list)
             assert any("Demo is running!" in call[0][0] for call in mock_print.call_args_list)
 
-def test_main_flow_immediate_exit(mock_subprocess, mock_webbrowser, mock_time, mock_print):
+def test_main_flow_immediate_exit(mock_subprocess, mock_webbrowser, mock_time, mock_print, mock_ready):
     """Test the main function flow with immediate exit"""
     with patch('builtins.input', return_value=''):
         # Make time.sleep raise SystemExit after browser windows are opened
-        mock_time.side_effect = [None, None, None, None, SystemExit()]
-        
+        mock_time.side_effect = [SystemExit()]
+
         with pytest.raises(SystemExit):
-            demo.main()
-        
+            demo.main([])
+
         # Verify server was started
         mock_subprocess.assert_called_once()
-        
+
         # Verify browser windows were opened
         assert mock_webbrowser.call_count == 4
 
-def test_main_flow_keyboard_interrupt(mock_subprocess, mock_webbrowser, mock_time, mock_print):
+def test_main_flow_keyboard_interrupt(mock_subprocess, mock_webbrowser, mock_time, mock_print, mock_ready):
     """Test the main function flow with keyboard interrupt"""
     with patch('builtins.input', return_value=''):
         with patch('sys.exit') as mock_exit:
             # Simulate keyboard interrupt after a few iterations
             mock_time.side_effect = [None, None, None, None, KeyboardInterrupt()]
-            
-            demo.main()
-            
+
+            demo.main(['--windows', '2'])
+
             # Verify server was started
             mock_subprocess.assert_called_once()
-            
+
             # Verify browser windows were opened
-            assert mock_webbrowser.call_count == 4
-            
+            assert mock_webbrowser.call_count == 2
+
             # Verify exit message was printed
-            assert any("Stopping server" in call[0][0] for call in mock_print.call_args_list) 
\ No newline at end of file
+            assert any("Stopping server" in call[0][0] for call in mock_print.call_args_list)
+
+def test_main_flow_in_process(mock_subprocess, mock_webbrowser, mock_time, mock_print, mock_ready):
+    """With --in-process the server runs on a thread, on a free port"""
+    server, thread = MagicMock(), MagicMock()
+    with patch('builtins.input', return_value=''), patch('sys.exit'):
+        with patch('demo.start_in_process', return_value=(server, thread, 54321)) as mock_start:
+            mock_time.side_effect = [KeyboardInterrupt()]
+
+            demo.main(['--in-process'])
+
+            mock_start.assert_called_once_with(0)
+            mock_subprocess.assert_not_called()
+            mock_ready.assert_called_once_with('http://localhost:54321', demo.READY_TIMEOUT, None)
+            assert mock_webbrowser.call_args[0][0] == 'http://localhost:54321'
+            assert server.should_exit is True
+            thread.join.assert_called_once()
+
+def test_main_flow_server_not_ready(mock_subprocess, mock_webbrowser, mock_time, mock_print, mock_ready):
+    mock_ready.side_effect = RuntimeError('Server exited before it was ready')
+    with patch('builtins.input', return_value=''):
+        with pytest.raises(SystemExit) as exited:
+            demo.main(['--port', '9000'])
+    assert exited.value.code == 1
+    mock_webbrowser.assert_not_called()
+    mock_subprocess.return_value.terminate.assert_called_once()
+    assert any("exited before it was ready" in call[0][0] for call in mock_print.call_args_list)
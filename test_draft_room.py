@@ -0,0 +1,498 @@
+import asyncio
+import json
+
+import pytest
+from draft_room import DEFAULT_DRAFT_ID, DraftError, DraftRoom, RoomRegistry
+
+
+class FakeWebSocket:
+    async def send_text(self, data):
+        pass
+
+
+def full_room(draft_id="d1"):
+    room = DraftRoom(draft_id)
+    for i in range(4):
+        room.register_team(f"Team {i}")
+    room.start_draft()
+    return room
+
+
+def test_snake_order():
+    room = full_room()
+    first_round = []
+    for i in range(4):
+        team = room.get_next_team()
+        first_round.append(team)
+        room.pick_player(team, f"Player {i + 1}")
+    assert first_round == room.draft_order
+    assert room.current_round == 2
+    assert room.get_next_team() == room.draft_order[-1]
+
+
+def test_rejected_pick_leaves_state_unchanged():
+    room = full_room()
+    wrong_team = room.draft_order[1]
+    with pytest.raises(DraftError) as exc:
+        room.pick_player(wrong_team, "Player 1")
+    assert exc.value.detail == "Not your turn!"
+    assert exc.value.status_code == 400
+    assert room.current_pick == 0
+    assert "Player 1" in room.players
+
+
+def test_commands_emit_sequenced_events():
+    room = DraftRoom("d1")
+    events = [room.register_team(f"Team {i}").message for i in range(4)]
+    assert [e["seq"] for e in events] == [1, 2, 3, 4]
+    assert events[-1] == {"type": "team_registered", "seq": 4, "team": "Team 3", "can_start_draft": True}
+
+    started = room.start_draft().message
+    assert started["type"] == "draft_started"
+    assert started["order"] == room.draft_order
+    assert started["next_team"] == room.draft_order[0]
+
+    pick = room.pick_player(room.draft_order[0], "Player 7").message
+    assert pick == {
+        "type": "pick", "seq": 6, "team": room.draft_order[0], "player": "Player 7",
+        "round": 1, "pick": 1, "next_team": room.draft_order[1],
+    }
+
+
+def test_catch_up_replays_or_snapshots():
+    room = full_room()
+    room.pick_player(room.get_next_team(), "Player 1")
+    assert [e.message["type"] for e in room.catch_up(4)] == ["draft_started", "pick"]
+    assert room.catch_up(room.events.seq) == []
+
+    payload, = room.catch_up(None)
+    snapshot = payload.message
+    assert snapshot["type"] == "snapshot"
+    assert snapshot["seq"] == room.events.seq
+    assert "Player 1" not in snapshot["remaining_players"]
+    # A sequence number from some other server run falls back to a snapshot
+    assert room.catch_up(999)[0].message["type"] == "snapshot"
+
+
+def test_snapshot_payload_is_cached_per_sequence_number():
+    room = full_room()
+    first = room.snapshot_payload()
+    assert room.snapshot_payload() is first
+    room.pick_player(room.get_next_team(), "Player 1")
+    second = room.snapshot_payload()
+    assert second is not first
+    assert second.message["seq"] == first.message["seq"] + 1
+
+
+def test_start_with_fixed_order():
+    room = DraftRoom("d1")
+    for i in range(4):
+        room.register_team(f"Team {i}")
+    with pytest.raises(DraftError):
+        room.start_draft(["Team 0", "Team 1", "Team 2", "Team 9"])
+    room.start_draft(["Team 2", "Team 0", "Team 3", "Team 1"])
+    assert room.get_next_team() == "Team 2"
+
+
+def test_apply_unknown_event():
+    with pytest.raises(ValueError):
+        DraftRoom("d1").apply({"type": "explode"})
+
+
+def test_rooms_do_not_share_state():
+    a = DraftRoom("a")
+    b = DraftRoom("b")
+    a.register_team("Team A")
+    assert b.registered_teams == set()
+    assert a.players is not b.players
+    assert a.players.catalog is b.players.catalog
+
+
+def test_auto_pick_and_queues():
+    room = DraftRoom("d1")
+    for i in range(4):
+        room.register_team(f"Team {i}")
+    with pytest.raises(DraftError, match="not in progress"):
+        room.auto_pick()
+    room.start_draft()
+    team = room.get_next_team()
+    room.set_queue(team, ["Player 12"])
+    assert not room.auto_on_clock
+    event = room.set_auto(team).message
+    assert event == {"type": "auto_pick", "seq": 6, "team": team, "enabled": True}
+    assert room.auto_on_clock
+    assert room.status()["auto_teams"] == [team]
+    assert room.auto_pick().message["player"] == "Player 12"
+    assert not room.auto_on_clock
+    room.set_auto(team, enabled=False)
+    assert room.auto_teams == set()
+
+    with pytest.raises(DraftError) as exc:
+        room.set_auto("Nobody")
+    assert exc.value.status_code == 404
+    with pytest.raises(DraftError, match="Team not registered"):
+        room.set_queue("Nobody", [])
+    with pytest.raises(DraftError, match="Unknown players: Nobody"):
+        room.set_queue(team, ["Player 1", "Nobody"])
+
+    assert len(room.autocomplete()) == 19
+    assert room.autocomplete() == []
+
+
+def test_record_shares_nothing_with_the_room():
+    room = full_room()
+    room.auto_pick()
+    record = room.to_record()
+    copied = json.loads(json.dumps(record))
+    room.auto_pick()
+    assert json.loads(json.dumps(record)) == copied
+
+def test_auto_settings_survive_records_and_replay():
+    room = full_room()
+    team = room.draft_order[1]
+    room.set_auto(team)
+    room.set_queue(team, ["Player 20", "Player 19"])
+    rebuilt = DraftRoom.from_record(room.to_record())
+    assert rebuilt.auto_teams == {team}
+    assert [rebuilt.catalog.players[i].name for i in rebuilt.queues[team].ids] == ["Player 20", "Player 19"]
+
+    replayed = DraftRoom("d1")
+    for payload in room.events.events:
+        replayed.apply(payload.message)
+    assert replayed.auto_teams == {team}
+
+
+def test_pool_selection_survives_records_and_replay():
+    from player_pool import PlayerCatalog
+    catalog = PlayerCatalog([(f"Star {i}", "RB", "", i) for i in range(1, 31)])
+    room = DraftRoom("d1")
+    room.register_team("Team 0")
+    room.set_queue("Team 0", ["Player 3"])
+    event = room.set_pool("stars", catalog)
+    assert event.message["players"] == 30
+    assert room.queues == {} and room.status()["pool"] == "stars"
+    assert len(room.players) == 30 and "Player 1" not in room.players
+
+    rebuilt = DraftRoom.from_record(room.to_record(), {"stars": catalog}.get)
+    assert rebuilt.catalog is catalog and rebuilt.pool_id == "stars"
+    replayed = DraftRoom("d1")
+    for payload in room.events.events:
+        replayed.apply(payload.message, {"stars": catalog}.get)
+    assert replayed.catalog is catalog
+    with pytest.raises(ValueError, match="Unknown player pool"):
+        DraftRoom.from_record(room.to_record())
+    with pytest.raises(ValueError, match="Unknown player pool"):
+        DraftRoom("d1").apply(event.message, {}.get)
+
+    with pytest.raises(DraftError, match="already started"):
+        full_room().set_pool("stars", catalog)
+
+
+def test_auto_pick_with_no_players_left():
+    from player_pool import PlayerCatalog
+    room = DraftRoom("d1", max_teams=1, catalog=PlayerCatalog([("Only", "QB", "", 1)]))
+    room.register_team("Team 0")
+    room.start_draft()
+    room.auto_pick()
+    with pytest.raises(DraftError, match="No players available"):
+        room.auto_pick()
+
+
+def test_pick_clock_lifecycle():
+    room = DraftRoom("d1")
+    with pytest.raises(DraftError, match="not in progress"):
+        room.start_clock(30)
+    for i in range(4):
+        room.register_team(f"Team {i}")
+    room.start_draft()
+    assert room.next_clock() is None
+    with pytest.raises(DraftError, match="positive"):
+        room.start_clock(0)
+    with pytest.raises(DraftError, match="Unknown expiry action"):
+        room.start_clock(30, "explode")
+    with pytest.raises(DraftError, match="not running"):
+        room.pause_clock(10)
+    with pytest.raises(DraftError, match="not paused"):
+        room.resume_clock()
+    with pytest.raises(DraftError, match="not running"):
+        room.extend_clock(10, 0)
+    with pytest.raises(DraftError, match="not running"):
+        room.cancel_clock()
+
+    event = room.start_clock(30, "skip").message
+    assert event["type"] == "clock" and event["team"] == room.get_next_team()
+    assert (event["state"], event["remaining"], event["on_expiry"]) == ("running", 30, "skip")
+    assert room.pause_clock(12.5).message["state"] == "paused"
+    with pytest.raises(DraftError, match="positive"):
+        room.extend_clock(0, 12.5)
+    assert room.extend_clock(10, 12.5).message["remaining"] == 22.5
+    assert room.resume_clock().message["remaining"] == 22.5
+    assert room.status()["clock"]["state"] == "running"
+
+    skipped_team = room.get_next_team()
+    skip = room.expire_clock().message
+    assert (skip["type"], skip["team"], skip["pick"]) == ("skip", skipped_team, 1)
+    assert room.draft_results[skipped_team] == []
+    assert room.next_clock().message["remaining"] == 30
+    assert room.cancel_clock().message["state"] == "stopped"
+    assert room.next_clock() is None
+
+    room.start_clock(30)
+    assert room.expire_clock().message["type"] == "pick"
+    room.autocomplete()
+    assert room.next_clock().message["state"] == "stopped"
+    with pytest.raises(DraftError, match="not in progress"):
+        room.skip_pick()
+
+
+def test_pick_clock_survives_records_and_replay():
+    room = full_room()
+    room.start_clock(45, "skip")
+    room.expire_clock()
+    room.next_clock()
+    room.pause_clock(20)
+    rebuilt = DraftRoom.from_record(room.to_record())
+    assert (rebuilt.clock.state, rebuilt.clock.remaining, rebuilt.clock.seconds) == ("paused", 20, 45)
+
+    replayed = DraftRoom("d1")
+    for payload in room.events.events:
+        replayed.apply(payload.message)
+    assert replayed.clock.to_dict() == room.clock.to_dict()
+    assert replayed.current_pick == 1
+
+
+def test_picks_until_follows_the_snake():
+    room = DraftRoom("d1")
+    assert room.picks_until("Team 0") is None
+    room = full_room()
+    order = room.draft_order
+    assert [room.schedule.owner(pick) for pick in range(8)] == order + order[::-1]
+    assert room.picks_until(order[0]) == 0
+    assert room.picks_until(order[1]) == 1
+    room.pick_player(order[0], "Player 1")
+    # Next pick for the first team is the last of round 2
+    assert room.picks_until(order[0]) == 6
+    room.autocomplete()
+    assert room.picks_until(order[0]) is None
+
+
+@pytest.mark.asyncio
+async def test_wait_for_change():
+    room = DraftRoom("d1")
+    assert await room.wait_for_change(5, 1) is True
+    assert await room.wait_for_change(0, 0.01) is False
+    waiters = [asyncio.ensure_future(room.wait_for_change(0, 5)) for _ in range(2)]
+    timed_out = asyncio.ensure_future(room.wait_for_change(0, 0.01))
+    assert await timed_out is False
+    room.register_team("Team 0")
+    room.changed()
+    assert await asyncio.gather(*waiters) == [True, True]
+    room.changed()
+
+
+def test_status_payload_is_cached_per_seq():
+    room = DraftRoom("d1")
+    payload = room.status_payload()
+    assert room.status_payload() is payload and room.status() is payload.message
+    room.register_team("Team 0")
+    assert room.status_payload() is not payload
+
+
+def test_registry_get_or_create():
+    registry = RoomRegistry()
+    room = registry.get_or_create("x")
+    assert registry.get_or_create("x") is room
+    assert "x" in registry
+    assert len(registry) == 1
+    assert registry.get("y") is None
+    assert registry.remove("x") is room
+    assert len(registry) == 0
+
+
+@pytest.mark.asyncio
+async def test_evict_idle_rooms():
+    forgotten = []
+    registry = RoomRegistry(idle_timeout=10, on_evict=forgotten.append)
+    idle = registry.get_or_create("idle")
+    busy = registry.get_or_create("busy")
+    watched = registry.get_or_create("watched")
+    idle.last_active = busy.last_active - 100
+    watched.last_active = idle.last_active
+    watched.broadcaster.subscribe(FakeWebSocket())
+    assert len(watched.broadcaster) == 1
+
+    evicted = registry.evict_idle(now=busy.last_active + 5)
+    assert evicted == forgotten == ["idle"]
+    assert "idle" not in registry
+    assert "busy" in registry
+    assert "watched" in registry
+    await watched.broadcaster.close()
+
+
+def test_default_and_in_progress_drafts_are_not_evicted():
+    registry = RoomRegistry(idle_timeout=10)
+    default = registry.get_or_create(DEFAULT_DRAFT_ID)
+    drafting = registry.get_or_create("drafting")
+    finished = registry.get_or_create("finished")
+    for room in (drafting, finished):
+        for i in range(4):
+            room.register_team(f"Team {i}")
+        room.start_draft()
+    finished.current_round = finished.rounds + 1
+    for room in (default, drafting, finished):
+        room.last_active -= 100
+
+    assert registry.evict_idle() == ["finished"]
+    assert DEFAULT_DRAFT_ID in registry
+    assert "drafting" in registry
+
+
+@pytest.mark.asyncio
+async def test_clear_stops_broadcasters():
+    registry = RoomRegistry()
+    room = registry.get_or_create("x")
+    subscriber = room.broadcaster.subscribe(FakeWebSocket())
+    # Idle subscribers have no writer task; a message starts one.
+    assert subscriber.task is None
+    room.broadcaster.publish({"seq": 1})
+    registry.clear()
+    assert len(registry) == 0
+    assert len(room.broadcaster) == 0
+    await asyncio.wait_for(subscriber.task, 1)
+    assert subscriber.closed
+
+
+def test_maybe_evict_is_rate_limited():
+    registry = RoomRegistry(idle_timeout=0, sweep_interval=3600)
+    registry.get_or_create("a")
+    assert registry.maybe_evict() == []
+    registry.sweep_interval = 0
+    assert registry.maybe_evict() == ["a"]
+
+
+def test_draft_formats_and_traded_picks():
+    room = DraftRoom("d1")
+    for i in range(4):
+        room.register_team(f"Team {i}")
+    with pytest.raises(DraftError):
+        room.start_draft(fmt="auction")
+    assert not room.draft_started
+    order = ["Team 0", "Team 1", "Team 2", "Team 3"]
+    assert room.start_draft(order, fmt="linear").message["format"] == "linear"
+    room.pick_player("Team 0", "Player 1")
+    with pytest.raises(DraftError, match="not yet made"):
+        room.trade_pick(0, "Team 1")
+    with pytest.raises(DraftError, match="already owns"):
+        room.trade_pick(1, "Team 1")
+    with pytest.raises(DraftError) as exc:
+        room.trade_pick(1, "Nobody")
+    assert exc.value.status_code == 404
+    event = room.trade_pick(1, "Team 3").message
+    assert (event["overall"], event["from_team"], event["to_team"], event["next_team"]) == (1, "Team 1", "Team 3", "Team 3")
+    # Linear: Team 0 picks first in every round
+    assert room.next_picks("Team 0", 3) == [4, 8, 12]
+    assert room.picks_until("Team 1") == 4
+
+    rebuilt = DraftRoom.from_record(room.to_record())
+    replayed = DraftRoom("d1")
+    for payload in room.events.events:
+        replayed.apply(payload.message)
+    for copy in (rebuilt, replayed):
+        assert copy.schedule.owners == room.schedule.owners
+        assert copy.schedule.format == "linear"
+        assert copy.get_next_team() == "Team 3"
+
+    room.autocomplete()
+    assert room.get_next_team() is None
+    with pytest.raises(DraftError, match="not in progress"):
+        room.trade_pick(19, "Team 0")
+
+
+def test_keepers_are_picked_when_their_pick_comes_up():
+    room = DraftRoom("d1")
+    for i in range(4):
+        room.register_team(f"Team {i}")
+    with pytest.raises(DraftError, match="not in progress"):
+        room.keep_player("Team 0", "Player 1", 1)
+    room.start_draft(["Team 0", "Team 1", "Team 2", "Team 3"])
+    event = room.keep_player("Team 1", "Player 1", 2).message
+    # Snake: Team 1 picks 7th overall in round 2
+    assert (event["type"], event["overall"], event["round"], event["next_team"]) == ("keeper", 6, 1, "Team 0")
+    assert "Player 1" not in room.players
+    assert room.state()["keepers"] == {"Player 1": "Team 1"}
+    with pytest.raises(DraftError, match="Player not available"):
+        room.keep_player("Team 2", "Player 1", 2)
+    with pytest.raises(DraftError, match="no pick left in round 2"):
+        room.keep_player("Team 1", "Player 2", 2)
+    with pytest.raises(DraftError, match="no pick left in round 9"):
+        room.keep_player("Team 1", "Player 2", 9)
+    with pytest.raises(DraftError) as exc:
+        room.keep_player("Nobody", "Player 2", 1)
+    assert exc.value.status_code == 404
+    with pytest.raises(DraftError, match="keeper cannot be traded"):
+        room.trade_pick(6, "Team 0")
+
+    for player in ("Player 2", "Player 3", "Player 4", "Player 5", "Player 6", "Player 7"):
+        room.pick_player(room.get_next_team(), player)
+    assert room.get_next_team() == "Team 1" and room.auto_on_clock
+    with pytest.raises(DraftError, match="keeps Player 1"):
+        room.pick_player("Team 1", "Player 8")
+    rebuilt = DraftRoom.from_record(room.to_record())
+    replayed = DraftRoom("d1")
+    for payload in room.events.events:
+        replayed.apply(payload.message)
+    for copy in (room, rebuilt, replayed):
+        assert copy.keepers == {6: "Player 1"}
+        assert "Player 1" not in copy.players
+        assert copy.auto_pick().message["player"] == "Player 1"
+        assert copy.draft_results["Team 1"] == ["Player 3", "Player 1"]
+        assert copy.state()["keepers"] == {}
+
+
+def test_batch_runs_every_command_or_none():
+    room = DraftRoom("d1")
+    room.register_team("Team 0")
+    commands = [{"type": "register_team", "team": f"Team {i}"} for i in (1, 2, 3)] + [
+        {"type": "start_draft", "order": ["Team 3", "Team 2", "Team 1", "Team 0"], "format": "linear"},
+        {"type": "keeper", "team": "Team 2", "player": "Player 9", "round": 1},
+        {"type": "pick", "team": "Team 3", "player": "Player 1"},
+        {"type": "pick", "team": "Team 1", "player": "Player 2"},
+    ]
+    events = room.run_batch(commands)
+    # The keeper is picked as soon as Team 2 is on the clock
+    assert [event.message["type"] for event in events] == [
+        "team_registered", "team_registered", "team_registered", "draft_started", "keeper", "pick", "pick", "pick"]
+    assert [event.message["seq"] for event in events] == list(range(2, 10))
+    assert room.pick_history == [(0, "Team 3", "Player 1"), (1, "Team 2", "Player 9"), (2, "Team 1", "Player 2")]
+    assert room.get_next_team() == "Team 0"
+    assert room.events.events[-1] is events[-1]
+
+    before = room.to_record()
+    with pytest.raises(DraftError) as exc:
+        room.run_batch([{"type": "pick", "team": "Team 0", "player": "Player 3"},
+                        {"type": "pick", "team": "Team 0", "player": "Player 4"}])
+    assert exc.value.detail == "Command 2 (pick): Not your turn!"
+    with pytest.raises(DraftError, match=r"Command 1 \(keeper\): missing round"):
+        room.run_batch([{"type": "keeper", "team": "Team 0", "player": "Player 4"}])
+    with pytest.raises(DraftError, match="Unknown command: skip"):
+        room.run_batch([{"type": "skip"}])
+    with pytest.raises(DraftError) as exc:
+        room.run_batch([{"type": "keeper", "team": "Nobody", "player": "Player 4", "round": 2}])
+    assert exc.value.status_code == 404
+    assert room.to_record() == before
+    assert "Player 3" in room.players
+
+
+def test_batch_makes_auto_picks_between_commands():
+    room = DraftRoom("d1")
+    for i in range(4):
+        room.register_team(f"Team {i}")
+    room.set_auto("Team 1")
+    events = room.run_batch([
+        {"type": "start_draft", "order": ["Team 0", "Team 1", "Team 2", "Team 3"]},
+        {"type": "pick", "team": "Team 0", "player": "Player 1"},
+        {"type": "pick", "team": "Team 2", "player": "Player 3"},
+    ])
+    assert [(e.message["type"], e.message.get("team")) for e in events] == [
+        ("draft_started", None), ("pick", "Team 0"), ("pick", "Team 1"), ("pick", "Team 2")]
+    assert room.draft_results["Team 1"] == ["Player 2"]
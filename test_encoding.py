@@ -0,0 +1,50 @@
+import json
+
+import pytest
+
+from encoding import ENCODERS, Encoder, Payload, get_encoder, negotiate
+
+
+def test_stdlib_json_is_compact():
+    assert get_encoder("json").dumps({"a": [1, 2]}) == '{"a":[1,2]}'
+    assert not get_encoder("json").binary
+
+
+def test_orjson_encoder_matches_stdlib():
+    pytest.importorskip("orjson")
+    message = {"type": "pick", "seq": 3, "team": "Team Ä", "player": "Player 1"}
+    assert json.loads(get_encoder("orjson").dumps(message)) == message
+
+
+def test_unknown_encoder():
+    with pytest.raises(ValueError):
+        get_encoder("yaml")
+
+
+def test_negotiate_defaults_to_json():
+    default = ENCODERS["json"]
+    assert negotiate([], default) == (None, default)
+    assert negotiate(["chat", "json"], default) == ("json", default)
+    # Text encoders are a server-side choice, not a wire format
+    assert negotiate(["orjson"], default) == (None, default)
+
+
+def test_negotiate_binary_format(monkeypatch):
+    binary = Encoder("msgpack", True, bytes)
+    monkeypatch.setitem(ENCODERS, "msgpack", binary)
+    assert negotiate(["msgpack", "json"], ENCODERS["json"]) == ("msgpack", binary)
+
+
+def test_payload_caches_per_encoder():
+    calls = []
+
+    def dumps(message):
+        calls.append(message)
+        return "x"
+
+    counting = Encoder("counting", False, dumps)
+    payload = Payload({"seq": 1})
+    assert payload.encode(counting) == "x"
+    assert payload.encode(counting) == "x"
+    assert payload.encode(ENCODERS["json"]) == '{"seq":1}'
+    assert len(calls) == 1
@@ -0,0 +1,139 @@
+import os
+import time
+
+from draft_room import DraftRoom
+from event_store import SNAPSHOT_FILE, EventStore
+
+
+def without_teams(state):
+    """Team lists come from a set, so their order is not stable across rebuilds."""
+    return {k: v for k, v in state.items() if k != "registered_teams"}
+
+
+def open_store(path, **kwargs):
+    store = EventStore(str(path), flush_interval=0.001, **kwargs)
+    return store, store.open()
+
+
+def test_events_survive_restart(tmp_path):
+    store, recovered = open_store(tmp_path)
+    assert recovered.drafts == [] and recovered.tail == []
+    store.append("a", {"type": "team_registered", "seq": 1, "team": "A"})
+    store.append("b", {"type": "team_registered", "seq": 1, "team": "B"})
+    assert store.flush(timeout=1)
+    store.close()
+
+    store, recovered = open_store(tmp_path)
+    assert recovered.tail == [
+        ("a", {"type": "team_registered", "seq": 1, "team": "A"}),
+        ("b", {"type": "team_registered", "seq": 1, "team": "B"}),
+    ]
+    # Numbering continues after the recovered log
+    assert store.append("a", {"type": "team_registered", "seq": 2, "team": "C"}) == 3
+    store.close()
+
+
+def test_snapshot_truncates_log(tmp_path):
+    store, _ = open_store(tmp_path, snapshot_every=2)
+    store.append("a", {"seq": 1})
+    assert not store.should_snapshot()
+    store.append("a", {"seq": 2})
+    assert store.should_snapshot()
+    store.snapshot([{"draft_id": "a", "seq": 2}])
+    assert not store.should_snapshot()
+    store.append("a", {"seq": 3})
+    store.close()
+
+    segments = [n for n in os.listdir(tmp_path) if n.startswith("log-")]
+    assert segments == ["log-000000000003.jsonl"]
+    assert os.path.exists(tmp_path / SNAPSHOT_FILE)
+
+    store, recovered = open_store(tmp_path)
+    assert recovered.drafts == [{"draft_id": "a", "seq": 2}]
+    assert recovered.tail == [("a", {"seq": 3})]
+    assert recovered.seconds >= 0
+    store.close()
+
+
+def test_torn_last_line_is_ignored(tmp_path):
+    store, _ = open_store(tmp_path)
+    store.append("a", {"seq": 1})
+    store.close()
+    segment, = [n for n in os.listdir(tmp_path) if n.startswith("log-")]
+    with open(tmp_path / segment, "a") as f:
+        f.write('{"lsn": 2, "draft": "a", "ev')
+
+    store, recovered = open_store(tmp_path)
+    assert recovered.tail == [("a", {"seq": 1})]
+    store.close()
+
+
+def test_write_retried_after_a_failure_is_not_duplicated(tmp_path, monkeypatch):
+    import event_store
+    fsync = os.fsync
+    failures = [OSError("I/O error")]
+
+    def failing_fsync(fd):
+        if failures:
+            raise failures.pop()
+        fsync(fd)
+
+    monkeypatch.setattr(event_store.os, "fsync", failing_fsync)
+    store, _ = open_store(tmp_path)
+    store.append("a", {"seq": 1})
+    store.append("a", {"seq": 2})
+    for _ in range(500):
+        if store.durable_lsn == 2:
+            break
+        time.sleep(0.01)
+    store.close()
+    assert store.error is None
+
+    store, recovered = open_store(tmp_path)
+    assert recovered.tail == [("a", {"seq": 1}), ("a", {"seq": 2})]
+    store.close()
+
+
+def test_line_torn_by_a_failed_write_is_skipped(tmp_path):
+    store, _ = open_store(tmp_path)
+    store.append("a", {"seq": 1})
+    store.flush(timeout=5)
+    segment = store._segment.name
+    with open(segment, "a") as f:
+        f.write('{"lsn": 2, "draft": "a", "ev')
+    store._torn = True
+    store.append("a", {"seq": 2})
+    store.close()
+
+    store, recovered = open_store(tmp_path)
+    assert recovered.tail == [("a", {"seq": 1}), ("a", {"seq": 2})]
+    store.close()
+
+
+def test_room_record_round_trip():
+    room = DraftRoom("r")
+    for i in range(4):
+        room.register_team(f"Team {i}")
+    room.start_draft()
+    for player in ("Player 3", "Player 1", "Player 2", "Player 9", "Player 4"):
+        room.pick_player(room.get_next_team(), player)
+
+    restored = DraftRoom.from_record(room.to_record())
+    assert without_teams(restored.state()) == without_teams(room.state())
+    assert restored.registered_teams == room.registered_teams
+    assert restored.events.seq == room.events.seq
+    assert "Player 9" not in restored.players
+
+
+def test_replaying_events_rebuilds_room():
+    room = DraftRoom("r")
+    for i in range(4):
+        room.register_team(f"Team {i}")
+    room.start_draft()
+    room.pick_player(room.get_next_team(), "Player 5")
+
+    replayed = DraftRoom("r")
+    for event in room.events.since(0):
+        replayed.apply(event.message)
+    assert without_teams(replayed.state()) == without_teams(room.state())
+    assert replayed.registered_teams == room.registered_teams
@@ -0,0 +1,35 @@
+from events import EventLog
+
+
+def test_sequence_numbers_increase():
+    log = EventLog()
+    first = log.append("team_registered", team="A")
+    second = log.append("team_registered", team="B")
+    assert first.message == {"type": "team_registered", "seq": 1, "team": "A"}
+    assert second.message["seq"] == 2
+    assert log.seq == 2
+
+
+def test_since_returns_only_missed_events():
+    log = EventLog()
+    for i in range(5):
+        log.append("pick", pick=i)
+    assert [e.message["seq"] for e in log.since(2)] == [3, 4, 5]
+    assert log.since(5) == []
+    assert len(log.since(0)) == 5
+
+
+def test_since_outside_buffer_needs_snapshot():
+    log = EventLog(maxlen=3)
+    for i in range(5):
+        log.append("pick", pick=i)
+    assert [e.message["seq"] for e in log.since(2)] == [3, 4, 5]
+    assert log.since(1) is None
+    assert log.since(6) is None
+    assert log.since(-1) is None
+
+
+def test_empty_log():
+    log = EventLog()
+    assert log.since(0) == []
+    assert log.since(1) is None
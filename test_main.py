@@ -1,6 +1,12 @@
 import pytest
 from fastapi.testclient import TestClient
+from starlette.websockets import WebSocketDisconnect
 from main import app, reset_state
+from draft_room import DEFAULT_DRAFT_ID, DraftError
+from event_store import EventStore
+from sqlite_storage import SQLiteStorage
+from storage import MemoryStorage
+import asyncio
 import json
 
 client = TestClient(app)
@@ -17,6 +23,39 @@ def test_root_endpoint():
     assert response.status_code == 200
     assert response.headers["content-type"] == "text/html; charset=utf-8"
 
+def test_static_files_are_compressed_and_cacheable():
+    import main
+    page = client.get("/", headers={"Accept-Encoding": "gzip"})
+    assert page.headers["content-encoding"] == "gzip"
+    assert b"<html" in page.content
+    assert client.get("/", headers={"If-None-Match": page.headers["etag"]}).status_code == 304
+    hashed = client.get(main.assets.url("index.html"))
+    assert hashed.headers["cache-control"] == "public, max-age=31536000, immutable"
+    assert client.get("/static/index.html").headers["cache-control"] == "no-cache"
+    assert client.get("/static/missing.js").status_code == 404
+
+def test_health_and_readiness():
+    assert client.get("/healthz").json() == {"status": "ok"}
+    # Without the lifespan nothing has been recovered or started yet
+    response = client.get("/readyz")
+    assert response.status_code == 503
+    assert response.headers["retry-after"] == "1"
+    with TestClient(app) as live_client:
+        ready = live_client.get("/readyz")
+        assert ready.status_code == 200
+        assert ready.json()["status"] == "ready"
+        assert ready.json()["startup_seconds"] >= 0
+        assert metric("draft_startup_seconds") > 0
+    assert client.get("/readyz").status_code == 503
+
+def test_not_ready_while_storage_fails(monkeypatch):
+    import main
+    with TestClient(app) as live_client:
+        monkeypatch.setattr(main.storage, "error", OSError("No space left on device"), raising=False)
+        response = live_client.get("/readyz")
+        assert response.status_code == 503
+        assert response.json()["detail"] == "Storage is failing: No space left on device"
+
 def test_register_team():
     """Test team registration functionality"""
     # Test successful registration
@@ -176,8 +215,9 @@ def test_start_draft_wrong_team_count():
     assert resp.json()["detail"] == "Need exactly 4 teams to start"
     reset_state()
     
-    # Too many teams - directly modify the registered_teams set
-    from main import registered_teams
+    # Too many teams - directly modify the room's registered_teams set
+    from main import default_room
+    registered_teams = default_room().registered_teams
     for i in range(5):
         registered_teams.add(f"Team {i}")
     resp = client.post("/start_draft")
@@ -215,6 +255,769 @@ def test_draft_order_and_rounds():
     status = client.get("/get_status").json()
     assert status["round"] == 2
 
+def default_room_for_test():
+    from main import default_room
+    return default_room()
+
+def register_and_start_with(test_client, prefix=""):
+    for i in range(4):
+        test_client.post(f"{prefix}/register_team", json={"team_name": f"Team {i}"})
+    return test_client.post(f"{prefix}/start_draft")
+
+def register_and_start(prefix=""):
+    return register_and_start_with(client, prefix)
+
+def test_drafts_are_isolated():
+    """Each draft id gets its own independent room"""
+    assert register_and_start("/drafts/a").status_code == 200
+    client.post("/drafts/b/register_team", json={"team_name": "Team 0"})
+
+    status_a = client.get("/drafts/a/get_status").json()
+    status_b = client.get("/drafts/b/get_status").json()
+    assert status_a["draft_started"] is True
+    assert status_b["draft_started"] is False
+    assert status_b["registered_teams"] == ["Team 0"]
+
+    resp = client.post(f"/drafts/a/pick_player/{status_a['next_team']}/Player 1")
+    assert resp.status_code == 200
+    assert client.get("/drafts/a/get_status").json()["pick"] == 1
+    # The default draft is untouched by named drafts
+    assert client.get("/get_status").json()["registered_teams"] == []
+
+def test_list_players():
+    resp = client.get("/players", params={"limit": 3})
+    assert resp.status_code == 200
+    data = resp.json()
+    assert [p["name"] for p in data["players"]] == ["Player 1", "Player 2", "Player 3"]
+    assert data["next_cursor"] == 3
+    assert data["available"] == 20
+
+    register_and_start()
+    status = client.get("/get_status").json()
+    client.post(f"/pick_player/{status['next_team']}/Player 4")
+    data = client.get("/players", params={"cursor": 3, "limit": 3}).json()
+    assert [p["name"] for p in data["players"]] == ["Player 5", "Player 6", "Player 7"]
+    assert data["available"] == 19
+
+    data = client.get("/players", params={"position": "QB", "q": "player 1"}).json()
+    assert [p["name"] for p in data["players"]] == ["Player 1", "Player 13", "Player 17"]
+    assert data["next_cursor"] is None
+
+    assert client.get("/players", params={"limit": 0}).status_code == 422
+    assert client.get("/drafts/missing/players").status_code == 404
+    client.post("/drafts/x/register_team", json={"team_name": "Team 0"})
+    assert len(client.get("/drafts/x/players").json()["players"]) == 20
+
+def test_drafts_recovered_after_restart(tmp_path, monkeypatch):
+    """With an event store, drafts are rebuilt from disk on startup"""
+    import main
+    monkeypatch.setattr(main, "storage", EventStore(str(tmp_path), flush_interval=0.001, snapshot_every=5))
+    with TestClient(app) as live_client:
+        register_and_start_with(live_client, "/drafts/kept")
+        status = live_client.get("/drafts/kept/get_status").json()
+        live_client.post(f"/drafts/kept/pick_player/{status['next_team']}/Player 1")
+        before = live_client.get("/drafts/kept/get_status").json()
+        before["registered_teams"].sort()
+
+    # Simulate a process restart: fresh registry, fresh store on the same directory
+    reset_state()
+    monkeypatch.setattr(main, "storage", EventStore(str(tmp_path), flush_interval=0.001))
+    with TestClient(app) as live_client:
+        after = live_client.get("/drafts/kept/get_status").json()
+        after["registered_teams"].sort()
+        assert after == before
+        players = live_client.get("/drafts/kept/players").json()
+        assert players["available"] == 19
+
+@pytest.mark.parametrize("backend", ["file", "sqlite"])
+def test_evicted_drafts_stay_gone_after_restart(tmp_path, monkeypatch, backend):
+    """An evicted draft is not recovered, and a new draft reusing its id is not mixed up with it"""
+    import main
+    import time
+    monkeypatch.setattr(main, "storage", main.create_storage(backend, str(tmp_path)))
+    with TestClient(app) as live_client:
+        live_client.post("/drafts/x/register_team", json={"team_name": "Old"})
+        live_client.post("/drafts/gone/register_team", json={"team_name": "Gone"})
+        assert main.registry.evict_idle(time.monotonic() + main.registry.idle_timeout + 1) == ["x", "gone"]
+        live_client.post("/drafts/x/register_team", json={"team_name": "New"})
+        assert live_client.get("/drafts/x/get_status").json()["registered_teams"] == ["New"]
+
+    reset_state()
+    monkeypatch.setattr(main, "storage", main.create_storage(backend, str(tmp_path)))
+    with TestClient(app) as live_client:
+        assert live_client.get("/drafts/x/get_status").json()["registered_teams"] == ["New"]
+        assert live_client.get("/drafts/gone/get_status").status_code == 404
+
+POOL_CSV = "name,position,team,rank,projection\n" + "".join(
+    f"Star {i},{'QB' if i % 4 == 0 else 'RB'},T{i % 8},{i},{300 - i}\n" for i in range(1, 41)
+)
+
+def test_import_pool_and_draft_from_it():
+    resp = client.post("/pools/nfl", content=POOL_CSV, headers={"content-type": "text/csv"})
+    assert resp.json() == {"message": "Pool nfl imported", "pool": "nfl", "players": 40,
+                           "positions": {"RB": 30, "QB": 10}}
+    assert client.get("/pools/nfl").json()["players"] == 40
+    assert client.get("/pools/default").json()["players"] == 20
+    assert client.get("/pools/nope").status_code == 404
+
+    # Two drafts share the pool; picks in one do not affect the other
+    for prefix in ("/drafts/a", "/drafts/b"):
+        assert client.put(f"{prefix}/pool", json={"pool": "nfl"}).json()["players"] == 40
+    register_and_start("/drafts/a")
+    team = client.get("/drafts/a/get_status").json()["next_team"]
+    assert client.post(f"/drafts/a/pick_player/{team}/Star 1").status_code == 200
+    assert client.get("/drafts/a/players", params={"limit": 1}).json()["players"][0]["name"] == "Star 2"
+    page = client.get("/drafts/b/players", params={"limit": 1}).json()
+    assert page["available"] == 40
+    assert page["players"][0] == {"id": 0, "name": "Star 1", "position": "RB", "team": "T1", "rank": 1,
+                                  "projection": 299.0}
+    assert client.get("/drafts/b/get_status").json()["pool"] == "nfl"
+
+    assert client.put("/drafts/a/pool", json={"pool": "nfl"}).json()["detail"] == "Draft has already started"
+    assert client.put("/pool", json={"pool": "missing"}).status_code == 404
+    assert client.put("/pool", json={"pool": "nfl"}).status_code == 200
+
+def test_pool_selection_is_broadcast():
+    client.post("/pools/nfl", params={"format": "csv"}, content=POOL_CSV)
+    with client.websocket_connect("/ws") as websocket:
+        websocket.receive_json()
+        client.put("/pool", json={"pool": "nfl"})
+        event = websocket.receive_json()
+        assert (event["type"], event["pool"], event["players"]) == ("pool_selected", "nfl", 40)
+
+def test_import_pool_errors():
+    assert client.post("/pools/nfl", content=POOL_CSV).status_code == 415
+    assert client.post("/pools/-nfl", params={"format": "csv"}, content=POOL_CSV).status_code == 400
+    resp = client.post("/pools/nfl", params={"format": "jsonl"}, content='{"name": "A"}\n{"rank": 2}\n')
+    assert resp.status_code == 422
+    assert resp.json()["detail"] == "Invalid player data: line 2: name is required"
+    assert client.get("/pools/nfl").status_code == 404
+    client.post("/pools/nfl", content='{"name": "A"}\n', headers={"content-type": "application/x-ndjson"})
+    assert client.post("/pools/nfl", params={"format": "csv"}, content=POOL_CSV).status_code == 409
+    assert client.post("/pools/default", params={"format": "csv"}, content=POOL_CSV).status_code == 409
+
+def test_pool_drafts_recovered_after_restart(tmp_path, monkeypatch):
+    """Drafts using an imported pool come back with it after a restart"""
+    import main
+    from player_import import PoolStore
+    monkeypatch.setattr(main, "pools", PoolStore(str(tmp_path / "pools")))
+    monkeypatch.setattr(main, "storage", EventStore(str(tmp_path / "events"), flush_interval=0.001))
+    with TestClient(app) as live_client:
+        live_client.post("/pools/nfl", params={"format": "csv"}, content=POOL_CSV)
+        live_client.put("/drafts/kept/pool", json={"pool": "nfl"})
+        register_and_start_with(live_client, "/drafts/kept")
+        team = live_client.get("/drafts/kept/get_status").json()["next_team"]
+        live_client.post(f"/drafts/kept/pick_player/{team}/Star 1")
+
+    reset_state()
+    monkeypatch.setattr(main, "storage", EventStore(str(tmp_path / "events"), flush_interval=0.001))
+    with TestClient(app) as live_client:
+        assert live_client.get("/drafts/kept/get_status").json()["pool"] == "nfl"
+        assert live_client.get("/drafts/kept/players").json()["available"] == 39
+
+def test_status_etag_and_conditional_requests():
+    first = client.get("/get_status")
+    etag = first.headers["etag"]
+    assert first.headers["cache-control"] == "no-cache"
+    assert first.json()["seq"] == 0
+    for header in (etag, f"W/{etag}", f'"other", {etag}', "*"):
+        resp = client.get("/get_status", headers={"If-None-Match": header})
+        assert (resp.status_code, resp.content, resp.headers["etag"]) == (304, b"", etag)
+    assert client.get("/get_status", headers={"If-None-Match": '"other"'}).status_code == 200
+
+    client.post("/register_team", json={"team_name": "Team A"})
+    resp = client.get("/get_status", headers={"If-None-Match": etag})
+    assert resp.status_code == 200
+    assert resp.headers["etag"] != etag
+    assert resp.json()["registered_teams"] == ["Team A"]
+    assert client.get("/drafts/missing/get_status").status_code == 404
+
+@pytest.mark.asyncio
+async def test_status_long_poll():
+    import httpx
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as async_client:
+        # Already past `since`: answered at once
+        await async_client.post("/register_team", json={"team_name": "Team A"})
+        resp = await async_client.get("/get_status", params={"since": 0})
+        assert resp.json()["seq"] == 1
+
+        # Nothing changes: 304 once the timeout passes
+        resp = await async_client.get("/get_status", params={"since": 1, "timeout": 0.05})
+        assert resp.status_code == 304
+
+        # Every waiting poller is answered by the next event
+        polls = [asyncio.ensure_future(async_client.get("/get_status", params={"since": 1})) for _ in range(3)]
+        await asyncio.sleep(0.05)
+        assert not any(poll.done() for poll in polls)
+        await async_client.post("/register_team", json={"team_name": "Team B"})
+        responses = await asyncio.wait_for(asyncio.gather(*polls), 5)
+        assert [r.json()["seq"] for r in responses] == [2, 2, 2]
+        assert len({r.headers["etag"] for r in responses}) == 1
+        assert (await async_client.get("/get_status", params={"timeout": 61})).status_code == 422
+
+def test_remote_status_long_poll(monkeypatch):
+    import main
+    monkeypatch.setattr(main, "cluster", LoopbackCluster())
+    client.post("/drafts/a/register_team", json={"team_name": "Team A"})
+    resp = client.get("/drafts/a/get_status")
+    assert resp.json()["registered_teams"] == ["Team A"]
+    assert client.get("/drafts/a/get_status", headers={"If-None-Match": resp.headers["etag"]}).status_code == 304
+    assert client.get("/drafts/a/get_status", params={"since": 1, "timeout": 0.01}).status_code == 304
+
+def metric(name):
+    """A sample's value from /metrics, 0 if it is not there yet."""
+    for line in client.get("/metrics").text.splitlines():
+        if line.startswith(name + " "):
+            return float(line.split()[-1])
+    return 0.0
+
+def test_metrics_endpoint():
+    picks = metric("draft_picks_total")
+    not_your_turn = metric('draft_pick_rejections_total{reason="Not your turn!"}')
+    status_calls = metric('draft_requests_total{method="GET",route="/get_status",status="200"}')
+    register_and_start()
+    status = client.get("/get_status").json()
+    order = [status["next_team"]] + [t for t in status["registered_teams"] if t != status["next_team"]]
+    client.post(f"/pick_player/{order[1]}/Player 1")
+    client.post(f"/pick_player/{order[0]}/Player 1")
+    next_team = client.get("/get_status").json()["next_team"]
+    client.post(f"/pick_player/{next_team}/Player 1")
+    with client.websocket_connect("/ws") as websocket:
+        websocket.receive_json()
+        resp = client.get("/metrics")
+        assert resp.headers["content-type"].startswith("text/plain; version=0.0.4")
+        assert metric("draft_ws_connections") == 1
+        assert metric("draft_rooms") == 1
+    assert metric("draft_picks_total") == picks + 1
+    assert metric('draft_pick_rejections_total{reason="Not your turn!"}') == not_your_turn + 1
+    assert metric('draft_pick_rejections_total{reason="Player not available!"}') >= 1
+    assert metric('draft_requests_total{method="GET",route="/get_status",status="200"}') == status_calls + 2
+    assert metric('draft_request_duration_seconds_count{method="POST",route="/pick_player/{team}/{player}"}') >= 3
+    assert metric('draft_broadcast_duration_seconds_count') >= 6
+    assert metric("draft_ws_sent_bytes_total") > 0
+
+def test_profiler_endpoints(monkeypatch):
+    resp = client.post("/debug/profiler/start")
+    assert resp.status_code == 404
+    monkeypatch.setenv("DRAFT_PROFILER", "1")
+    assert client.post("/debug/profiler/stop").status_code == 409
+    assert client.post("/debug/profiler/start", params={"interval": 0.001}).json()["interval"] == 0.001
+    assert client.post("/debug/profiler/start").status_code == 409
+    for _ in range(20):
+        client.get("/get_status")
+    resp = client.post("/debug/profiler/stop")
+    assert resp.headers["content-type"].startswith("text/plain")
+    assert client.post("/debug/profiler/flame").status_code == 404
+
+def test_create_storage(tmp_path):
+    from main import create_storage
+    assert isinstance(create_storage(None, None), MemoryStorage)
+    assert isinstance(create_storage(None, str(tmp_path)), EventStore)
+    assert isinstance(create_storage("file", str(tmp_path)), EventStore)
+    sqlite = create_storage("sqlite", str(tmp_path / "db"))
+    assert isinstance(sqlite, SQLiteStorage)
+    assert sqlite.path == str(tmp_path / "db" / "drafts.db")
+    with pytest.raises(ValueError):
+        create_storage("sqlite", None)
+    with pytest.raises(ValueError):
+        create_storage("redis", str(tmp_path))
+
+def test_sqlite_storage_recovers_drafts(tmp_path, monkeypatch):
+    import main
+    path = str(tmp_path / "drafts.db")
+    monkeypatch.setattr(main, "storage", SQLiteStorage(path, flush_interval=0.001))
+    with TestClient(app) as live_client:
+        register_and_start_with(live_client, "/drafts/q")
+        status = live_client.get("/drafts/q/get_status").json()
+        live_client.post(f"/drafts/q/pick_player/{status['next_team']}/Player 2")
+
+    reset_state()
+    monkeypatch.setattr(main, "storage", SQLiteStorage(path, flush_interval=0.001))
+    with TestClient(app) as live_client:
+        status = live_client.get("/drafts/q/get_status").json()
+        assert status["pick"] == 1
+        assert status["draft_started"] is True
+
+def test_get_status_is_cached_until_next_change():
+    room = default_room_for_test()
+    first = room.status()
+    assert room.status() is first
+    client.post("/register_team", json={"team_name": "Team A"})
+    second = room.status()
+    assert second is not first
+    assert second["seq"] == first["seq"] + 1
+    assert second["registered_teams"] == ["Team A"]
+
+def test_unknown_draft_returns_404():
+    assert client.get("/drafts/missing/get_status").status_code == 404
+    assert client.post("/drafts/missing/start_draft").status_code == 404
+    resp = client.post("/drafts/missing/pick_player/Team 0/Player 1")
+    assert resp.status_code == 404
+    assert resp.json()["detail"] == "Draft not found"
+
+def test_websocket_only_receives_own_draft():
+    """A socket connected to one draft is not notified about another"""
+    # Share one event loop between the socket and the requests
+    with TestClient(app) as live_client:
+        live_client.post("/drafts/a/register_team", json={"team_name": "Team A"})
+        with live_client.websocket_connect("/drafts/a/ws") as ws_a:
+            snapshot = ws_a.receive_json()
+            assert snapshot["type"] == "snapshot"
+            assert snapshot["registered_teams"] == ["Team A"]
+            live_client.post("/drafts/b/register_team", json={"team_name": "Team B"})
+            live_client.post("/drafts/a/register_team", json={"team_name": "Team A2"})
+            event = ws_a.receive_json()
+            assert event == {"type": "team_registered", "seq": 2, "team": "Team A2", "can_start_draft": False}
+
+def test_websocket_resume_and_snapshot_request():
+    """Reconnecting with last_seq replays only missed events; snapshots on demand"""
+    with TestClient(app) as live_client:
+        register_and_start_with(live_client)
+        status = live_client.get("/get_status").json()
+        live_client.post(f"/pick_player/{status['next_team']}/Player 1")
+
+        with live_client.websocket_connect("/ws?last_seq=4") as ws:
+            started = ws.receive_json()
+            pick = ws.receive_json()
+            assert (started["type"], started["seq"]) == ("draft_started", 5)
+            assert (pick["type"], pick["seq"], pick["player"]) == ("pick", 6, "Player 1")
+
+            ws.send_text("not json")
+            ws.send_json({"type": "snapshot"})
+            snapshot = ws.receive_json()
+            assert snapshot["type"] == "snapshot"
+            assert snapshot["seq"] == 6
+            assert "Player 1" not in snapshot["remaining_players"]
+
+def test_websocket_negotiates_json_subprotocol():
+    with client.websocket_connect("/ws", subprotocols=["unknown", "json"]) as ws:
+        assert ws.accepted_subprotocol == "json"
+        assert ws.receive_json()["type"] == "snapshot"
+
+def test_websocket_unknown_draft_is_rejected():
+    """Connecting to a draft that does not exist does not create it"""
+    with pytest.raises(WebSocketDisconnect) as exc:
+        with client.websocket_connect("/drafts/nope/ws"):
+            pass
+    assert exc.value.code == 1008
+    assert client.get("/drafts/nope/get_status").status_code == 404
+
+def test_auto_pick_endpoints():
+    register_and_start()
+    status = client.get("/get_status").json()
+    order = [status["next_team"]]
+    # Every team but the one on the clock picks automatically
+    others = [f"Team {i}" for i in range(4) if f"Team {i}" != order[0]]
+    resp = client.put(f"/teams/{others[0]}/queue", json={"players": ["Player 20"]})
+    assert resp.json() == {"message": f"Queue set for {others[0]}", "players": ["Player 20"]}
+    for team in others:
+        assert client.post(f"/teams/{team}/auto", json={}).status_code == 200
+    resp = client.post(f"/pick_player/{order[0]}/Player 1")
+    # The auto teams picked through the rest of round 1 and the start of the
+    # snake's round 2, until the first team was back on the clock
+    assert resp.json()["next_team"] == order[0]
+    status = client.get("/get_status").json()
+    assert (status["round"], status["pick"]) == (2, 7)
+    assert sorted(status["auto_teams"]) == sorted(others)
+    assert client.get("/players", params={"q": "Player 20"}).json()["players"] == []
+
+    resp = client.post("/autocomplete")
+    assert resp.json() == {"message": "Draft completed", "picks": 13}
+    assert client.post("/autocomplete").status_code == 400
+    assert client.post("/teams/Nobody/auto", json={"enabled": False}).status_code == 404
+
+def test_auto_pick_for_draft_with_team_on_clock():
+    register_and_start("/drafts/a")
+    team = client.get("/drafts/a/get_status").json()["next_team"]
+    client.put(f"/drafts/a/teams/{team}/queue", json={"players": ["Player 3"]})
+    resp = client.post(f"/drafts/a/teams/{team}/auto", json={"enabled": True})
+    assert resp.json() == {"message": f"Auto-pick enabled for {team}"}
+    status = client.get("/drafts/a/get_status").json()
+    assert status["pick"] == 1
+    assert client.post("/drafts/a/autocomplete").json()["picks"] == 19
+
+def test_auto_picks_run_after_start():
+    for i in range(4):
+        client.post("/register_team", json={"team_name": f"Team {i}"})
+    for i in range(4):
+        client.post(f"/teams/Team {i}/auto", json={})
+    client.post("/start_draft")
+    status = client.get("/get_status").json()
+    assert (status["round"], status["pick"]) == (6, 20)
+
+def test_pick_clock_endpoints():
+    register_and_start()
+    resp = client.post("/clock/start", json={"seconds": 60, "on_expiry": "skip"})
+    assert resp.status_code == 200
+    assert resp.json()["clock"]["state"] == "running"
+    assert client.post("/clock/pause").json()["clock"]["state"] == "paused"
+    paused = client.get("/get_status").json()["clock"]["remaining"]
+    assert 59 < paused <= 60
+    resp = client.post("/clock/extend", json={"seconds": 30})
+    assert resp.json()["clock"]["remaining"] == pytest.approx(paused + 30)
+    assert client.post("/clock/resume").json()["clock"]["state"] == "running"
+    resp = client.post("/clock/extend", json={"seconds": 5})
+    assert resp.json()["clock"]["remaining"] > 90
+    assert client.post("/clock/cancel").json()["message"] == "Pick clock stopped"
+    assert client.post("/clock/cancel").status_code == 400
+    assert client.post("/clock/rewind").status_code == 404
+
+def test_pick_resets_clock():
+    import main
+    register_and_start("/drafts/a")
+    client.post("/drafts/a/clock/start", json={"seconds": 60})
+    status = client.get("/drafts/a/get_status").json()
+    client.post(f"/drafts/a/pick_player/{status['next_team']}/Player 1")
+    status = client.get("/drafts/a/get_status").json()
+    assert status["clock"]["remaining"] == 60
+    assert main.clocks.remaining("a") > 59
+
+def test_expired_clock_auto_picks_or_skips():
+    with TestClient(app) as live_client:
+        register_and_start_with(live_client)
+        first = live_client.get("/get_status").json()["next_team"]
+        with live_client.websocket_connect("/ws") as ws:
+            ws.receive_json()
+            live_client.post("/clock/start", json={"seconds": 0.05})
+            assert ws.receive_json()["type"] == "clock"
+            pick = ws.receive_json()
+            assert (pick["type"], pick["team"], pick["player"]) == ("pick", first, "Player 1")
+            clock = ws.receive_json()
+            assert (clock["type"], clock["team"], clock["remaining"]) == ("clock", pick["next_team"], 0.05)
+
+            live_client.post("/clock/start", json={"seconds": 0.05, "on_expiry": "skip"})
+            ws.receive_json()
+            assert ws.receive_json()["type"] == "skip"
+            live_client.post("/clock/cancel")
+
+def test_expiry_ignores_stale_timers_and_stops_when_stuck():
+    import main
+    register_and_start()
+    client.post("/clock/start", json={"seconds": 60})
+    # Timer still pending: the clock was reset after it fired
+    asyncio.run(main.expire_clock(DEFAULT_DRAFT_ID))
+    assert client.get("/get_status").json()["pick"] == 0
+    asyncio.run(main.expire_clock("missing"))
+
+    main.clocks.cancel(DEFAULT_DRAFT_ID)
+    room = main.default_room()
+    for player_id in range(len(room.catalog)):
+        room.players.take(player_id)
+    asyncio.run(main.expire_clock(DEFAULT_DRAFT_ID))
+    assert client.get("/get_status").json()["clock"]["state"] == "stopped"
+
+def test_availability_at_next_pick():
+    import main
+    register_and_start()
+    order = client.get("/get_status").json()
+    first = order["next_team"]
+    resp = client.get(f"/teams/{first}/availability", params={"limit": 3})
+    data = resp.json()
+    assert (data["pick"], data["picks_before"], data["seq"]) == (1, 0, 5)
+    assert [p["available"] for p in data["players"]] == [1.0, 1.0, 1.0]
+
+    client.post(f"/pick_player/{first}/Player 1")
+    resp = client.get(f"/teams/{first}/availability", params={"simulations": 200, "limit": 20})
+    data = resp.json()
+    assert (data["pick"], data["picks_before"], data["simulations"]) == (8, 6, 200)
+    odds = [p["available"] for p in data["players"]]
+    assert [p["name"] for p in data["players"]][0] == "Player 2"
+    assert odds[0] < 0.1 and odds[-1] > odds[0]
+    assert sum(1 - p for p in odds) == pytest.approx(6, abs=0.01)
+    # Same draft state: served from the cache
+    assert len(main.simulation_results) == 2
+    assert client.get(f"/teams/{first}/availability", params={"simulations": 200, "limit": 20}).json() == data
+    assert len(main.simulation_results) == 2
+
+def test_availability_errors():
+    client.post("/register_team", json={"team_name": "Team 0"})
+    assert client.get("/teams/Team 0/availability").json()["detail"] == "Draft has not started"
+    assert client.get("/teams/Nobody/availability").status_code == 404
+    assert client.get("/teams/Team 0/availability", params={"simulations": 0}).status_code == 422
+    register_and_start("/drafts/a")
+    client.post("/drafts/a/autocomplete")
+    resp = client.get("/drafts/a/teams/Team 0/availability")
+    assert resp.json()["detail"] == "Team 0 has no picks left"
+
+def test_draft_format_and_team_picks():
+    for i in range(4):
+        client.post("/register_team", json={"team_name": f"Team {i}"})
+    assert client.get("/teams/Team 0/picks").json()["detail"] == "Draft has not started"
+    assert client.post("/start_draft", json={"format": "auction"}).status_code == 400
+    resp = client.post("/start_draft", json={"format": "third_round_reversal"})
+    assert resp.json()["format"] == "third_round_reversal"
+    order = resp.json()["order"]
+    data = client.get(f"/teams/{order[0]}/picks").json()
+    assert data["format"] == "third_round_reversal"
+    # Round 3 runs in the same direction as round 2
+    assert data["picks"] == [{"pick": 1, "round": 1}, {"pick": 8, "round": 2},
+                             {"pick": 12, "round": 3}, {"pick": 13, "round": 4}, {"pick": 20, "round": 5}]
+    assert len(client.get(f"/teams/{order[0]}/picks", params={"limit": 2}).json()["picks"]) == 2
+    assert client.get("/teams/Nobody/picks").status_code == 404
+
+def test_trade_pick():
+    register_and_start("/drafts/t")
+    first = client.get("/drafts/t/get_status").json()["next_team"]
+    client.post(f"/drafts/t/teams/{first}/auto", json={"enabled": True})
+    status = client.get("/drafts/t/get_status").json()
+    assert status["pick"] == 1
+    other = status["next_team"]
+    # Trading the pick on the clock to an auto-pick team makes it pick at once
+    resp = client.post("/drafts/t/picks/2/trade", json={"team": first})
+    assert resp.status_code == 200
+    assert resp.json()["message"] == f"Pick 2 traded to {first}"
+    status = client.get("/drafts/t/get_status").json()
+    assert status["pick"] == 2
+    assert client.get(f"/drafts/t/teams/{other}/picks", params={"limit": 1}).json()["picks"][0]["pick"] != 2
+    assert client.post("/drafts/t/picks/1/trade", json={"team": other}).json()["detail"] == \
+        "Only picks not yet made can be traded"
+    assert client.post("/drafts/t/picks/99/trade", json={"team": other}).status_code == 400
+    client.post("/register_team", json={"team_name": "Team 0"})
+    assert client.post("/picks/5/trade", json={"team": "Team 0"}).json()["detail"] == "Draft is not in progress"
+
+def test_rate_limited_picks_are_not_processed_or_broadcast(monkeypatch):
+    import main
+    from admission import RateLimiter
+    register_and_start()
+    room = default_room_for_test()
+    team = room.get_next_team()
+    monkeypatch.setattr(main, "team_limits", RateLimiter(rate=0.001, burst=2))
+    seq = room.events.seq
+    # Two wrong picks use up the team's burst
+    for _ in range(2):
+        assert client.post(f"/pick_player/{team}/Nobody").status_code == 400
+    resp = client.post(f"/pick_player/{team}/Player 1")
+    assert resp.status_code == 429
+    assert int(resp.headers["Retry-After"]) >= 1
+    assert room.events.seq == seq
+    assert "Player 1" in room.players
+
+    monkeypatch.setattr(main, "client_limits", RateLimiter(rate=0.001, burst=1))
+    assert client.post("/drafts/x/register_team", json={"team_name": "A"}).status_code == 200
+    assert client.post("/drafts/x/register_team", json={"team_name": "B"}).json()["detail"] == "Too many requests"
+    assert 'draft_admission_rejections_total{limit="client"}' in client.get("/metrics").text
+
+def test_busy_draft_turns_requests_away(monkeypatch):
+    import main
+    from admission import ConcurrencyLimiter
+    monkeypatch.setattr(main, "room_limits", ConcurrencyLimiter(1))
+    main.room_limits.acquire(DEFAULT_DRAFT_ID)
+    resp = client.post("/register_team", json={"team_name": "Team 0"})
+    assert resp.status_code == 503
+    assert resp.headers["Retry-After"] == "1"
+    assert default_room_for_test().events.seq == 0
+    main.room_limits.release(DEFAULT_DRAFT_ID)
+    assert client.post("/register_team", json={"team_name": "Team 0"}).status_code == 200
+
+def test_retried_pick_with_idempotency_key_returns_first_result():
+    register_and_start("/drafts/i")
+    team = client.get("/drafts/i/get_status").json()["next_team"]
+    headers = {"Idempotency-Key": "pick-1"}
+    first = client.post(f"/drafts/i/pick_player/{team}/Player 1", headers=headers)
+    seq = client.get("/drafts/i/get_status").json()["seq"]
+    retry = client.post(f"/drafts/i/pick_player/{team}/Player 1", headers=headers)
+    assert (retry.status_code, retry.json()) == (200, first.json())
+    assert client.get("/drafts/i/get_status").json()["seq"] == seq
+    assert client.post(f"/drafts/i/pick_player/{team}/Player 2", headers=headers).status_code == 422
+    # Without the key the same request is a new, rejected pick
+    assert client.post(f"/drafts/i/pick_player/{team}/Player 1").json()["detail"] == "Not your turn!"
+    client.post("/register_team", json={"team_name": "Team 0"}, headers={"Idempotency-Key": "r"})
+    retry = client.post("/register_team", json={"team_name": "Team 0"}, headers={"Idempotency-Key": "r"})
+    assert retry.json() == {"message": "Team Team 0 registered successfully"}
+
+def test_websocket_heartbeat():
+    import time
+    import main
+    with client.websocket_connect("/ws") as websocket:
+        websocket.receive_json()
+        subscriber = next(iter(main.default_room().broadcaster.subscribers.values()))
+
+        def heartbeat(after):
+            # On the app's event loop, as the heartbeat task runs it
+            return websocket.portal.call(main.check_heartbeats, time.monotonic() + after)
+
+        assert heartbeat(main.WS_PING_INTERVAL) == 0
+        assert websocket.receive_json() == {"type": "ping"}
+        seen = subscriber.last_seen
+        websocket.send_json({"type": "pong"})
+        # A snapshot request is answered after the pong has been read
+        websocket.send_json({"type": "snapshot"})
+        assert websocket.receive_json()["type"] == "snapshot"
+        assert subscriber.last_seen > seen
+        assert heartbeat(main.WS_PING_INTERVAL + main.WS_PING_TIMEOUT) == 1
+        with pytest.raises(WebSocketDisconnect) as exc:
+            websocket.receive_json()
+        assert exc.value.code == 1011
+    assert len(main.default_room().broadcaster) == 0
+
+def snake_picks(order, rounds=5):
+    """Batch pick commands for a whole snake draft, players in ranking order."""
+    teams = []
+    for round_index in range(rounds):
+        teams.extend(order[::-1] if round_index % 2 else order)
+    return [{"type": "pick", "team": team, "player": f"Player {i + 1}"} for i, team in enumerate(teams)]
+
+def test_batch_replays_a_draft_with_one_broadcast():
+    import main
+    order = ["Team 2", "Team 0", "Team 3", "Team 1"]
+    commands = [{"type": "register_team", "team": f"Team {i}"} for i in range(4)]
+    commands.append({"type": "start_draft", "order": order})
+    picks = snake_picks(order)
+    # Team 1 keeps Player 4 with its first pick; everyone else picks in ranking order
+    picks[3]["type"] = "keeper"
+    picks[3]["round"] = 1
+    commands.append(picks.pop(3))
+    commands += picks
+    with client.websocket_connect("/ws") as websocket:
+        websocket.receive_json()
+        resp = client.post("/batch", json={"commands": commands})
+        assert resp.status_code == 200
+        assert resp.json() == {"message": "Applied 25 commands", "events": 26, "seq": 26, "next_team": None}
+        snapshot = websocket.receive_json()
+        assert (snapshot["type"], snapshot["seq"]) == ("snapshot", 26)
+        assert snapshot["draft_results"]["Team 1"][0] == "Player 4"
+        # The next message is for the next change: the batch sent nothing else
+        client.post("/teams/Team 0/auto", json={"enabled": True})
+        assert websocket.receive_json()["type"] == "auto_pick"
+    assert len(main.archive) == 1
+    assert client.get("/get_status").json()["seq"] == 27
+
+def test_rejected_batch_changes_nothing():
+    client.post("/drafts/t/register_team", json={"team_name": "Team 0"})
+    commands = [{"type": "register_team", "team": f"Team {i}"} for i in (1, 2, 3)]
+    commands += [{"type": "start_draft", "order": ["Team 0", "Team 1", "Team 2", "Team 3"]},
+                 {"type": "pick", "team": "Team 1", "player": "Player 1"}]
+    resp = client.post("/drafts/t/batch", json={"commands": commands})
+    assert (resp.status_code, resp.json()["detail"]) == (400, "Command 5 (pick): Not your turn!")
+    status = client.get("/drafts/t/get_status").json()
+    assert (status["seq"], status["registered_teams"]) == (1, ["Team 0"])
+    assert client.post("/drafts/t/batch", json={"commands": []}).status_code == 422
+    assert client.post("/drafts/t/batch", json={"commands": [{"type": "skip"}]}).status_code == 422
+    too_many = [{"type": "register_team", "team": "Team 9"}] * 1001
+    assert client.post("/drafts/t/batch", json={"commands": too_many}).status_code == 422
+
+def test_retried_batch_with_idempotency_key_runs_once():
+    commands = [{"type": "register_team", "team": f"Team {i}"} for i in range(4)]
+    headers = {"Idempotency-Key": "replay-1"}
+    first = client.post("/drafts/n/batch", json={"commands": commands}, headers=headers)
+    retry = client.post("/drafts/n/batch", json={"commands": commands}, headers=headers)
+    assert first.status_code == 200 and retry.json() == first.json()
+    assert client.get("/drafts/n/get_status").json()["seq"] == 4
+    other = client.post("/drafts/n/batch", json={"commands": commands[:1]}, headers=headers)
+    assert other.status_code == 422
+
+def test_finished_drafts_are_archived_for_analytics():
+    import main
+    assert client.get("/analytics/adp").json() == {"drafts": 0, "players": []}
+    for draft_id in ("a", "b"):
+        register_and_start(f"/drafts/{draft_id}")
+        client.post(f"/drafts/{draft_id}/autocomplete")
+    register_and_start("/drafts/unfinished")
+    assert len(main.archive) == 2
+
+    adp = client.get("/analytics/adp", params={"days": 30, "limit": 3}).json()
+    assert (adp["drafts"], adp["days"]) == (2, 30)
+    assert [p["name"] for p in adp["players"]] == ["Player 1", "Player 2", "Player 3"]
+    assert adp["players"][0]["adp"] == 1.0
+    qbs = client.get("/analytics/adp", params={"position": "QB"}).json()["players"]
+    assert {p["position"] for p in qbs} == {"QB"}
+    runs = client.get("/analytics/runs", params={"min_length": 2}).json()
+    assert runs["min_length"] == 2 and runs["positions"]
+    team = client.get("/analytics/teams/Team 0").json()
+    assert (team["drafts"], team["picks"]) == (2, 10)
+    assert client.get("/analytics/adp", params={"days": 0}).status_code == 422
+
+def test_archive_failure_does_not_fail_the_pick(monkeypatch):
+    import main
+
+    def broken(draft):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(main.archive, "add", broken)
+    register_and_start()
+    assert client.post("/autocomplete").json()["picks"] == 20
+
+class LoopbackCluster:
+    """Treats every draft as owned by another worker that shares this process's rooms."""
+
+    call_timeout = 5.0
+
+    def __init__(self):
+        self.calls = []
+
+    def is_local(self, draft_id):
+        return False
+
+    async def call(self, draft_id, command, args, timeout=None):
+        import main
+        self.calls.append(command)
+        # Round-trip through JSON like the cluster bus does
+        return json.loads(json.dumps(await main.execute_command(draft_id, command, args)))
+
+    def publish(self, draft_id, event):
+        import main
+        main.deliver_remote_event(draft_id, json.loads(json.dumps(event)))
+
+    async def stop(self):
+        pass
+
+def test_commands_are_forwarded_to_owner(monkeypatch):
+    import main
+    cluster = LoopbackCluster()
+    monkeypatch.setattr(main, "cluster", cluster)
+    assert register_and_start("/drafts/a").status_code == 200
+    assert client.get("/drafts/a/players", params={"limit": 1}).json()["next_cursor"] == 1
+    resp = client.post("/drafts/a/pick_player/Nobody/Player 1")
+    assert (resp.status_code, resp.json()) == (400, {"detail": "Not your turn!"})
+    assert client.get("/drafts/missing/get_status").status_code == 404
+    assert cluster.calls == ["register_team"] * 4 + ["start_draft", "players", "pick_player", "poll_status"]
+
+def test_unknown_command_is_rejected():
+    import main
+    with pytest.raises(DraftError, match="Unknown command"):
+        asyncio.run(main.execute_command("default", "drop_table", {}))
+
+def test_websocket_for_draft_owned_by_another_worker(monkeypatch):
+    """Clients of a remote draft get catch-up from the owner and its published events"""
+    import main
+    monkeypatch.setattr(main, "cluster", LoopbackCluster())
+    with TestClient(app) as live_client:
+        register_and_start_with(live_client, "/drafts/a")
+        with live_client.websocket_connect("/drafts/a/ws?last_seq=4") as ws:
+            assert (ws.receive_json()["type"]) == "draft_started"
+            next_team = live_client.get("/drafts/a/get_status").json()["next_team"]
+            live_client.post(f"/drafts/a/pick_player/{next_team}/Player 1")
+            pick = ws.receive_json()
+            assert (pick["type"], pick["seq"], pick["player"]) == ("pick", 6, "Player 1")
+            ws.send_json({"type": "snapshot"})
+            snapshot = ws.receive_json()
+            assert (snapshot["type"], snapshot["seq"]) == ("snapshot", 6)
+            assert "a" in main.remote_feeds
+        with pytest.raises(WebSocketDisconnect) as exc:
+            with live_client.websocket_connect("/drafts/nope/ws"):
+                pass
+        assert exc.value.code == 1008
+
+def test_remote_events_buffered_during_catch_up_are_not_duplicated(monkeypatch):
+    import main
+
+    class RacingCluster(LoopbackCluster):
+        async def call(self, draft_id, command, args):
+            messages = await super().call(draft_id, command, args)
+            if command == "catch_up":
+                # One event the catch-up already includes, one it does not
+                main.deliver_remote_event(draft_id, {"type": "pick", "seq": 1})
+                main.deliver_remote_event(draft_id, {"type": "pick", "seq": 2})
+            return messages
+
+    monkeypatch.setattr(main, "cluster", RacingCluster())
+    with TestClient(app) as live_client:
+        live_client.post("/drafts/a/register_team", json={"team_name": "Team A"})
+        with live_client.websocket_connect("/drafts/a/ws") as ws:
+            assert (ws.receive_json()["seq"], ws.receive_json()["seq"]) == (1, 2)
+    assert "a" not in main.remote_feeds
+
 # def test_websocket_connection():
 #     """Test WebSocket connection and message handling"""
 #     with client.websocket_connect("/ws") as websocket:
@@ -0,0 +1,82 @@
+import pytest
+from fastapi import FastAPI, WebSocket
+from fastapi.testclient import TestClient
+
+from metrics import Counter, Gauge, Histogram, MetricsMiddleware, Registry
+
+
+def test_counter_and_gauge_render():
+    registry = Registry()
+    picks = Counter("picks_total", "Picks made.", registry=registry)
+    rejected = Counter("rejected_total", "Rejected picks.", ("reason",), registry=registry)
+    rooms = Gauge("rooms", "Rooms.", registry=registry, function=lambda: 3)
+    queued = Gauge("queued", "Queued.", registry=registry)
+    picks.inc()
+    picks.inc(2)
+    rejected.labels('Not "your" turn!').inc()
+    queued.set(5)
+    queued.labels().dec(0.5)
+    assert registry.render() == (
+        "# HELP picks_total Picks made.\n"
+        "# TYPE picks_total counter\n"
+        "picks_total 3\n"
+        "# HELP rejected_total Rejected picks.\n"
+        "# TYPE rejected_total counter\n"
+        'rejected_total{reason="Not \\"your\\" turn!"} 1\n'
+        "# HELP rooms Rooms.\n"
+        "# TYPE rooms gauge\n"
+        "rooms 3\n"
+        "# HELP queued Queued.\n"
+        "# TYPE queued gauge\n"
+        "queued 4.5\n"
+    )
+    assert rooms.labelnames == ()
+    with pytest.raises(ValueError):
+        Counter("picks_total", "Again.", registry=registry)
+    with pytest.raises(ValueError):
+        rejected.labels()
+
+
+def test_histogram_buckets_are_cumulative():
+    registry = Registry()
+    latency = Histogram("latency_seconds", "Latency.", ("route",), registry=registry, buckets=(0.1, 0.01))
+    for value in (0.005, 0.01, 0.05, 2):
+        latency.labels("/a").observe(value)
+    lines = registry.render().splitlines()
+    assert lines[2:] == [
+        'latency_seconds_bucket{route="/a",le="0.01"} 2',
+        'latency_seconds_bucket{route="/a",le="0.1"} 3',
+        'latency_seconds_bucket{route="/a",le="+Inf"} 4',
+        'latency_seconds_sum{route="/a"} 2.065',
+        'latency_seconds_count{route="/a"} 4',
+    ]
+    unlabelled = Histogram("h", "H.", registry=registry, buckets=(1,))
+    unlabelled.observe(1)
+    assert 'h_bucket{le="1"} 1' in registry.render()
+
+
+def test_middleware_labels_requests_by_route():
+    registry = Registry()
+    latency = Histogram("latency", "Latency.", ("method", "route"), registry=registry)
+    requests = Counter("requests", "Requests.", ("method", "route", "status"), registry=registry)
+    app = FastAPI()
+    app.add_middleware(MetricsMiddleware, latency=latency, requests=requests)
+
+    @app.get("/drafts/{draft_id}")
+    async def draft(draft_id: str):
+        return {"draft_id": draft_id}
+
+    @app.websocket("/ws")
+    async def ws(websocket: WebSocket):
+        await websocket.accept()
+        await websocket.close()
+
+    client = TestClient(app)
+    client.get("/drafts/a")
+    client.get("/drafts/b")
+    client.get("/nowhere")
+    with client.websocket_connect("/ws"):
+        pass
+    assert set(requests.values) == {("GET", "/drafts/{draft_id}", "200"), ("GET", "unmatched", "404")}
+    assert requests.labels("GET", "/drafts/{draft_id}", "200").value == 2
+    assert sum(latency.labels("GET", "/drafts/{draft_id}").counts) == 2
@@ -0,0 +1,119 @@
+import asyncio
+
+import pytest
+
+from pick_clock import PickClock, RUNNING, STOPPED, TimingWheel
+
+
+class FakeTime:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_timers_fire_when_due_and_not_before():
+    now = FakeTime()
+    wheel = TimingWheel(tick=0.1, size=8, clock=now)
+    fired = []
+    wheel.schedule("a", 0.25, lambda: fired.append("a"))
+    wheel.schedule("b", 0.5, lambda: fired.append("b"))
+    assert len(wheel) == 2 and "a" in wheel
+    assert wheel.advance(now.now + 0.2) == 0
+    assert wheel.advance(now.now + 0.3) == 1
+    assert fired == ["a"] and "a" not in wheel
+    now.now += 0.3
+    assert wheel.remaining("b") == pytest.approx(0.2)
+    assert wheel.advance() == 0
+    now.now += 0.2
+    wheel.advance()
+    assert fired == ["a", "b"]
+    assert wheel.remaining("b") is None
+
+
+def test_schedule_replaces_and_cancel_reports_remaining():
+    now = FakeTime()
+    wheel = TimingWheel(tick=0.1, size=8, clock=now)
+    fired = []
+    wheel.schedule("a", 1.0, lambda: fired.append(1))
+    wheel.schedule("a", 2.0, lambda: fired.append(2))
+    assert len(wheel) == 1
+    now.now += 0.5
+    assert wheel.cancel("a") == pytest.approx(1.5)
+    assert wheel.cancel("a") is None
+    wheel.advance(now.now + 5)
+    assert fired == []
+
+
+def test_timers_beyond_one_turn_wait_for_their_turn():
+    now = FakeTime()
+    wheel = TimingWheel(tick=0.1, size=8, clock=now)
+    fired = []
+    # 2.05s is more than two turns of a 0.8s wheel
+    wheel.schedule("late", 2.05, lambda: fired.append("late"))
+    for _ in range(20):
+        now.now += 0.1
+        wheel.advance()
+    assert fired == []
+    now.now += 0.1
+    wheel.advance()
+    assert fired == ["late"]
+
+
+def test_long_pause_fires_everything_due_once():
+    now = FakeTime()
+    wheel = TimingWheel(tick=0.1, size=8, clock=now)
+    fired = []
+    for i in range(20):
+        wheel.schedule(i, 0.1 * i + 0.05, lambda i=i: fired.append(i))
+    assert wheel.advance(now.now + 100) == 20
+    assert sorted(fired) == list(range(20))
+
+
+def test_tick_only_visits_its_slot():
+    now = FakeTime()
+    wheel = TimingWheel(tick=0.1, size=1024, clock=now)
+    for i in range(10000):
+        wheel.schedule(i, 50 + (i % 500) * 0.1, lambda: None)
+    wheel.schedule("soon", 0.1, lambda: None)
+    now.now += 0.1
+    assert wheel.advance() == 1
+    assert len(wheel) == 10000
+
+
+def test_failing_callback_does_not_stop_others():
+    now = FakeTime()
+    wheel = TimingWheel(tick=0.1, clock=now)
+    fired = []
+    wheel.schedule("bad", 0.1, lambda: 1 / 0)
+    wheel.schedule("good", 0.1, lambda: fired.append("good"))
+    assert wheel.advance(now.now + 1) == 2
+    assert fired == ["good"]
+
+
+def test_clear():
+    wheel = TimingWheel()
+    wheel.schedule("a", 1, lambda: None)
+    wheel.clear()
+    assert len(wheel) == 0 and all(not slot for slot in wheel.slots)
+
+
+@pytest.mark.asyncio
+async def test_run_drives_timers_until_stopped():
+    wheel = TimingWheel(tick=0.01)
+    task = asyncio.create_task(wheel.run())
+    fired = asyncio.Event()
+    await asyncio.sleep(0.02)  # Idle wheel waits for a timer
+    wheel.schedule("a", 0.03, fired.set)
+    await asyncio.wait_for(fired.wait(), 1)
+    wheel.stop()
+    await asyncio.wait_for(task, 1)
+
+
+def test_pick_clock_state():
+    clock = PickClock()
+    assert clock.to_dict()["state"] == STOPPED
+    clock.set(RUNNING, 30)
+    assert clock.ends_at is not None
+    assert clock.to_dict()["remaining"] == 30
@@ -0,0 +1,44 @@
+import pytest
+
+from pick_schedule import LINEAR, SNAKE, THIRD_ROUND_REVERSAL, PickSchedule
+
+ORDER = ["A", "B", "C"]
+
+
+def rounds(schedule):
+    teams = len(schedule.order)
+    return ["".join(schedule.owners[i:i + teams]) for i in range(0, len(schedule), teams)]
+
+
+def test_formats():
+    assert rounds(PickSchedule(ORDER, 4)) == ["ABC", "CBA", "ABC", "CBA"]
+    assert rounds(PickSchedule(ORDER, 3, LINEAR)) == ["ABC", "ABC", "ABC"]
+    assert rounds(PickSchedule(ORDER, 5, THIRD_ROUND_REVERSAL)) == ["ABC", "CBA", "CBA", "ABC", "CBA"]
+    with pytest.raises(ValueError):
+        PickSchedule(ORDER, 2, "auction")
+
+
+def test_owner_and_round():
+    schedule = PickSchedule(ORDER, 2, SNAKE)
+    assert len(schedule) == 6
+    assert [schedule.owner(pick) for pick in (0, 3, 5, 6, -1)] == ["A", "C", "A", None, None]
+    assert [schedule.round_of(pick) for pick in (0, 2, 3, 6)] == [1, 1, 2, 3]
+
+
+def test_next_picks_and_picks_until():
+    schedule = PickSchedule(ORDER, 4)
+    assert schedule.next_picks("A", 0, 10) == [0, 5, 6, 11]
+    assert schedule.next_picks("A", 1, 2) == [5, 6]
+    assert schedule.next_picks("A", 12) == []
+    assert schedule.next_picks("Nobody", 0) == []
+    assert [schedule.picks_until("B", start) for start in (0, 1, 2, 11, 12)] == [1, 0, 2, None, None]
+
+
+def test_traded_picks():
+    schedule = PickSchedule(ORDER, 2, trades={1: "A"})
+    assert schedule.owners == ["A", "A", "C", "C", "B", "A"]
+    schedule.trade(3, "B")
+    assert schedule.trades == {1: "A", 3: "B"}
+    assert schedule.next_picks("B", 0, 5) == [3, 4]
+    assert schedule.next_picks("C", 0, 5) == [2]
+    assert schedule.picks_until("A", 2) == 3
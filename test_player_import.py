@@ -0,0 +1,152 @@
+import io
+import json
+
+import httpx
+import pytest
+
+import player_import
+from player_import import (CSV, JSONL, InvalidPlayerData, PoolStore, guess_format, load_catalog, main,
+                           read_catalog, write_catalog)
+from player_pool import DEFAULT_CATALOG, DEFAULT_POOL_ID
+
+PLAYERS_CSV = """Name,Position,Team,Rank,Projection,Bye
+Josh Allen,qb,BUF,3,380.5,12
+"Chase, Ja'Marr",WR,CIN,1,,10
+Bijan Robinson,RB,ATL,2,290,
+"""
+
+
+def test_csv_import():
+    catalog = load_catalog(io.StringIO(PLAYERS_CSV), CSV)
+    assert [catalog.players[i].name for i in catalog.by_rank] == ["Chase, Ja'Marr", "Bijan Robinson", "Josh Allen"]
+    allen = catalog.players[catalog.by_name["Josh Allen"]]
+    assert allen.to_dict() == {"id": 0, "name": "Josh Allen", "position": "QB", "team": "BUF", "rank": 3,
+                               "projection": 380.5, "info": {"bye": "12"}}
+    chase = catalog.players[catalog.by_name["Chase, Ja'Marr"]]
+    assert chase.projection is None and chase.info == {"bye": "10"}
+    assert catalog.players[2].info is None
+
+
+def test_jsonl_import_defaults_rank_to_row_order():
+    lines = [{"name": "A", "position": "QB", "proj_pts": 1}, {"name": "B", "projection": 2}, {"name": "C"}]
+    text = "\n".join(json.dumps(line) for line in lines) + "\n\n"
+    catalog = load_catalog(io.StringIO(text), JSONL)
+    assert [(p.name, p.rank, p.projection) for p in catalog.players] == [("A", 1, None), ("B", 2, 2.0), ("C", 3, None)]
+    assert catalog.players[0].info == {"proj_pts": 1}
+
+
+def test_rows_validated_in_batches(monkeypatch):
+    monkeypatch.setattr(player_import, "BATCH_SIZE", 3)
+    text = "name,rank\n" + "".join(f"P{i},{i}\n" for i in range(1, 11))
+    assert len(load_catalog(io.StringIO(text), CSV)) == 10
+    with pytest.raises(InvalidPlayerData) as exc:
+        load_catalog(io.StringIO(text + "P1,11\n"), CSV)
+    assert exc.value.errors == ["line 12: duplicate player 'P1' (first on line 2)"]
+
+
+def test_invalid_rows_reported_by_line():
+    text = "name,rank,projection\n,1,\nA,zero,\nB,0,\nC,1,lots\nD,1,inf\nE,1,2,extra\nF,1,1\n"
+    with pytest.raises(InvalidPlayerData) as exc:
+        load_catalog(io.StringIO(text), CSV)
+    assert exc.value.errors == [
+        "line 2: name is required",
+        "line 3: rank must be a positive integer",
+        "line 4: rank must be a positive integer",
+        "line 5: projection must be a number",
+        "line 6: projection must be a number",
+        "line 7: more fields than columns",
+    ]
+    with pytest.raises(InvalidPlayerData) as exc:
+        load_catalog(io.StringIO('{"name": "A"}\n[1]\n{oops\n'), JSONL)
+    assert exc.value.errors == ["line 2: expected a JSON object", "line 3: invalid JSON"]
+
+
+def test_import_limits(monkeypatch):
+    monkeypatch.setattr(player_import, "BATCH_SIZE", 2)
+    monkeypatch.setattr(player_import, "MAX_ERRORS", 3)
+    with pytest.raises(InvalidPlayerData) as exc:
+        load_catalog(io.StringIO("name\n" + ",\n" * 10), CSV)
+    assert len(exc.value.errors) == 3
+    with pytest.raises(InvalidPlayerData) as exc:
+        load_catalog(io.StringIO("name\nA\nB\nC\n"), CSV, max_players=2)
+    assert exc.value.errors == ["more than 2 players"]
+    with pytest.raises(InvalidPlayerData, match="no players"):
+        load_catalog(io.StringIO("name,rank\n"), CSV)
+    with pytest.raises(InvalidPlayerData, match="unreadable input"):
+        read_catalog(io.BytesIO(b"name\n\xff\xfe\n"), CSV)
+    with pytest.raises(ValueError):
+        load_catalog(io.StringIO(""), "xml")
+
+
+def test_guess_format():
+    assert guess_format("text/csv; charset=utf-8") == CSV
+    assert guess_format("application/x-ndjson") == JSONL
+    assert guess_format("players.CSV") == CSV
+    assert guess_format("players.ndjson") == JSONL
+    assert guess_format("players.txt") is None
+    assert guess_format(None) is None
+
+
+def test_pool_store_saves_and_shares_pools(tmp_path):
+    catalog = load_catalog(io.StringIO(PLAYERS_CSV), CSV)
+    store = PoolStore(str(tmp_path))
+    assert store.get(DEFAULT_POOL_ID) is DEFAULT_CATALOG
+    assert store.get("nfl") is None
+    store.add("nfl", catalog)
+    assert store.get("nfl") is catalog
+    with pytest.raises(FileExistsError):
+        store.add("nfl", catalog)
+    with pytest.raises(ValueError):
+        store.add("../nfl", catalog)
+    assert store.get("../nfl") is None
+
+    # Another worker (or a restart) loads the saved copy
+    other = PoolStore(str(tmp_path))
+    loaded = other.get("nfl")
+    assert [p.to_dict() for p in loaded.players] == [p.to_dict() for p in catalog.players]
+    with pytest.raises(FileExistsError):
+        PoolStore(str(tmp_path)).add("nfl", catalog)
+    other.clear()
+    assert other.pools == {DEFAULT_POOL_ID: DEFAULT_CATALOG}
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["nfl.jsonl"]
+
+
+def test_write_catalog_round_trips():
+    catalog = load_catalog(io.StringIO(PLAYERS_CSV), CSV)
+    out = io.StringIO()
+    write_catalog(catalog, out)
+    out.seek(0)
+    assert [p.to_dict() for p in load_catalog(out, JSONL).players] == [p.to_dict() for p in catalog.players]
+
+
+def test_cli_validates_file(tmp_path, capsys):
+    path = tmp_path / "players.csv"
+    path.write_text(PLAYERS_CSV)
+    assert main([str(path)]) == 0
+    assert json.loads(capsys.readouterr().out) == {"players": 3, "positions": {"WR": 1, "RB": 1, "QB": 1}}
+    path.write_text("name,rank\n\n,1\n")
+    assert main([str(path)]) == 1
+    assert "line 3: name is required" in capsys.readouterr().err
+    with pytest.raises(SystemExit):
+        main([str(tmp_path / "players.txt")])
+
+
+def test_cli_uploads_file(tmp_path, capsys):
+    path = tmp_path / "nfl.jsonl"
+    path.write_text('{"name": "A"}\n')
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        if request.url.path == "/pools/taken":
+            return httpx.Response(409, json={"detail": "Pool already exists"})
+        return httpx.Response(200, json={"pool": "nfl", "players": 1})
+
+    transport = httpx.MockTransport(handler)
+    assert main([str(path), "--server", "http://draft/"], client=httpx.Client(transport=transport)) == 0
+    assert str(requests[0].url) == "http://draft/pools/nfl?format=jsonl"
+    assert requests[0].read() == b'{"name": "A"}\n'
+    assert json.loads(capsys.readouterr().out)["players"] == 1
+    assert main([str(path), "--server", "http://draft", "--pool", "taken"],
+                client=httpx.Client(transport=transport)) == 1
+    assert "Pool already exists" in capsys.readouterr().err
@@ -0,0 +1,96 @@
+import pytest
+
+from player_pool import DEFAULT_CATALOG, PlayerCatalog, PlayerPool
+
+
+def sample_catalog():
+    return PlayerCatalog([
+        ("Josh Allen", "QB", "BUF", 3),
+        ("Bijan Robinson", "RB", "ATL", 2),
+        ("Ja'Marr Chase", "WR", "CIN", 1),
+        ("Josh Jacobs", "RB", "GB", 5),
+        ("Jalen Hurts", "QB", "PHI", 4),
+    ])
+
+
+def test_catalog_indexes():
+    catalog = sample_catalog()
+    assert len(catalog) == 5
+    assert catalog.by_name["Josh Allen"] == 0
+    assert [catalog.players[i].name for i in catalog.by_rank] == [
+        "Ja'Marr Chase", "Bijan Robinson", "Josh Allen", "Jalen Hurts", "Josh Jacobs",
+    ]
+    assert [catalog.players[i].name for i in catalog.by_position["QB"]] == ["Josh Allen", "Jalen Hurts"]
+    assert [catalog.players[i].name for i in catalog.prefix_range("JOSH")] == ["Josh Allen", "Josh Jacobs"]
+    assert catalog.prefix_range("zz") == ()
+
+
+def test_duplicate_names_rejected():
+    with pytest.raises(ValueError):
+        PlayerCatalog([("A", "QB", "", 1), ("A", "RB", "", 2)])
+
+
+def test_take_is_per_pool():
+    catalog = sample_catalog()
+    a, b = PlayerPool(catalog), PlayerPool(catalog)
+    player = a.get("Josh Allen")
+    a.take(player.id)
+    a.take(player.id)
+    assert "Josh Allen" not in a
+    assert a.get("Josh Allen") is None
+    assert "Josh Allen" in b
+    assert len(a) == 4
+    assert len(b) == 5
+    assert a.get("Nobody") is None
+    assert "Nobody" not in a
+
+
+def test_names_in_rank_order():
+    pool = PlayerPool(sample_catalog())
+    pool.take(pool.get("Bijan Robinson").id)
+    assert pool.names() == ["Ja'Marr Chase", "Josh Allen", "Jalen Hurts", "Josh Jacobs"]
+
+
+def test_query_pagination_skips_drafted_players():
+    pool = PlayerPool(sample_catalog())
+    pool.take(pool.get("Josh Allen").id)
+    page, cursor = pool.query(limit=2)
+    assert [p.name for p in page] == ["Ja'Marr Chase", "Bijan Robinson"]
+    # Drafting a player that is on a later page does not shift the cursor
+    pool.take(pool.get("Jalen Hurts").id)
+    page, cursor = pool.query(cursor=cursor, limit=2)
+    assert [p.name for p in page] == ["Josh Jacobs"]
+    assert cursor is None
+
+
+def test_query_filters():
+    pool = PlayerPool(sample_catalog())
+    page, _ = pool.query(position="RB")
+    assert [p.name for p in page] == ["Bijan Robinson", "Josh Jacobs"]
+    page, _ = pool.query(prefix="j")
+    assert [p.name for p in page] == ["Ja'Marr Chase", "Jalen Hurts", "Josh Allen", "Josh Jacobs"]
+    page, _ = pool.query(prefix="jo", position="QB")
+    assert [p.to_dict() for p in page] == [
+        {"id": 0, "name": "Josh Allen", "position": "QB", "team": "BUF", "rank": 3},
+    ]
+    assert pool.query(position="K") == ([], None)
+
+
+def test_default_catalog_is_shared():
+    assert len(DEFAULT_CATALOG) == 20
+    assert PlayerPool().catalog is PlayerPool().catalog
+    assert PlayerPool().names()[:2] == ["Player 1", "Player 2"]
+
+
+def test_best_available_skips_drafted_players():
+    pool = PlayerPool()
+    assert pool.best_available().name == "Player 1"
+    assert pool.best_available("RB").name == "Player 2"
+    pool.take(0)
+    pool.take(1)
+    assert pool.best_available().name == "Player 3"
+    assert pool.best_available("RB").name == "Player 6"
+    assert pool.best_available("K") is None
+    for player_id in range(len(pool.catalog)):
+        pool.take(player_id)
+    assert pool.best_available() is None
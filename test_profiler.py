@@ -0,0 +1,43 @@
+import sys
+import threading
+import time
+
+import pytest
+
+from profiler import SamplingProfiler
+
+
+def busy(stop):
+    while not stop.is_set():
+        sum(range(100))
+
+
+def test_samples_collapse_into_stacks():
+    profiler = SamplingProfiler()
+    stop = threading.Event()
+    worker = threading.Thread(target=busy, args=(stop,), name="busy-worker")
+    worker.start()
+    try:
+        profiler.start(interval=0.001)
+        with pytest.raises(RuntimeError):
+            profiler.start()
+        time.sleep(0.05)
+        result = profiler.stop()
+    finally:
+        stop.set()
+        worker.join()
+    assert profiler.samples > 0 and not profiler.running
+    assert any(line.startswith("busy-worker;") and "test_profiler.py:busy " in line for line in result.splitlines())
+    with pytest.raises(RuntimeError):
+        profiler.stop()
+
+
+def test_sample_skips_the_sampling_thread():
+    profiler = SamplingProfiler()
+    frames = dict(sys._current_frames())
+    profiler.sample(frames)
+    assert profiler.samples == 1
+    assert not any("test_sample_skips_the_sampling_thread" in stack for stack in profiler.stacks)
+    profiler.sample({12345: sys._getframe()})
+    stack = profiler.collapsed().splitlines()[-1]
+    assert stack.startswith("12345;") and stack.endswith(";test_profiler.py:test_sample_skips_the_sampling_thread 1")
@@ -0,0 +1,67 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import simulator
+from simulator import ResultCache, availability, candidates, simulate_batch
+
+
+def test_certain_outcomes():
+    assert simulate_batch([1, 2, 3], 0, 10) == [10, 10, 10]
+    assert simulate_batch([1, 2, 3], 3, 10) == [0, 0, 0]
+
+
+def test_better_ranked_players_go_first():
+    ranks = list(range(1, 31))
+    survived = simulate_batch(ranks, 5, 400, seed=1)
+    assert survived[0] < 20            # The best player is almost always gone
+    assert survived[-1] == 400         # Rank 30 never goes in 5 picks
+    assert sum(400 - s for s in survived) == 5 * 400
+    assert simulate_batch(ranks, 5, 50, seed=7) == simulate_batch(ranks, 5, 50, seed=7)
+
+
+def test_candidates_grow_with_picks():
+    assert candidates(0) < candidates(10)
+
+
+@pytest.mark.asyncio
+async def test_availability_combines_batches(monkeypatch):
+    monkeypatch.setattr(simulator, "BATCH_SIZE", 100)
+    with ThreadPoolExecutor(2) as pool:
+        odds = await availability(list(range(1, 21)), 4, 250, pool, seed=3)
+    assert len(odds) == 20
+    assert all(0 <= p <= 1 for p in odds)
+    assert sum(1 - p for p in odds) == pytest.approx(4)
+    assert odds[0] < odds[10]
+    assert len(await availability([1, 2], 1, 10)) == 2
+
+
+@pytest.mark.asyncio
+async def test_result_cache_reuses_and_shares_runs():
+    cache = ResultCache(maxsize=2)
+    runs = []
+
+    async def compute(value):
+        runs.append(value)
+        await asyncio.sleep(0.01)
+        return value
+
+    results = await asyncio.gather(cache.get("a", lambda: compute(1)), cache.get("a", lambda: compute(2)))
+    assert results == [1, 1] and runs == [1]
+    assert await cache.get("a", lambda: compute(3)) == 1
+    await cache.get("b", lambda: compute(4))
+    await cache.get("a", lambda: compute(5))
+    await cache.get("c", lambda: compute(6))
+    # "b" was least recently used
+    assert list(cache.entries) == ["a", "c"]
+    assert len(cache) == 2
+
+    async def fail():
+        raise ValueError("boom")
+
+    with pytest.raises(ValueError):
+        await cache.get("d", fail)
+    assert "d" not in cache.entries
+    cache.clear()
+    assert len(cache) == 0
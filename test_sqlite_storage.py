@@ -0,0 +1,86 @@
+import sqlite3
+
+from sqlite_storage import SQLiteStorage
+
+
+def open_storage(path, **kwargs):
+    storage = SQLiteStorage(str(path), flush_interval=0.001, **kwargs)
+    return storage, storage.open()
+
+
+def event(seq, team):
+    return {"type": "team_registered", "seq": seq, "team": team}
+
+
+def test_events_survive_restart(tmp_path):
+    path = tmp_path / "drafts.db"
+    storage, recovered = open_storage(path)
+    assert recovered.drafts == [] and recovered.tail == []
+    storage.append("a", event(1, "A"))
+    storage.append("b", event(1, "B"))
+    assert storage.flush(timeout=1)
+    storage.close()
+
+    storage, recovered = open_storage(path)
+    assert recovered.tail == [("a", event(1, "A")), ("b", event(1, "B"))]
+    assert storage.append("a", event(2, "C")) == 3
+    storage.close()
+
+
+def test_wal_mode(tmp_path):
+    path = tmp_path / "drafts.db"
+    storage, _ = open_storage(path)
+    storage.close()
+    conn = sqlite3.connect(str(path))
+    assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    conn.close()
+
+
+def test_snapshot_limits_replay_but_keeps_history(tmp_path):
+    path = tmp_path / "drafts.db"
+    storage, _ = open_storage(path, snapshot_every=2)
+    storage.append("a", event(1, "A"))
+    storage.append("a", event(2, "B"))
+    assert storage.should_snapshot()
+    storage.snapshot([{"draft_id": "a", "seq": 2}])
+    storage.append("a", event(3, "C"))
+    storage.close()
+
+    storage, recovered = open_storage(path)
+    assert recovered.drafts == [{"draft_id": "a", "seq": 2}]
+    assert recovered.tail == [("a", event(3, "C"))]
+    assert [e["team"] for e in storage.history("a")] == ["A", "B", "C"]
+    assert storage.history("missing") == []
+    storage.close()
+
+
+def test_history_of_a_reused_draft_id(tmp_path):
+    storage, _ = open_storage(tmp_path / "drafts.db")
+    storage.append("a", event(1, "Old"))
+    storage.append("a", event(2, "Older"))
+    storage.evict("a")
+    storage.append("a", event(1, "New"))
+    storage.close()
+
+    storage, recovered = open_storage(tmp_path / "drafts.db")
+    assert [e["team"] for e in storage.history("a")] == ["New"]
+    assert [e["team"] for e in storage.history("a", incarnation=0)] == ["Old", "Older"]
+    assert storage.history("a", incarnation=5) == []
+    assert [event["type"] for _, event in recovered.tail] == ["team_registered", "team_registered", "evicted",
+                                                              "team_registered"]
+    storage.close()
+
+
+def test_batch_is_rolled_back_on_error(tmp_path):
+    path = tmp_path / "drafts.db"
+    storage, _ = open_storage(path)
+    storage.close()
+    storage._conn = storage._connect()
+    try:
+        storage._write_batch([(1, "a", event(1, "A")), (1, "a", event(1, "dup"))])
+    except sqlite3.IntegrityError:
+        pass
+    else:
+        raise AssertionError("duplicate lsn should fail")
+    assert storage.history("a") == []
+    storage._close()
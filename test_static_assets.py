@@ -0,0 +1,108 @@
+import asyncio
+import gzip
+import os
+
+import pytest
+from starlette.requests import Request
+
+import static_assets
+from static_assets import IMMUTABLE, REVALIDATE, Asset, AssetStore, accepted_encodings, choose_encoding
+
+PAGE = b"<html>" + b"<p>Fantasy draft</p>" * 100 + b"</html>"
+
+
+def request(**headers):
+    return Request({"type": "http", "headers": [(name.replace("_", "-").encode(), value.encode())
+                                                for name, value in headers.items()]})
+
+
+@pytest.fixture
+def store(tmp_path):
+    (tmp_path / "index.html").write_bytes(PAGE)
+    (tmp_path / "js").mkdir()
+    (tmp_path / "js" / "app.js").write_bytes(b"let x = 1;")
+    return AssetStore(str(tmp_path))
+
+
+def test_assets_are_compressed_when_it_helps():
+    asset = Asset("index.html", PAGE)
+    assert asset.media_type == "text/html; charset=utf-8"
+    assert list(asset.bodies) == ["gzip", "identity"]
+    assert gzip.decompress(asset.bodies["gzip"]) == PAGE
+    assert asset.etag("identity") != asset.etag("gzip")
+    # Too small, or not text
+    assert list(Asset("a.js", b"let x = 1;").bodies) == ["identity"]
+    assert list(Asset("logo.png", bytes(1000)).bodies) == ["identity"]
+    assert Asset("data.unknown", b"").media_type == "application/octet-stream"
+
+
+def test_brotli_is_preferred_when_installed(monkeypatch):
+    class FakeBrotli:
+        @staticmethod
+        def compress(body):
+            return b"br" + body[:10]
+
+    monkeypatch.setattr(static_assets, "brotli", FakeBrotli)
+    asset = Asset("index.html", PAGE)
+    assert list(asset.bodies) == ["br", "gzip", "identity"]
+    assert choose_encoding(asset, "gzip, deflate, br") == "br"
+    assert choose_encoding(asset, "gzip") == "gzip"
+
+
+def test_accept_encoding_negotiation():
+    assert accepted_encodings("gzip;q=0.5, br , identity;q=x,") == {"gzip": 0.5, "br": 1.0, "identity": 0.0}
+    asset = Asset("index.html", PAGE)
+    assert choose_encoding(asset, None) == "identity"
+    assert choose_encoding(asset, "gzip;q=0") == "identity"
+    assert choose_encoding(asset, "*") == "gzip"
+    assert choose_encoding(asset, "*, gzip;q=0") == "identity"
+
+
+def test_responses(store):
+    page = store.response("index.html", request(accept_encoding="gzip"))
+    assert page.headers["content-encoding"] == "gzip"
+    assert page.headers["cache-control"] == REVALIDATE
+    assert page.headers["vary"] == "Accept-Encoding"
+    assert gzip.decompress(page.body) == PAGE
+
+    plain = store.response("index.html", request())
+    assert plain.body == PAGE and "content-encoding" not in plain.headers
+    # Each encoding's ETag validates the others
+    for etag in (page.headers["etag"], f'W/{plain.headers["etag"]}', "*"):
+        revalidated = store.response("index.html", request(accept_encoding="gzip", if_none_match=etag))
+        assert (revalidated.status_code, revalidated.body) == (304, b"")
+        assert revalidated.headers["etag"] == page.headers["etag"]
+    assert store.response("index.html", request(if_none_match='"stale"')).status_code == 200
+
+    url = store.url("js/app.js")
+    assert url.startswith("/static/js/app.") and url.endswith(".js")
+    hashed = store.response(url[len("/static/"):], request())
+    assert (hashed.body, hashed.headers["cache-control"]) == (b"let x = 1;", IMMUTABLE)
+    assert store.response("js/app.00000000.js", request()).status_code == 404
+    assert store.response("missing.css", request()).status_code == 404
+
+
+def test_reload_picks_up_changes(store, tmp_path):
+    assert store.reload() == []
+    old_url = store.url("js/app.js")
+    path = tmp_path / "js" / "app.js"
+    path.write_bytes(b"let x = 2;")
+    os.utime(path, (1, 1))
+    (tmp_path / "index.html").unlink()
+    (tmp_path / "new.css").write_bytes(b"body {}")
+    assert sorted(store.reload()) == ["index.html", "js/app.js", "new.css"]
+    assert sorted(store.assets) == ["js/app.js", "new.css"]
+    assert store.url("js/app.js") != old_url
+    assert store.response(old_url[len("/static/"):], request()).status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_watch_reloads_in_the_background(store, tmp_path):
+    task = asyncio.ensure_future(store.watch(interval=0.01))
+    (tmp_path / "late.txt").write_bytes(b"hello")
+    for _ in range(100):
+        if "late.txt" in store.assets:
+            break
+        await asyncio.sleep(0.01)
+    task.cancel()
+    assert store.assets["late.txt"].bodies["identity"] == b"hello"
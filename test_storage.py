@@ -0,0 +1,125 @@
+import time
+
+import pytest
+
+from storage import BatchedStorage, MemoryStorage, StorageError
+
+
+def test_memory_storage_keeps_nothing():
+    storage = MemoryStorage()
+    recovered = storage.open()
+    assert recovered.drafts == [] and recovered.tail == []
+    assert storage.append("a", {"seq": 1}) == 0
+    assert storage.append_many("a", [{"seq": 2}, {"seq": 3}]) == 0
+    assert not storage.should_snapshot()
+    storage.snapshot([{"draft_id": "a"}])
+    assert storage.flush(timeout=0)
+    storage.close()
+
+
+def test_batched_storage_requires_backend_methods():
+    storage = BatchedStorage()
+    with pytest.raises(NotImplementedError):
+        storage._load()
+    with pytest.raises(NotImplementedError):
+        storage._write_batch([])
+    with pytest.raises(NotImplementedError):
+        storage._close()
+
+
+class RecordingStorage(BatchedStorage):
+    def __init__(self):
+        super().__init__(flush_interval=0)
+        self.batches = []
+
+    def _load(self):
+        return 0, 0, [], []
+
+    def _write_batch(self, jobs):
+        self.batches.append(jobs)
+
+    def _close(self):
+        pass
+
+
+def test_events_appended_together_are_written_together():
+    storage = RecordingStorage()
+    storage.open()
+    assert storage.append_many("a", [{"seq": 1}, {"seq": 2}, {"seq": 3}]) == 3
+    assert storage.since_snapshot == 3
+    assert storage.flush(timeout=5)
+    storage.close()
+    assert [[job[0] for job in batch] for batch in storage.batches] == [[1, 2, 3]]
+
+
+def test_snapshots_are_serialized_on_the_writer_thread(monkeypatch):
+    import json
+    import threading
+    import storage as storage_module
+    threads = []
+    real_dumps = json.dumps
+
+    def dumps(record, **kwargs):
+        threads.append(threading.current_thread().name)
+        return real_dumps(record, **kwargs)
+
+    class SerializingStorage(RecordingStorage):
+        def _write_batch(self, jobs):
+            self.batches.append([job.serialized() if isinstance(job, storage_module.Snapshot) else job
+                                 for job in jobs])
+
+    monkeypatch.setattr(storage_module.json, "dumps", dumps)
+    storage = SerializingStorage()
+    storage.open()
+    storage.append("a", {"seq": 1})
+    storage.snapshot([{"draft_id": "a", "seq": 1}])
+    storage.close()
+    assert threads == ["SerializingStorage-writer"]
+    assert storage.batches[-1][-1] == [("a", '{"draft_id":"a","seq":1}')]
+
+
+def wait_until_durable(storage, lsn, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while storage.durable_lsn < lsn and time.monotonic() < deadline:
+        time.sleep(0.005)
+    return storage.durable_lsn >= lsn
+
+
+class FailingStorage(RecordingStorage):
+    """Fails every write until `failures` runs out."""
+
+    def __init__(self, failures):
+        super().__init__()
+        self.failures = failures
+
+    def _write_batch(self, jobs):
+        if self.failures:
+            self.failures -= 1
+            raise OSError("No space left on device")
+        super()._write_batch(jobs)
+
+
+def test_failed_writes_are_retried_in_order(caplog):
+    storage = FailingStorage(failures=2)
+    storage.open()
+    storage.append("a", {"seq": 1})
+    storage.append("a", {"seq": 2})
+    assert wait_until_durable(storage, 2)
+    storage.append("a", {"seq": 3})
+    assert storage.flush(timeout=5)
+    assert storage.error is None
+    storage.close()
+    assert [job[0] for batch in storage.batches for job in batch] == [1, 2, 3]
+    assert "could not write" in caplog.text
+
+
+def test_flush_raises_while_writes_fail():
+    storage = FailingStorage(failures=-1)
+    storage.open()
+    storage.append("a", {"seq": 1})
+    with pytest.raises(StorageError, match="No space left"):
+        storage.flush(timeout=5)
+    assert isinstance(storage.error, OSError)
+    # Closing makes one last attempt instead of retrying forever.
+    storage.close()
+    assert storage.batches == []